@@ -0,0 +1,841 @@
+#!/usr/bin/env python3
+"""
+Postgres Connection Multiplexer for PyAirtable
+Purpose: Transaction-level pooling sidecar that caps Postgres backends across services
+
+Every service that calls create_connection_manager() keeps its own sync and
+async pools. Pointing those pools at this process (DB_MULTIPLEXER_ENABLED=true)
+lets all of them share a small pool of real backend connections: a backend is
+assigned to a client only for the duration of a transaction (or a single
+extended-protocol exchange outside one) and returned to the pool as soon as
+Postgres reports the connection idle.
+
+Prepared statements keep working: named statements are renamed per client and
+re-prepared transparently on whichever backend a client lands on, so asyncpg's
+statement cache and the named query registry need no changes.
+
+Not supported in transaction mode (same as PgBouncer): session-level SET,
+LISTEN/NOTIFY, session advisory locks, WITH HOLD cursors and TLS to clients.
+Without TLS, clients authenticate with SCRAM-SHA-256 by default so the
+password never crosses the wire; the listener binds to localhost unless
+DB_MULTIPLEXER_LISTEN_HOST says otherwise.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import struct
+import time
+import urllib.parse
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+try:
+    from prometheus_client import Counter, Gauge, start_http_server
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+class MultiplexerConfig:
+    """Multiplexer settings from environment"""
+
+    DATABASE_URL = os.getenv('DATABASE_URL', '')
+    LISTEN_HOST = os.getenv('DB_MULTIPLEXER_LISTEN_HOST', '127.0.0.1')  # Sidecar: same host or pod only
+    LISTEN_PORT = int(os.getenv('DB_MULTIPLEXER_PORT', '6432'))
+    POOL_SIZE = int(os.getenv('DB_MULTIPLEXER_POOL_SIZE', '10'))  # Real Postgres backends shared by all clients
+    POOL_TIMEOUT = float(os.getenv('DB_MULTIPLEXER_POOL_TIMEOUT', '30'))  # Wait for a free backend
+    SERVER_LIFETIME = float(os.getenv('DB_MULTIPLEXER_SERVER_LIFETIME', '3600'))  # Recycle backends after this many seconds
+    # Client authentication against the DATABASE_URL password: 'scram-sha-256', 'md5',
+    # 'password' (cleartext, explicit opt-in only) or 'trust'
+    CLIENT_AUTH = os.getenv('DB_MULTIPLEXER_AUTH', 'scram-sha-256')
+    METRICS_PORT = int(os.getenv('DB_MULTIPLEXER_METRICS_PORT', '0'))  # 0 disables the Prometheus endpoint
+    STATS_INTERVAL = float(os.getenv('DB_MULTIPLEXER_STATS_INTERVAL', '60'))
+    # Client startup parameters accepted without effect; others must match the backend's value
+    IGNORE_STARTUP_PARAMETERS = [
+        name.strip().lower()
+        for name in os.getenv('DB_MULTIPLEXER_IGNORE_STARTUP_PARAMETERS', 'application_name,fallback_application_name').split(',')
+        if name.strip()
+    ]
+
+    # Applied to every backend connection, since client startup settings are not session-scoped here
+    SERVER_SETTINGS = {
+        'application_name': 'pyairtable_multiplexer',
+        'client_encoding': 'UTF8',
+        'jit': 'off',
+        'TimeZone': 'UTC'
+    }
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+if PROMETHEUS_AVAILABLE:
+    MULTIPLEXER_CLIENTS = Gauge('db_multiplexer_clients', 'Connected client connections')
+    MULTIPLEXER_BACKENDS = Gauge('db_multiplexer_backends', 'Open Postgres backend connections', ['state'])
+    MULTIPLEXER_WAITING = Gauge('db_multiplexer_waiting_clients', 'Clients waiting for a backend')
+    MULTIPLEXER_TRANSACTIONS_TOTAL = Counter(
+        'db_multiplexer_transactions_total', 'Backend assignments returned to the pool'
+    )
+
+# =============================================================================
+# WIRE PROTOCOL HELPERS
+# =============================================================================
+
+PROTOCOL_VERSION = 196608  # 3.0
+SSL_REQUEST_CODE = 80877103
+GSSENC_REQUEST_CODE = 80877104
+CANCEL_REQUEST_CODE = 80877102
+
+class ProtocolError(Exception):
+    """Raised when a peer sends something the multiplexer cannot handle"""
+
+def build_message(msg_type: bytes, body: bytes = b'') -> bytes:
+    return msg_type + struct.pack('!I', len(body) + 4) + body
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[bytes, bytes]:
+    header = await reader.readexactly(5)
+    length = struct.unpack('!I', header[1:])[0]
+    return header[:1], await reader.readexactly(length - 4)
+
+def split_cstring(data: bytes) -> Tuple[bytes, bytes]:
+    """Split a NUL-terminated string off the front of a message body"""
+    end = data.index(b'\0')
+    return data[:end], data[end + 1:]
+
+def error_response(message: str, code: str = '08006', severity: str = 'FATAL') -> bytes:
+    fields = (
+        b'S' + severity.encode() + b'\0' +
+        b'V' + severity.encode() + b'\0' +
+        b'C' + code.encode() + b'\0' +
+        b'M' + message.encode() + b'\0'
+    )
+    return build_message(b'E', fields + b'\0')
+
+def error_message_text(body: bytes) -> str:
+    """Extract the human readable message from an ErrorResponse body"""
+    for field in body.split(b'\0'):
+        if field[:1] == b'M':
+            return field[1:].decode(errors='replace')
+    return 'unknown error'
+
+# =============================================================================
+# BACKEND CONNECTIONS
+# =============================================================================
+
+class BackendConnection:
+    """One authenticated connection to Postgres plus the statements prepared on it"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.pid = 0
+        self.secret = 0
+        self.parameters: Dict[str, str] = {}
+        self.created_at = time.monotonic()
+        self.prepared: Set[bytes] = set()  # Backend-side statement names
+        self.unnamed_owner: Optional[Tuple[int, int]] = None  # (client id, parse sequence)
+        # One entry per Parse in flight; True for Parses injected by the multiplexer
+        self.expect_parse_complete: Deque[bool] = deque()
+        self.stale: Set[bytes] = set()  # Statements of departed clients, closed on next use
+        self.expect_close_complete: Deque[bool] = deque()  # Same as above, for Close
+        self.swallow_ready = 0  # ReadyForQuery answers to Syncs the multiplexer injected
+
+    @classmethod
+    async def connect(cls, url: urllib.parse.ParseResult) -> 'BackendConnection':
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 5432)
+        backend = cls(reader, writer)
+        try:
+            await backend._startup(url)
+        except BaseException:
+            backend.close()
+            raise
+        return backend
+
+    async def _startup(self, url: urllib.parse.ParseResult):
+        user = urllib.parse.unquote(url.username or '')
+        password = urllib.parse.unquote(url.password or '')
+        params = {'user': user, 'database': url.path[1:] or user, **MultiplexerConfig.SERVER_SETTINGS}
+        body = struct.pack('!I', PROTOCOL_VERSION)
+        body += b''.join(key.encode() + b'\0' + value.encode() + b'\0' for key, value in params.items()) + b'\0'
+        self.writer.write(struct.pack('!I', len(body) + 4) + body)
+
+        scram = None
+        while True:
+            msg_type, body = await read_message(self.reader)
+            if msg_type == b'E':
+                raise ProtocolError(f"Backend refused connection: {error_message_text(body)}")
+            if msg_type == b'R':
+                code = struct.unpack('!I', body[:4])[0]
+                if code == 0:
+                    continue
+                elif code == 3:
+                    self._send(b'p', password.encode() + b'\0')
+                elif code == 5:
+                    inner = hashlib.md5((password + user).encode()).hexdigest()
+                    digest = 'md5' + hashlib.md5(inner.encode() + body[4:8]).hexdigest()
+                    self._send(b'p', digest.encode() + b'\0')
+                elif code == 10:
+                    if b'SCRAM-SHA-256' not in body[4:].split(b'\0'):
+                        raise ProtocolError("Backend requires an unsupported SASL mechanism")
+                    scram = ScramSha256(password)
+                    first = scram.client_first()
+                    self._send(b'p', b'SCRAM-SHA-256\0' + struct.pack('!I', len(first)) + first)
+                elif code == 11:
+                    self._send(b'p', scram.client_final(body[4:]))
+                elif code == 12:
+                    scram.verify_server_final(body[4:])
+                else:
+                    raise ProtocolError(f"Unsupported authentication method {code}")
+            elif msg_type == b'S':
+                key, rest = split_cstring(body)
+                value, _ = split_cstring(rest)
+                self.parameters[key.decode()] = value.decode()
+            elif msg_type == b'K':
+                self.pid, self.secret = struct.unpack('!II', body)
+            elif msg_type == b'Z':
+                return
+            await self.writer.drain()
+
+    def _send(self, msg_type: bytes, body: bytes):
+        self.writer.write(build_message(msg_type, body))
+
+    def is_expired(self) -> bool:
+        return time.monotonic() - self.created_at > MultiplexerConfig.SERVER_LIFETIME
+
+    def close(self):
+        if not self.writer.is_closing():
+            try:
+                self.writer.write(build_message(b'X'))
+            except Exception:
+                pass
+            self.writer.close()
+
+class ScramSha256:
+    """Client side of SCRAM-SHA-256 authentication (RFC 5802/7677)"""
+
+    def __init__(self, password: str):
+        self.password = password.encode()
+        self.nonce = base64.b64encode(secrets.token_bytes(18)).decode()
+        self.client_first_bare = f"n=,r={self.nonce}"
+        self.auth_message = b''
+        self.salted_password = b''
+
+    def client_first(self) -> bytes:
+        return f"n,,{self.client_first_bare}".encode()
+
+    def client_final(self, server_first: bytes) -> bytes:
+        attributes = dict(item.split('=', 1) for item in server_first.decode().split(','))
+        if not attributes['r'].startswith(self.nonce):
+            raise ProtocolError("SCRAM server nonce does not extend client nonce")
+        self.salted_password = hashlib.pbkdf2_hmac(
+            'sha256', self.password, base64.b64decode(attributes['s']), int(attributes['i'])
+        )
+        client_key = hmac.new(self.salted_password, b'Client Key', hashlib.sha256).digest()
+        stored_key = hashlib.sha256(client_key).digest()
+        without_proof = f"c=biws,r={attributes['r']}"
+        self.auth_message = f"{self.client_first_bare},{server_first.decode()},{without_proof}".encode()
+        signature = hmac.new(stored_key, self.auth_message, hashlib.sha256).digest()
+        proof = bytes(a ^ b for a, b in zip(client_key, signature))
+        return f"{without_proof},p={base64.b64encode(proof).decode()}".encode()
+
+    def verify_server_final(self, server_final: bytes):
+        server_key = hmac.new(self.salted_password, b'Server Key', hashlib.sha256).digest()
+        expected = hmac.new(server_key, self.auth_message, hashlib.sha256).digest()
+        attributes = dict(item.split('=', 1) for item in server_final.decode().split(','))
+        if not hmac.compare_digest(base64.b64decode(attributes.get('v', '')), expected):
+            raise ProtocolError("SCRAM server signature mismatch")
+
+class ScramSha256Verifier:
+    """Server side of SCRAM-SHA-256, checking clients against a known password"""
+
+    ITERATIONS = 4096
+
+    def __init__(self, password: str):
+        self.salt = secrets.token_bytes(16)
+        salted_password = hashlib.pbkdf2_hmac('sha256', password.encode(), self.salt, self.ITERATIONS)
+        client_key = hmac.new(salted_password, b'Client Key', hashlib.sha256).digest()
+        self.stored_key = hashlib.sha256(client_key).digest()
+        self.server_key = hmac.new(salted_password, b'Server Key', hashlib.sha256).digest()
+
+    def server_first(self, client_first: bytes) -> Tuple[bytes, dict]:
+        """Answer a client-first-message; returns the message and the exchange state"""
+        gs2_flag, authzid, client_first_bare = client_first.decode().split(',', 2)
+        if gs2_flag not in ('n', 'y') or authzid:
+            raise ProtocolError("SCRAM channel binding and authorization identities are not supported")
+        attributes = dict(item.split('=', 1) for item in client_first_bare.split(','))
+        nonce = attributes['r'] + base64.b64encode(secrets.token_bytes(18)).decode()
+        server_first = f"r={nonce},s={base64.b64encode(self.salt).decode()},i={self.ITERATIONS}"
+        state = {
+            'gs2_header': f"{gs2_flag},{authzid},",
+            'client_first_bare': client_first_bare,
+            'server_first': server_first,
+            'nonce': nonce,
+        }
+        return server_first.encode(), state
+
+    def server_final(self, client_final: bytes, state: dict) -> Optional[bytes]:
+        """Check a client-final-message; returns the server signature, or None if the proof is wrong"""
+        without_proof, _, proof = client_final.decode().rpartition(',p=')
+        attributes = dict(item.split('=', 1) for item in without_proof.split(','))
+        if (attributes.get('c') != base64.b64encode(state['gs2_header'].encode()).decode()
+                or attributes.get('r') != state['nonce']):
+            return None
+        auth_message = f"{state['client_first_bare']},{state['server_first']},{without_proof}".encode()
+        signature = hmac.new(self.stored_key, auth_message, hashlib.sha256).digest()
+        client_key = bytes(a ^ b for a, b in zip(base64.b64decode(proof), signature))
+        if not hmac.compare_digest(hashlib.sha256(client_key).digest(), self.stored_key):
+            return None
+        return f"v={base64.b64encode(hmac.new(self.server_key, auth_message, hashlib.sha256).digest()).decode()}".encode()
+
+class BackendPool:
+    """Fixed-size pool of backend connections handed out per transaction"""
+
+    def __init__(self, url: urllib.parse.ParseResult, size: int):
+        self.url = url
+        self.size = size
+        self.open = 0  # Includes connections being established
+        self.transactions = 0
+        self.parameters: Dict[str, str] = {}
+        self.backends: Set[BackendConnection] = set()
+        self._idle: Deque[BackendConnection] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def acquire(self) -> BackendConnection:
+        while True:
+            while self._idle:
+                backend = self._idle.popleft()
+                if not backend.is_expired():
+                    return backend
+                self.discard(backend)
+
+            if self.open < self.size:
+                self.open += 1
+                try:
+                    backend = await BackendConnection.connect(self.url)
+                except BaseException:
+                    self.open -= 1
+                    raise
+                if not self.parameters:
+                    self.parameters = dict(backend.parameters)
+                self.backends.add(backend)
+                return backend
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                backend = await asyncio.wait_for(waiter, MultiplexerConfig.POOL_TIMEOUT)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                if waiter.done() and not waiter.cancelled() and waiter.result() is not None:
+                    self.release(waiter.result())
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+            if backend is not None:
+                return backend
+            # A backend was discarded; loop round and open a replacement
+
+    def release(self, backend: BackendConnection):
+        """Return a backend that is idle and outside any transaction"""
+        self.transactions += 1
+        if PROMETHEUS_AVAILABLE:
+            MULTIPLEXER_TRANSACTIONS_TOTAL.inc()
+        self._hand_off(backend)
+
+    def _hand_off(self, backend: BackendConnection):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(backend)
+                return
+        self._idle.append(backend)
+
+    def discard(self, backend: BackendConnection):
+        """Close a backend whose state is unknown (broken, mid-transaction or expired)"""
+        backend.close()
+        self.backends.discard(backend)
+        self.open -= 1
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def retire_statements(self, names: Set[bytes], keep: Optional[BackendConnection] = None):
+        """Mark statements for closing on every backend that has them, except `keep`"""
+        for backend in self.backends:
+            if backend is not keep and not backend.prepared.isdisjoint(names):
+                backend.stale.update(backend.prepared & names)
+                backend.prepared -= names
+
+    async def ensure_parameters(self) -> Dict[str, str]:
+        """Server parameters reported to clients; needs one backend to have connected"""
+        if not self.parameters:
+            self._hand_off(await self.acquire())
+        return self.parameters
+
+    def close(self):
+        while self._idle:
+            self.discard(self._idle.popleft())
+
+# =============================================================================
+# CLIENT SESSIONS
+# =============================================================================
+
+class ClientSession:
+    """
+    One client connection, bound to a backend only while a transaction is open.
+
+    A backend is released when Postgres reports ReadyForQuery with status idle,
+    every Sync/Query the client sent has been answered, and no extended-protocol
+    messages are waiting for a Sync.
+    """
+
+    def __init__(self, client_id: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 pool: BackendPool):
+        self.id = client_id
+        self.reader = reader
+        self.writer = writer
+        self.pool = pool
+        self.pid = client_id
+        self.secret = secrets.randbits(32)
+        self.backend: Optional[BackendConnection] = None
+        self._relay_task: Optional[asyncio.Task] = None
+        self._pending = 0  # Syncs/Queries not yet answered by ReadyForQuery
+        self._unsynced = False  # Extended-protocol messages sent since the last Sync
+        self._status = b'I'
+        self._prefix = f"mx{client_id}_".encode()
+        self._statements: Dict[bytes, bytes] = {}  # Client statement name -> renamed Parse body
+        self._unnamed_parse: Optional[bytes] = None
+        self._unnamed_seq = 0
+
+    def _backend_name(self, name: bytes) -> bytes:
+        return self._prefix + name if name else b''
+
+    async def run(self):
+        try:
+            while True:
+                msg_type, body = await read_message(self.reader)
+                if msg_type == b'X':
+                    break
+                await self._forward(msg_type, body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            await self.close()
+
+    async def _forward(self, msg_type: bytes, body: bytes):
+        out = []
+        if self.backend is None:
+            self.backend = await self.pool.acquire()
+            self._relay_task = asyncio.create_task(self._relay(self.backend))
+            self._close_stale(self.backend, out)
+        backend = self.backend
+
+        if msg_type == b'P':
+            name, rest = split_cstring(body)
+            body = self._backend_name(name) + b'\0' + rest
+            if name:
+                self._statements[name] = body
+                backend.prepared.add(self._backend_name(name))
+            else:
+                self._unnamed_parse = body
+                self._unnamed_seq += 1
+                backend.unnamed_owner = (self.id, self._unnamed_seq)
+            backend.expect_parse_complete.append(False)
+            self._unsynced = True
+        elif msg_type == b'B':
+            portal, rest = split_cstring(body)
+            name, rest = split_cstring(rest)
+            self._ensure_prepared(backend, name, out)
+            body = portal + b'\0' + self._backend_name(name) + b'\0' + rest
+            self._unsynced = True
+        elif msg_type in (b'D', b'C'):
+            kind, name = body[:1], body[1:-1]
+            if kind == b'S':
+                if msg_type == b'D':
+                    self._ensure_prepared(backend, name, out)
+                elif name:
+                    self._statements.pop(name, None)
+                    backend.prepared.discard(self._backend_name(name))
+                    self.pool.retire_statements({self._backend_name(name)}, keep=backend)
+                body = kind + self._backend_name(name) + b'\0'
+            if msg_type == b'C':
+                backend.expect_close_complete.append(False)
+            self._unsynced = True
+        elif msg_type in (b'E', b'H'):
+            self._unsynced = True
+        elif msg_type == b'S':
+            self._pending += 1
+            self._unsynced = False
+        elif msg_type == b'Q':
+            self._pending += 1
+            backend.unnamed_owner = None  # Simple query replaces the unnamed statement
+            upper = body.upper()
+            if b'DEALLOCATE' in upper or b'DISCARD' in upper:
+                backend.prepared.clear()
+                backend.stale.clear()
+        elif msg_type == b'F':
+            self._pending += 1
+
+        out.append(build_message(msg_type, body))
+        backend.writer.write(b''.join(out))
+        await backend.writer.drain()
+
+    def _close_stale(self, backend: BackendConnection, out: list):
+        """Close statements left by departed clients ahead of this client's first message"""
+        if backend.stale:
+            for name in backend.stale:
+                out.append(build_message(b'C', b'S' + name + b'\0'))
+                backend.expect_close_complete.append(True)
+            out.append(build_message(b'S'))
+            backend.swallow_ready += 1
+            backend.stale.clear()
+
+    def _ensure_prepared(self, backend: BackendConnection, name: bytes, out: list):
+        """Re-send this client's Parse if the statement is not on the current backend"""
+        if name:
+            backend_name = self._backend_name(name)
+            parse = self._statements.get(name)
+            if parse is not None and backend_name not in backend.prepared:
+                out.append(build_message(b'P', parse))
+                backend.prepared.add(backend_name)
+                backend.expect_parse_complete.append(True)
+        elif self._unnamed_parse is not None and backend.unnamed_owner != (self.id, self._unnamed_seq):
+            out.append(build_message(b'P', self._unnamed_parse))
+            backend.unnamed_owner = (self.id, self._unnamed_seq)
+            backend.expect_parse_complete.append(True)
+
+    async def _relay(self, backend: BackendConnection):
+        """Copy backend messages to the client until the backend can be released"""
+        try:
+            while True:
+                msg_type, body = await read_message(backend.reader)
+
+                if msg_type == b'1' and backend.expect_parse_complete:
+                    if backend.expect_parse_complete.popleft():
+                        continue  # Answer to a Parse the multiplexer injected
+                elif msg_type == b'3' and backend.expect_close_complete:
+                    if backend.expect_close_complete.popleft():
+                        continue  # Answer to a stale-statement Close
+                elif msg_type == b'Z' and backend.swallow_ready:
+                    backend.swallow_ready -= 1
+                    continue
+                elif msg_type == b'Z':
+                    backend.expect_parse_complete.clear()
+                    backend.expect_close_complete.clear()
+                    self._pending -= 1
+                    self._status = body[:1]
+                    self.writer.write(build_message(msg_type, body))
+                    if self._pending <= 0 and not self._unsynced and self._status == b'I':
+                        self._pending = 0
+                        self.backend = None
+                        self._relay_task = None
+                        self.pool.release(backend)
+                        await self.writer.drain()
+                        return
+                    await self.writer.drain()
+                    continue
+
+                self.writer.write(build_message(msg_type, body))
+                await self.writer.drain()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.backend is backend:
+                logger.warning(f"Client {self.id}: backend connection lost: {e}")
+                self.backend = None
+                self.pool.discard(backend)
+                self.writer.close()
+
+    async def close(self):
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            try:
+                await self._relay_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+        backend, self.backend = self.backend, None
+        if self._statements:
+            self.pool.retire_statements({self._backend_name(name) for name in self._statements})
+        if backend is not None:
+            if self._pending == 0 and not self._unsynced and self._status == b'I':
+                self.pool.release(backend)
+            else:
+                # Client left mid-transaction; the backend's state cannot be trusted
+                self.pool.discard(backend)
+        self.writer.close()
+
+# =============================================================================
+# MULTIPLEXER SERVER
+# =============================================================================
+
+CLIENT_AUTH_METHODS = ('scram-sha-256', 'md5', 'password', 'trust')
+
+def parse_options(options: str) -> Dict[str, str]:
+    """Settings from a libpq `options` string (-c name=value or --name=value)"""
+    settings = {}
+    tokens = [token.replace('\0', ' ') for token in options.replace('\\ ', '\0').split()]
+    while tokens:
+        token = tokens.pop(0)
+        if token == '-c' and tokens:
+            setting = tokens.pop(0)
+        elif token.startswith('-c') or token.startswith('--'):
+            setting = token[2:]
+        else:
+            raise ProtocolError(f"options {token!r}")
+        name, sep, value = setting.partition('=')
+        if not sep:
+            raise ProtocolError(f"options {token!r}")
+        settings[name.replace('-', '_')] = value
+    return settings
+
+def _setting_value(name: str, value: str) -> str:
+    value = value.strip().strip("'").lower()
+    if name == 'client_encoding' and value.replace('-', '').replace('_', '') in ('utf8', 'unicode'):
+        return 'utf8'
+    return value
+
+def unsupported_startup_parameters(params: Dict[str, str], backend_parameters: Dict[str, str]) -> list:
+    """
+    Client startup parameters the multiplexer cannot honour.
+
+    Settings cannot differ per client on shared backends, so a setting is
+    accepted only if it already has the requested value on the backends.
+    """
+    settings = {key: value for key, value in params.items() if key not in ('user', 'database', 'options')}
+    settings.update(parse_options(params.get('options', '')))
+    current = {key.lower(): _setting_value(key.lower(), value) for key, value in backend_parameters.items()}
+    current.update(
+        (key.lower(), _setting_value(key.lower(), value)) for key, value in MultiplexerConfig.SERVER_SETTINGS.items()
+    )
+
+    unsupported = []
+    for key, value in settings.items():
+        name = key.lower()
+        if name in MultiplexerConfig.IGNORE_STARTUP_PARAMETERS:
+            continue
+        if current.get(name) != _setting_value(name, value):
+            unsupported.append(f"{key}={value}")
+    return unsupported
+
+class ConnectionMultiplexer:
+    """asyncio server accepting Postgres clients and multiplexing them onto BackendPool"""
+
+    def __init__(self, database_url: str, pool_size: int = MultiplexerConfig.POOL_SIZE,
+                 client_auth: str = MultiplexerConfig.CLIENT_AUTH):
+        if not database_url:
+            raise ValueError("DATABASE_URL environment variable is required")
+        self.url = urllib.parse.urlparse(database_url)
+        self.database = self.url.path[1:] or urllib.parse.unquote(self.url.username or '')
+        self.password = urllib.parse.unquote(self.url.password or '')
+        if client_auth not in CLIENT_AUTH_METHODS:
+            raise ValueError(f"Unsupported client auth {client_auth!r}; use one of {', '.join(CLIENT_AUTH_METHODS)}")
+        self.client_auth = client_auth
+        self.scram = ScramSha256Verifier(self.password)
+        self.pool = BackendPool(self.url, pool_size)
+        self.clients: Dict[int, ClientSession] = {}
+        self._next_client_id = 1
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = MultiplexerConfig.LISTEN_HOST, port: int = MultiplexerConfig.LISTEN_PORT):
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        logger.info(f"Connection multiplexer listening on {host}:{port} with {self.pool.size} backends "
+                    f"for {self.url.hostname}:{self.url.port or 5432}/{self.database}")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.pool.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            session = await self._startup(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            logger.warning(f"Client startup failed: {e}")
+            writer.close()
+            return
+        if session is None:
+            writer.close()
+            return
+
+        self.clients[session.id] = session
+        try:
+            await session.run()
+        finally:
+            self.clients.pop(session.id, None)
+
+    async def _startup(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Optional[ClientSession]:
+        while True:
+            length = struct.unpack('!I', await reader.readexactly(4))[0]
+            body = await reader.readexactly(length - 4)
+            code = struct.unpack('!I', body[:4])[0]
+            if code in (SSL_REQUEST_CODE, GSSENC_REQUEST_CODE):
+                writer.write(b'N')  # Plain connections only; the sidecar runs on a private network
+                await writer.drain()
+                continue
+            if code == CANCEL_REQUEST_CODE:
+                await self._cancel(*struct.unpack('!II', body[4:12]))
+                return None
+            if code != PROTOCOL_VERSION:
+                writer.write(error_response(f"Unsupported protocol version {code}", '0A000'))
+                await writer.drain()
+                return None
+            break
+
+        parts = body[4:].split(b'\0')
+        params = {parts[i].decode(): parts[i + 1].decode() for i in range(0, len(parts) - 1, 2) if parts[i]}
+        database = params.get('database') or params.get('user', '')
+        if database != self.database:
+            writer.write(error_response(f'database "{database}" is not served by this multiplexer', '3D000'))
+            await writer.drain()
+            return None
+
+        if not await self._authenticate(reader, writer, params.get('user', '')):
+            writer.write(error_response('password authentication failed', '28P01'))
+            await writer.drain()
+            return None
+
+        parameters = await self.pool.ensure_parameters()
+        try:
+            unsupported = unsupported_startup_parameters(params, parameters)
+        except ProtocolError as e:
+            unsupported = [str(e)]
+        if unsupported:
+            writer.write(error_response(
+                f"unsupported startup parameter: {', '.join(unsupported)} "
+                f"(backends are shared; settings must match the multiplexer's)", '0A000'
+            ))
+            await writer.drain()
+            return None
+
+        session = ClientSession(self._next_client_id, reader, writer, self.pool)
+        self._next_client_id += 1
+
+        greeting = [build_message(b'R', struct.pack('!I', 0))]
+        for key, value in parameters.items():
+            greeting.append(build_message(b'S', key.encode() + b'\0' + value.encode() + b'\0'))
+        greeting.append(build_message(b'K', struct.pack('!II', session.pid, session.secret)))
+        greeting.append(build_message(b'Z', b'I'))
+        writer.write(b''.join(greeting))
+        await writer.drain()
+        return session
+
+    async def _authenticate(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, user: str) -> bool:
+        """Check the client's password with the configured method; the caller sends the error"""
+        if self.client_auth == 'trust':
+            return True
+
+        if self.client_auth == 'password':
+            writer.write(build_message(b'R', struct.pack('!I', 3)))
+            await writer.drain()
+            msg_type, password = await read_message(reader)
+            return msg_type == b'p' and hmac.compare_digest(password.rstrip(b'\0'), self.password.encode())
+
+        if self.client_auth == 'md5':
+            salt = secrets.token_bytes(4)
+            writer.write(build_message(b'R', struct.pack('!I', 5) + salt))
+            await writer.drain()
+            msg_type, response = await read_message(reader)
+            inner = hashlib.md5((self.password + user).encode()).hexdigest()
+            expected = 'md5' + hashlib.md5(inner.encode() + salt).hexdigest()
+            return msg_type == b'p' and hmac.compare_digest(response.rstrip(b'\0'), expected.encode())
+
+        writer.write(build_message(b'R', struct.pack('!I', 10) + b'SCRAM-SHA-256\0\0'))
+        await writer.drain()
+        msg_type, body = await read_message(reader)
+        mechanism, rest = split_cstring(body)
+        if msg_type != b'p' or mechanism != b'SCRAM-SHA-256':
+            return False
+        length = struct.unpack('!i', rest[:4])[0]
+        server_first, state = self.scram.server_first(rest[4:4 + length])
+        writer.write(build_message(b'R', struct.pack('!I', 11) + server_first))
+        await writer.drain()
+        msg_type, client_final = await read_message(reader)
+        server_final = self.scram.server_final(client_final, state) if msg_type == b'p' else None
+        if server_final is None:
+            return False
+        writer.write(build_message(b'R', struct.pack('!I', 12) + server_final))
+        return True
+
+    async def _cancel(self, pid: int, secret: int):
+        """Forward a CancelRequest to whichever backend the client currently holds"""
+        session = self.clients.get(pid)
+        if session is None or session.backend is None:
+            return
+        if not hmac.compare_digest(struct.pack('!I', session.secret), struct.pack('!I', secret)):
+            return
+        backend = session.backend
+        try:
+            _, writer = await asyncio.open_connection(self.url.hostname, self.url.port or 5432)
+            writer.write(struct.pack('!IIII', 16, CANCEL_REQUEST_CODE, backend.pid, backend.secret))
+            await writer.drain()
+            writer.close()
+        except (OSError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Client {pid}: cancel request not delivered: {e}")
+
+    def stats(self) -> dict:
+        return {
+            'clients': len(self.clients),
+            'backends_open': self.pool.open,
+            'backends_idle': self.pool.idle,
+            'waiting_clients': self.pool.waiting,
+            'transactions': self.pool.transactions
+        }
+
+    def update_metrics(self):
+        if PROMETHEUS_AVAILABLE:
+            stats = self.stats()
+            MULTIPLEXER_CLIENTS.set(stats['clients'])
+            MULTIPLEXER_BACKENDS.labels(state='idle').set(stats['backends_idle'])
+            MULTIPLEXER_BACKENDS.labels(state='active').set(stats['backends_open'] - stats['backends_idle'])
+            MULTIPLEXER_WAITING.set(stats['waiting_clients'])
+
+async def main():
+    multiplexer = ConnectionMultiplexer(MultiplexerConfig.DATABASE_URL)
+    await multiplexer.start()
+
+    if PROMETHEUS_AVAILABLE and MultiplexerConfig.METRICS_PORT:
+        start_http_server(MultiplexerConfig.METRICS_PORT)
+        logger.info(f"Multiplexer metrics on :{MultiplexerConfig.METRICS_PORT}/metrics")
+
+    last_log = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(1)
+            multiplexer.update_metrics()
+            if time.monotonic() - last_log >= MultiplexerConfig.STATS_INTERVAL:
+                logger.info(f"Multiplexer stats: {multiplexer.stats()}")
+                last_log = time.monotonic()
+    finally:
+        await multiplexer.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,14 +5,65 @@ Purpose: Optimized connection pooling for authentication and user data operation
 """
 
 import os
-from typing import Optional
-from sqlalchemy import create_engine, pool
+import re
+import sys
+import math
+import json
+import uuid
+import base64
+import datetime
+from decimal import Decimal
+import hashlib
+import random
+import threading
+import contextlib
+import traceback
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import sqlalchemy
+from sqlalchemy import create_engine, event, pool, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 import asyncpg
 from asyncpg import Pool
 import asyncio
 import logging
+import time
+import urllib.parse
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Request deadlines are set by the FastAPI middleware in monitoring_middleware.py,
+# which also serves /metrics across workers in multiprocess mode
+try:
+    from monitoring.monitoring_middleware import register_process_collector, remaining_request_budget
+except ImportError:
+    try:
+        from monitoring_middleware import register_process_collector, remaining_request_budget
+    except ImportError:
+        def remaining_request_budget() -> Optional[float]:
+            """Without the monitoring middleware there is no request deadline"""
+            return None
+        
+        def register_process_collector(collector):
+            """Without the monitoring middleware only the default registry is scraped"""
+            REGISTRY.register(collector)
 
 logger = logging.getLogger(__name__)
 
@@ -29,11 +80,12 @@ class DatabaseConfig:
     POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # Timeout waiting for connection
     POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))  # Recycle connections every hour
     POOL_PRE_PING = True  # Validate connections before use
+    COMMAND_TIMEOUT = float(os.getenv('DB_COMMAND_TIMEOUT', '30'))  # Upper bound; request deadlines shorten it
     
     # Connection string optimization
     CONNECT_ARGS = {
         'connect_timeout': 10,  # Connection timeout in seconds
-        'command_timeout': 30,  # Command timeout in seconds
+        'command_timeout': COMMAND_TIMEOUT,  # Command timeout in seconds
         'server_settings': {
             'jit': 'off',  # Disable JIT for faster connection startup
             'application_name': 'pyairtable_auth_service'
@@ -45,16 +97,747 @@ class DatabaseConfig:
     ASYNCPG_MAX_SIZE = int(os.getenv('ASYNCPG_MAX_SIZE', '20'))
     ASYNCPG_MAX_QUERIES = int(os.getenv('ASYNCPG_MAX_QUERIES', '50000'))
     ASYNCPG_MAX_INACTIVE_TIME = int(os.getenv('ASYNCPG_MAX_INACTIVE_TIME', '300'))
+    
+    # Prepared statement cache (per pooled connection)
+    PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv('PREPARED_STATEMENT_CACHE_SIZE', '100'))
+    
+    # Bulk execution settings
+    BULK_EXECUTEMANY_CHUNK_SIZE = int(os.getenv('DB_BULK_EXECUTEMANY_CHUNK_SIZE', '1000'))
+    
+    # Startup warm-up
+    WARMUP_TIMEOUT = float(os.getenv('DB_WARMUP_TIMEOUT', '30'))  # Startup fails if warm-up takes longer
+    
+    # Streaming reads (server-side cursors)
+    STREAM_PREFETCH = int(os.getenv('DB_STREAM_PREFETCH', '1000'))  # Rows fetched per round trip
+    
+    # Read replica routing
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', '5'))  # Lagging replicas fall back to primary
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
+    READ_YOUR_WRITES_WINDOW = float(os.getenv('DB_READ_YOUR_WRITES_WINDOW', '5'))  # Pin session reads to primary after a write
+    
+    # AsyncPG pool autoscaling (resizes the checkout limit between these bounds)
+    ASYNCPG_AUTOSCALE_ENABLED = os.getenv('ASYNCPG_AUTOSCALE_ENABLED', 'false').lower() == 'true'
+    ASYNCPG_AUTOSCALE_MIN_SIZE = int(os.getenv('ASYNCPG_AUTOSCALE_MIN_SIZE', '5'))
+    ASYNCPG_AUTOSCALE_MAX_SIZE = int(os.getenv('ASYNCPG_AUTOSCALE_MAX_SIZE', '50'))
+    ASYNCPG_AUTOSCALE_INTERVAL = float(os.getenv('ASYNCPG_AUTOSCALE_INTERVAL', '10'))
+    ASYNCPG_AUTOSCALE_WAIT_THRESHOLD = float(os.getenv('ASYNCPG_AUTOSCALE_WAIT_THRESHOLD', '0.05'))  # Mean checkout wait (s) that triggers growth
+    ASYNCPG_AUTOSCALE_IDLE_RATIO = float(os.getenv('ASYNCPG_AUTOSCALE_IDLE_RATIO', '0.5'))  # Unused share of the limit that triggers shrinking
+    ASYNCPG_AUTOSCALE_UP_SAMPLES = int(os.getenv('ASYNCPG_AUTOSCALE_UP_SAMPLES', '2'))  # Consecutive samples before growing
+    ASYNCPG_AUTOSCALE_DOWN_SAMPLES = int(os.getenv('ASYNCPG_AUTOSCALE_DOWN_SAMPLES', '6'))  # Consecutive samples before shrinking
+    
+    # Query result cache (opt-in per query via cache_ttl)
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv('DB_QUERY_CACHE_MAX_ENTRIES', '10000'))  # In-process LRU size
+    QUERY_CACHE_MAX_TTL = float(os.getenv('DB_QUERY_CACHE_MAX_TTL', '300'))  # Upper bound on any cache_ttl
+    QUERY_CACHE_REDIS_URL = os.getenv('DB_QUERY_CACHE_REDIS_URL', '')  # Opt-in shared tier; empty keeps the cache in-process
+    QUERY_CACHE_REDIS_TIMEOUT = float(os.getenv('DB_QUERY_CACHE_REDIS_TIMEOUT', '0.1'))
+    QUERY_CACHE_KEY_PREFIX = os.getenv('DB_QUERY_CACHE_KEY_PREFIX', 'pyairtable:query_cache')
+    QUERY_CACHE_LOCK_TIMEOUT = float(os.getenv('DB_QUERY_CACHE_LOCK_TIMEOUT', '2'))  # Max wait on another worker filling a cold key
+    
+    # Connection multiplexer sidecar (see connection-multiplexer.py)
+    MULTIPLEXER_ENABLED = os.getenv('DB_MULTIPLEXER_ENABLED', 'false').lower() == 'true'
+    MULTIPLEXER_HOST = os.getenv('DB_MULTIPLEXER_HOST', '127.0.0.1')
+    MULTIPLEXER_PORT = int(os.getenv('DB_MULTIPLEXER_PORT', '6432'))
+    
+    # Circuit breaker and load shedding (per pool)
+    CIRCUIT_BREAKER_ENABLED = os.getenv('DB_CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('DB_CIRCUIT_BREAKER_FAILURE_THRESHOLD', '5'))  # Consecutive failures that open the circuit
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT = float(os.getenv('DB_CIRCUIT_BREAKER_RECOVERY_TIMEOUT', '10'))  # Seconds open before probing
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES = int(os.getenv('DB_CIRCUIT_BREAKER_HALF_OPEN_PROBES', '2'))  # Concurrent probes; all must succeed to close
+    ADMISSION_MAX_QUEUE = int(os.getenv('DB_ADMISSION_MAX_QUEUE', '100'))  # Callers allowed to wait for a connection
+    ADMISSION_MAX_WAIT = float(os.getenv('DB_ADMISSION_MAX_WAIT', '5'))  # Reject when the estimated wait exceeds this
+
+    # Multi-tenant fairness (tenant and workload class come from database_tenant())
+    TENANT_FAIR_QUEUING = os.getenv('DB_TENANT_FAIR_QUEUING', 'true').lower() == 'true'
+    TENANT_MAX_SHARE = float(os.getenv('DB_TENANT_MAX_SHARE', '0.5'))  # Share of a checkout limit one tenant may hold while others wait
+    TENANT_WEIGHTS = os.getenv('DB_TENANT_WEIGHTS', '')  # "tenant:weight,..."; unlisted tenants weigh 1
+    TENANT_METRICS_MAX = int(os.getenv('DB_TENANT_METRICS_MAX', '100'))  # Further tenants share the "other" label
+    WORKLOAD_POOLS = os.getenv('DB_WORKLOAD_POOLS', '')  # "auth:5,interactive:10,batch:5"; empty disables partitions
+
+    # Checkout instrumentation
+    POOL_TRACK_CALL_SITES = os.getenv('DB_POOL_TRACK_CALL_SITES', 'true').lower() == 'true'
+    POOL_SLOW_ACQUIRE_THRESHOLD = float(os.getenv('DB_POOL_SLOW_ACQUIRE_THRESHOLD', '0'))  # Seconds; 0 disables stack capture
+    POOL_SLOW_ACQUIRE_STACK_DEPTH = int(os.getenv('DB_POOL_SLOW_ACQUIRE_STACK_DEPTH', '20'))
+    
+    # Per-query latency profiling
+    QUERY_PROFILING_ENABLED = os.getenv('DB_QUERY_PROFILING_ENABLED', 'true').lower() == 'true'
+    QUERY_PROFILER_MAX_FINGERPRINTS = int(os.getenv('DB_QUERY_PROFILER_MAX_FINGERPRINTS', '500'))
+    QUERY_PROFILER_SAMPLE_SIZE = int(os.getenv('DB_QUERY_PROFILER_SAMPLE_SIZE', '512'))  # Latency reservoir per fingerprint
+    QUERY_PROFILER_TOP_N = int(os.getenv('DB_QUERY_PROFILER_TOP_N', '20'))
+
+# =============================================================================
+# REQUEST DEADLINES
+# =============================================================================
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when the current request's time budget is spent before a query runs"""
+
+def statement_timeout() -> float:
+    """Timeout for the next statement: the remaining request budget, capped at COMMAND_TIMEOUT"""
+    budget = remaining_request_budget()
+    if budget is None:
+        return DatabaseConfig.COMMAND_TIMEOUT
+    if budget <= 0:
+        raise DeadlineExceededError("Request deadline exceeded before query execution")
+    return min(budget, DatabaseConfig.COMMAND_TIMEOUT)
+
+# =============================================================================
+# POOL METRICS
+# =============================================================================
+
+if PROMETHEUS_AVAILABLE:
+    POOL_AUTOSCALER_TARGET_SIZE = Gauge(
+        'db_pool_autoscaler_target_size',
+        'Current asyncpg checkout limit chosen by the autoscaler',
+        ['pool']
+    )
+    POOL_AUTOSCALER_DECISIONS_TOTAL = Counter(
+        'db_pool_autoscaler_decisions_total',
+        'Pool resize decisions made by the autoscaler',
+        ['pool', 'direction', 'reason']
+    )
+    POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+        'db_pool_checkout_wait_seconds',
+        'Time callers wait to check a connection out of the pool',
+        ['pool', 'kind'],
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    )
+    POOL_CONNECTION_HOLD_SECONDS = Histogram(
+        'db_pool_connection_hold_seconds',
+        'Time a checked-out connection is held before being returned, per call site',
+        ['pool', 'kind', 'call_site'],
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    )
+    POOL_SLOW_ACQUIRES_TOTAL = Counter(
+        'db_pool_slow_acquires_total',
+        'Checkouts slower than DB_POOL_SLOW_ACQUIRE_THRESHOLD',
+        ['pool', 'kind', 'call_site']
+    )
+
+# Frames from these files are skipped when attributing a checkout to a call site
+_INTERNAL_CALL_SITE_PATHS = (
+    __file__,
+    contextlib.__file__,
+    os.path.dirname(asyncio.__file__),
+    os.path.dirname(asyncpg.__file__),
+    os.path.dirname(sqlalchemy.__file__)
+)
+
+def _call_site() -> str:
+    """Name the first caller outside this module and the database libraries"""
+    if not DatabaseConfig.POOL_TRACK_CALL_SITES:
+        return 'untracked'
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_INTERNAL_CALL_SITE_PATHS):
+            return f"{os.path.basename(filename)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+class CheckoutTracker:
+    """Records checkout wait and hold times and samples stacks of slow acquires"""
+    
+    def __init__(self, pool_name: str, kind: str, max_slow_samples: int = 50):
+        self.pool_name = pool_name
+        self.kind = kind
+        self.slow_acquires = 0
+        self._slow_samples: deque = deque(maxlen=max_slow_samples)
+    
+    def record_wait(self, wait: float, call_site: str):
+        if PROMETHEUS_AVAILABLE:
+            POOL_CHECKOUT_WAIT_SECONDS.labels(pool=self.pool_name, kind=self.kind).observe(wait)
+        
+        threshold = DatabaseConfig.POOL_SLOW_ACQUIRE_THRESHOLD
+        if threshold > 0 and wait >= threshold:
+            self.slow_acquires += 1
+            stack = ''.join(traceback.format_stack(limit=DatabaseConfig.POOL_SLOW_ACQUIRE_STACK_DEPTH)[:-1])
+            self._slow_samples.append({
+                'timestamp': time.time(),
+                'wait_seconds': wait,
+                'call_site': call_site,
+                'stack': stack
+            })
+            if PROMETHEUS_AVAILABLE:
+                POOL_SLOW_ACQUIRES_TOTAL.labels(pool=self.pool_name, kind=self.kind, call_site=call_site).inc()
+            logger.warning(f"Slow {self.kind} pool checkout ({self.pool_name}) took {wait:.3f}s at {call_site}")
+    
+    def record_hold(self, hold: float, call_site: str):
+        if PROMETHEUS_AVAILABLE:
+            POOL_CONNECTION_HOLD_SECONDS.labels(
+                pool=self.pool_name, kind=self.kind, call_site=call_site
+            ).observe(hold)
+    
+    def recent_slow_acquires(self) -> list:
+        """Most recent slow acquires with their captured stacks"""
+        return list(self._slow_samples)
+
+# =============================================================================
+# CIRCUIT BREAKER AND LOAD SHEDDING
+# =============================================================================
+
+class DatabaseUnavailableError(Exception):
+    """Raised instead of queueing when a pool's database is failing or overloaded; maps to HTTP 503"""
+    
+    status_code = 503
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitOpenError(DatabaseUnavailableError):
+    """Raised while a pool's circuit breaker is open"""
+
+class PoolOverloadedError(DatabaseUnavailableError):
+    """Raised when the admission queue is full or the estimated checkout wait exceeds the budget"""
+
+if PROMETHEUS_AVAILABLE:
+    DB_CIRCUIT_BREAKER_STATE = Gauge(
+        'db_circuit_breaker_state',
+        'Database circuit breaker state (0=closed, 1=half-open, 2=open)',
+        ['pool', 'kind']
+    )
+    DB_POOL_REJECTED_TOTAL = Counter(
+        'db_pool_rejected_total',
+        'Checkouts rejected without queueing',
+        ['pool', 'kind', 'reason']
+    )
+
+# Errors that mean the database is unreachable or too slow, as opposed to a bad query
+_DATABASE_FAILURES = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.exceptions.PostgresConnectionError,
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.TooManyConnectionsError,
+    asyncpg.exceptions.QueryCanceledError
+)
+
+_QUERY_CANCELED = '57014'
+_DEADLINE_TOLERANCE = 0.01  # Timer slack (s) when deciding the request budget ran out
+
+def _is_database_failure(error: BaseException) -> bool:
+    error = _failure_cause(error)
+    # A spent request budget says nothing about the database
+    return (isinstance(error, _DATABASE_FAILURES) and not isinstance(error, DeadlineExceededError)
+            and not _deadline_was_binding(error))
+
+def _deadline_was_binding(error: BaseException) -> bool:
+    """Whether a statement timed out or was cancelled because the request budget, not COMMAND_TIMEOUT, ran out"""
+    error = _failure_cause(error)
+    sqlstate = getattr(error, 'sqlstate', None) or getattr(error, 'pgcode', None)
+    if not isinstance(error, asyncio.TimeoutError) and sqlstate != _QUERY_CANCELED:
+        return False
+    budget = remaining_request_budget()
+    return budget is not None and budget <= _DEADLINE_TOLERANCE
+
+def _failure_cause(error: BaseException) -> BaseException:
+    """The driver error behind a BatchExecutionError, or the error itself"""
+    return error.error if isinstance(error, BatchExecutionError) else error
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one pool.
+    
+    After ``failure_threshold`` consecutive connection failures or timeouts
+    the circuit opens and checkouts fail fast with CircuitOpenError. Once
+    ``recovery_timeout`` has passed it turns half-open and admits up to
+    ``half_open_probes`` concurrent checkouts; when all of them succeed the
+    circuit closes, and any failure opens it again.
+    """
+    
+    CLOSED = 'closed'
+    HALF_OPEN = 'half_open'
+    OPEN = 'open'
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+    
+    def __init__(self, pool_name: str, kind: str,
+                 failure_threshold: int = DatabaseConfig.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DatabaseConfig.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+                 half_open_probes: int = DatabaseConfig.CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+                 enabled: bool = DatabaseConfig.CIRCUIT_BREAKER_ENABLED):
+        self.pool_name = pool_name
+        self.kind = kind
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.enabled = enabled
+        self.state = self.CLOSED
+        self.failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()  # Sync pool checkouts come from many threads
+        if PROMETHEUS_AVAILABLE:
+            DB_CIRCUIT_BREAKER_STATE.labels(pool=pool_name, kind=kind).set(0)
+    
+    def allow(self) -> bool:
+        """Admit a checkout or raise CircuitOpenError; returns True if it is a half-open probe"""
+        if self.state == self.CLOSED or not self.enabled:
+            return False
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    self._reject(remaining)
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self._reject(self.recovery_timeout)
+                self._probes_in_flight += 1
+                return True
+            return False
+    
+    def record_success(self, probe: bool = False):
+        if not probe:
+            # Successes of calls admitted before the circuit opened don't close it
+            if self.state == self.CLOSED:
+                self.failures = 0
+            return
+        with self._lock:
+            self._probes_in_flight -= 1
+            self._probe_successes += 1
+            if self.state == self.HALF_OPEN and self._probe_successes >= self.half_open_probes:
+                self._transition(self.CLOSED)
+    
+    def record_failure(self, probe: bool = False):
+        with self._lock:
+            if probe:
+                self._probes_in_flight -= 1
+            if self.state == self.HALF_OPEN:
+                self._transition(self.OPEN)
+            elif self.state == self.CLOSED:
+                self.failures += 1
+                if self.failures >= self.failure_threshold and self.enabled:
+                    self._transition(self.OPEN)
+    
+    def release_probe(self, probe: bool):
+        """Give back a probe slot for a checkout that ended without an outcome (e.g. cancelled)"""
+        if probe:
+            with self._lock:
+                self._probes_in_flight -= 1
+    
+    def _reject(self, retry_after: float):
+        self.rejected += 1
+        if PROMETHEUS_AVAILABLE:
+            DB_POOL_REJECTED_TOTAL.labels(pool=self.pool_name, kind=self.kind, reason='circuit_open').inc()
+        raise CircuitOpenError(f"Circuit breaker for {self.pool_name} {self.kind} pool is {self.state}",
+                               retry_after=retry_after)
+    
+    def _transition(self, state: str):
+        self.state = state
+        if state == self.OPEN:
+            self.times_opened += 1
+            self._opened_at = time.monotonic()
+            logger.warning(f"Circuit breaker for {self.pool_name} {self.kind} pool opened "
+                           f"after {self.failures} consecutive failures")
+        elif state == self.HALF_OPEN:
+            self._probe_successes = 0
+        else:
+            self.failures = 0
+            logger.info(f"Circuit breaker for {self.pool_name} {self.kind} pool closed")
+        if PROMETHEUS_AVAILABLE:
+            DB_CIRCUIT_BREAKER_STATE.labels(pool=self.pool_name, kind=self.kind).set(self.STATE_VALUES[state])
+    
+    def instrument_engine(self, engine: Engine):
+        """Feed statement outcomes of a SQLAlchemy engine into the breaker"""
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            self.record_success(conn.info.pop('_breaker_probe', False))
+        
+        @event.listens_for(engine, 'handle_error')
+        def _handle_error(exception_context):
+            connection = exception_context.connection
+            probe = connection.info.pop('_breaker_probe', False) if connection is not None else False
+            if _deadline_was_binding(exception_context.original_exception):
+                self.release_probe(probe)
+            elif exception_context.is_disconnect or isinstance(
+                exception_context.sqlalchemy_exception, (sqlalchemy.exc.OperationalError, sqlalchemy.exc.TimeoutError)
+            ):
+                self.record_failure(probe)
+            else:
+                self.record_success(probe)
+    
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected
+        }
+
+class AdmissionController:
+    """
+    Bounded admission queue in front of a pool.
+    
+    When no connection is free, estimates how long a new checkout would wait
+    from the callers already queued, the pool capacity and the moving average
+    hold time, and rejects it with PoolOverloadedError if that exceeds the
+    budget (the smaller of DB_ADMISSION_MAX_WAIT and the request's remaining
+    time) or if the queue is already full.
+    """
+    
+    def __init__(self, pool_name: str, kind: str,
+                 max_queue: int = DatabaseConfig.ADMISSION_MAX_QUEUE,
+                 max_wait: float = DatabaseConfig.ADMISSION_MAX_WAIT):
+        self.pool_name = pool_name
+        self.kind = kind
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.mean_hold = 0.0  # Exponential moving average of connection hold time
+        self.rejected = 0
+    
+    def record_hold(self, hold: float):
+        self.mean_hold = hold if not self.mean_hold else self.mean_hold + 0.1 * (hold - self.mean_hold)
+    
+    def estimated_wait(self, waiting: int, capacity: float) -> float:
+        return (waiting + 1) * self.mean_hold / max(capacity, 1)
+    
+    def admit(self, in_use: int, waiting: int, capacity: float):
+        """Raise PoolOverloadedError if a new checkout should not join the queue"""
+        if in_use < capacity and not waiting:
+            return
+        if waiting >= self.max_queue:
+            self._reject('queue_full', self.estimated_wait(waiting, capacity))
+        
+        budget = self.max_wait
+        remaining = remaining_request_budget()
+        if remaining is not None:
+            budget = min(budget, remaining)
+        wait = self.estimated_wait(waiting, capacity)
+        if wait > budget:
+            self._reject('wait_budget', wait)
+    
+    def _reject(self, reason: str, retry_after: float):
+        self.rejected += 1
+        if PROMETHEUS_AVAILABLE:
+            DB_POOL_REJECTED_TOTAL.labels(pool=self.pool_name, kind=self.kind, reason=reason).inc()
+        raise PoolOverloadedError(f"{self.pool_name} {self.kind} pool overloaded ({reason})",
+                                  retry_after=retry_after)
+    
+    def stats(self) -> dict:
+        return {
+            'max_queue': self.max_queue,
+            'max_wait': self.max_wait,
+            'mean_hold_seconds': self.mean_hold,
+            'rejected': self.rejected
+        }
+
+async def database_unavailable_handler(request, exc: DatabaseUnavailableError):
+    """FastAPI exception handler turning DatabaseUnavailableError into a 503 with Retry-After"""
+    from fastapi.responses import JSONResponse
+    
+    return JSONResponse(
+        {'detail': str(exc)},
+        status_code=exc.status_code,
+        headers={'Retry-After': str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+# =============================================================================
+# QUERY PROFILER
+# =============================================================================
+
+_SQL_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+# String constants: E'' with backslash escapes, B'', X'', N'' and U&'' prefixes,
+# plain '' and dollar-quoted $$...$$ / $tag$...$tag$ bodies
+_SQL_STRING = re.compile(
+    r"(?<![\w$])[eE]'(?:[^'\\]|\\.|'')*'"
+    r"|(?<![\w$])(?:[bBxXnN]|[uU]&)'(?:[^']|'')*'"
+    r"|'(?:[^']|'')*'"
+    r"|(?<![\w$])\$(?P<dollar_tag>(?:[^\W\d]\w*)?)\$.*?\$(?P=dollar_tag)\$",
+    re.DOTALL
+)
+# One pass, so a comment marker inside a string (or a quote inside a comment) is not misread
+_SQL_LITERAL_OR_COMMENT = re.compile(f"{_SQL_STRING.pattern}|{_SQL_COMMENT.pattern}", re.DOTALL)
+_SQL_NUMBER = re.compile(r'(?<![\w$])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.IGNORECASE)
+_SQL_PARAMETER = re.compile(r'(?<![\w$])\$\d+|%\(\w+\)s|%s|(?<!:):\w+\b')
+_SQL_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SQL_WHITESPACE = re.compile(r'\s+')
+
+def _replace_literals(query: str, replacement: str) -> str:
+    """Replace string constants with ``replacement`` and comments with a space"""
+    return _SQL_LITERAL_OR_COMMENT.sub(
+        lambda match: ' ' if match.group().startswith(('--', '/*')) else replacement, query
+    )
+
+@lru_cache(maxsize=4096)
+def fingerprint_query(query: str) -> str:
+    """Normalize SQL so statements differing only in literals share a fingerprint"""
+    normalized = _replace_literals(query, '?')
+    normalized = _SQL_PARAMETER.sub('?', normalized)
+    normalized = _SQL_NUMBER.sub('?', normalized)
+    normalized = _SQL_VALUE_LIST.sub('(?+)', normalized)
+    return _SQL_WHITESPACE.sub(' ', normalized).strip()
+
+def _row_count(result) -> int:
+    """Rows returned or affected, from a fetch result or a command status string"""
+    if result is None:
+        return 0
+    if isinstance(result, str):
+        tail = result.rsplit(' ', 1)[-1]
+        return int(tail) if tail.isdigit() else 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+class QueryStats:
+    """Streaming latency and row statistics for one fingerprint in fixed memory"""
+    
+    __slots__ = ('fingerprint', 'calls', 'errors', 'rows', 'total_time', 'max_time', '_samples', '_sample_size')
+    
+    def __init__(self, fingerprint: str, sample_size: int):
+        self.fingerprint = fingerprint
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self._samples: List[float] = []
+        self._sample_size = sample_size
+    
+    def record(self, duration: float, rows: int, error: bool):
+        self.calls += 1
+        self.rows += rows
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        if error:
+            self.errors += 1
+        
+        # Reservoir sampling keeps a uniform sample of all calls
+        if len(self._samples) < self._sample_size:
+            self._samples.append(duration)
+        else:
+            slot = random.randrange(self.calls)
+            if slot < self._sample_size:
+                self._samples[slot] = duration
+    
+    def quantiles(self, *qs: float) -> List[float]:
+        if not self._samples:
+            return [0.0 for _ in qs]
+        ordered = sorted(self._samples)
+        return [ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in qs]
+    
+    def to_dict(self) -> dict:
+        p50, p95, p99 = self.quantiles(0.5, 0.95, 0.99)
+        return {
+            'fingerprint': self.fingerprint,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_time_seconds': self.total_time,
+            'mean_seconds': self.total_time / self.calls if self.calls else 0.0,
+            'max_seconds': self.max_time,
+            'p50_seconds': p50,
+            'p95_seconds': p95,
+            'p99_seconds': p99
+        }
+
+class QueryProfiler:
+    """
+    Per-fingerprint latency profiler with a bounded number of tracked statements.
+    
+    When the table is full, a new fingerprint replaces the one with the least
+    total time, so heavy hitters stay resident while one-off queries churn.
+    """
+    
+    def __init__(self, max_fingerprints: int = DatabaseConfig.QUERY_PROFILER_MAX_FINGERPRINTS,
+                 sample_size: int = DatabaseConfig.QUERY_PROFILER_SAMPLE_SIZE,
+                 enabled: bool = DatabaseConfig.QUERY_PROFILING_ENABLED):
+        self.max_fingerprints = max_fingerprints
+        self.sample_size = sample_size
+        self.enabled = enabled
+        self.evictions = 0
+        self._stats: Dict[str, QueryStats] = {}
+        self._lock = threading.Lock()  # Sync engine events arrive from worker threads
+    
+    def record(self, query: str, duration: float, rows: int = 0, error: bool = False):
+        if not self.enabled:
+            return
+        fingerprint = fingerprint_query(query)
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    victim = min(self._stats.values(), key=lambda item: item.total_time)
+                    del self._stats[victim.fingerprint]
+                    self.evictions += 1
+                stats = self._stats[fingerprint] = QueryStats(fingerprint, self.sample_size)
+            stats.record(duration, rows, error)
+    
+    def top(self, limit: int = DatabaseConfig.QUERY_PROFILER_TOP_N, order_by: str = 'total_time') -> List[dict]:
+        """Top fingerprints ordered by total time (default), calls, or p99"""
+        with self._lock:
+            entries = [stats.to_dict() for stats in self._stats.values()]
+        key = {'total_time': 'total_time_seconds', 'calls': 'calls', 'p99': 'p99_seconds'}.get(order_by, 'total_time_seconds')
+        entries.sort(key=lambda entry: entry[key], reverse=True)
+        return entries[:limit]
+    
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+    
+    def __len__(self) -> int:
+        return len(self._stats)
+    
+    def instrument_engine(self, engine: Engine):
+        """Attach SQLAlchemy cursor events so sync queries are profiled too"""
+        
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('_query_start', []).append(time.perf_counter())
+        
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get('_query_start')
+            if starts:
+                self.record(statement, time.perf_counter() - starts.pop(), max(cursor.rowcount, 0))
+        
+        @event.listens_for(engine, 'handle_error')
+        def _handle_error(exception_context):
+            conn = exception_context.connection
+            starts = conn.info.get('_query_start') if conn is not None else None
+            if starts and exception_context.statement:
+                self.record(exception_context.statement, time.perf_counter() - starts.pop(), error=True)
+
+class QueryProfilerCollector:
+    """Prometheus collector exporting only the profiler's top-N fingerprints
+    
+    The profiler is per process, so in multiprocess mode these series describe
+    the worker that served the scrape.
+    """
+    
+    def __init__(self, profiler: QueryProfiler, limit: int = DatabaseConfig.QUERY_PROFILER_TOP_N):
+        self.profiler = profiler
+        self.limit = limit
+    
+    def collect(self):
+        latency = GaugeMetricFamily(
+            'db_query_latency_seconds', 'Query latency quantiles per statement fingerprint',
+            labels=['fingerprint', 'quantile']
+        )
+        calls = CounterMetricFamily(
+            'db_query_calls', 'Query executions per statement fingerprint', labels=['fingerprint']
+        )
+        rows = CounterMetricFamily(
+            'db_query_rows', 'Rows returned or affected per statement fingerprint', labels=['fingerprint']
+        )
+        for entry in self.profiler.top(self.limit):
+            fingerprint = entry['fingerprint']
+            for quantile in ('p50', 'p95', 'p99'):
+                latency.add_metric([fingerprint, f'0.{quantile[1:]}'], entry[f'{quantile}_seconds'])
+            calls.add_metric([fingerprint], entry['calls'])
+            rows.add_metric([fingerprint], entry['rows'])
+        yield latency
+        yield calls
+        yield rows
+
+# Shared by every pool in the process so the top-N table covers all traffic
+query_profiler = QueryProfiler()
+
+if PROMETHEUS_AVAILABLE:
+    register_process_collector(QueryProfilerCollector(query_profiler))
+
+def create_query_profile_endpoints(profiler: QueryProfiler = query_profiler):
+    """Create FastAPI endpoint exposing the top-N query fingerprints"""
+    from fastapi import APIRouter
+    
+    router = APIRouter()
+    
+    @router.get("/debug/queries")
+    async def query_profile(limit: int = DatabaseConfig.QUERY_PROFILER_TOP_N, order_by: str = 'total_time'):
+        """Top statement fingerprints by total time, calls or p99"""
+        return {
+            'enabled': profiler.enabled,
+            'tracked_fingerprints': len(profiler),
+            'evictions': profiler.evictions,
+            'queries': profiler.top(limit, order_by)
+        }
+    
+    return router
 
 # =============================================================================
 # SYNCHRONOUS CONNECTION POOL (SQLAlchemy)
 # =============================================================================
 
+class InstrumentedQueuePool(pool.QueuePool):
+    """QueuePool that reports checkout wait and hold times to a CheckoutTracker
+    
+    With a breaker and admission controller attached, checkouts fail fast
+    instead of queueing for pool_timeout while the database is down or the
+    pool is saturated.
+    """
+    
+    tracker: Optional[CheckoutTracker] = None
+    breaker: Optional[CircuitBreaker] = None
+    admission: Optional[AdmissionController] = None
+    _waiting = 0
+    _waiting_lock = threading.Lock()
+    
+    def _do_get(self):
+        probe = self.breaker.allow() if self.breaker is not None else False
+        if self.admission is not None:
+            capacity = self.size() + self._max_overflow if self._max_overflow >= 0 else math.inf
+            try:
+                self.admission.admit(self.checkedout(), self._waiting, capacity)
+            except PoolOverloadedError:
+                if self.breaker is not None:
+                    self.breaker.release_probe(probe)
+                raise
+        
+        call_site = _call_site()
+        start = time.monotonic()
+        with self._waiting_lock:
+            self._waiting += 1
+        try:
+            record = super()._do_get()
+        except Exception:
+            # Connecting failed or pool_timeout expired
+            if self.breaker is not None:
+                self.breaker.record_failure(probe)
+            raise
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+        checked_out = time.monotonic()
+        
+        if self.tracker is not None:
+            self.tracker.record_wait(checked_out - start, call_site)
+        record.info['_checkout'] = (checked_out, call_site)
+        if probe:
+            record.info['_breaker_probe'] = True
+        return record
+    
+    def _do_return_conn(self, record):
+        checkout = record.info.pop('_checkout', None)
+        if checkout is not None:
+            hold = time.monotonic() - checkout[0]
+            if self.tracker is not None:
+                self.tracker.record_hold(hold, checkout[1])
+            if self.admission is not None:
+                self.admission.record_hold(hold)
+        if self.breaker is not None:
+            # Probe checkouts that never ran a statement
+            self.breaker.release_probe(record.info.pop('_breaker_probe', False))
+        super()._do_return_conn(record)
+    
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.tracker = self.tracker
+        new_pool.breaker = self.breaker
+        new_pool.admission = self.admission
+        return new_pool
+
 class SyncConnectionPool:
     """Optimized synchronous connection pool for authentication operations"""
     
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, name: str = 'primary', profiler: QueryProfiler = query_profiler):
         self.database_url = database_url
+        self.name = name
+        self.profiler = profiler
+        self.checkout_tracker = CheckoutTracker(name, 'sync')
+        self.breaker = CircuitBreaker(name, 'sync')
+        self.admission = AdmissionController(name, 'sync')
         self._engine: Optional[Engine] = None
         self._session_factory: Optional[sessionmaker] = None
         
@@ -65,7 +848,7 @@ class SyncConnectionPool:
                 self.database_url,
                 
                 # Connection pool configuration
-                poolclass=pool.QueuePool,
+                poolclass=InstrumentedQueuePool,
                 pool_size=DatabaseConfig.POOL_SIZE,
                 max_overflow=DatabaseConfig.MAX_OVERFLOW,
                 pool_timeout=DatabaseConfig.POOL_TIMEOUT,
@@ -89,6 +872,11 @@ class SyncConnectionPool:
             
             logger.info(f"Created SQLAlchemy engine with pool_size={DatabaseConfig.POOL_SIZE}, "
                        f"max_overflow={DatabaseConfig.MAX_OVERFLOW}")
+            self._engine.pool.tracker = self.checkout_tracker
+            self._engine.pool.breaker = self.breaker
+            self._engine.pool.admission = self.admission
+            self.profiler.instrument_engine(self._engine)
+            self.breaker.instrument_engine(self._engine)
                        
         return self._engine
     
@@ -118,6 +906,9 @@ class SyncConnectionPool:
             'checked_out': engine.pool.checkedout(),
             'overflow': engine.pool.overflow(),
             'invalid': engine.pool.invalidated(),
+            'slow_acquires': self.checkout_tracker.slow_acquires,
+            'circuit_breaker': self.breaker.stats(),
+            'admission': self.admission.stats(),
             'status': pool_status
         }
     
@@ -128,6 +919,1067 @@ class SyncConnectionPool:
             self._engine = None
             self._session_factory = None
 
+# =============================================================================
+# ASYNC SQLALCHEMY SESSIONS (AsyncEngine on asyncpg)
+# =============================================================================
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, pool.AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with the same checkout instrumentation as the sync pool"""
+
+def _asyncpg_database_url(database_url: str) -> str:
+    """Rewrite a postgres URL to use the asyncpg SQLAlchemy driver"""
+    scheme, separator, rest = database_url.partition('://')
+    if scheme.split('+')[0] in ('postgres', 'postgresql'):
+        return f"postgresql+asyncpg{separator}{rest}"
+    return database_url
+
+class AsyncSessionPool:
+    """
+    SQLAlchemy AsyncEngine pool backing AsyncDatabaseSession.
+    
+    Uses the same pool settings as SyncConnectionPool, so a service that moves
+    its handlers to AsyncDatabaseSession can drop the sync pool entirely and
+    keep a single pool stack per process.
+    """
+    
+    def __init__(self, database_url: str, name: str = 'primary', profiler: QueryProfiler = query_profiler):
+        self.database_url = database_url
+        self.name = name
+        self.profiler = profiler
+        self.checkout_tracker = CheckoutTracker(name, 'async_session')
+        self.breaker = CircuitBreaker(name, 'async_session')
+        self.admission = AdmissionController(name, 'async_session')
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[sessionmaker] = None
+    
+    def get_engine(self) -> AsyncEngine:
+        """Get AsyncEngine with connection pooling"""
+        if self._engine is None:
+            self._engine = create_async_engine(
+                _asyncpg_database_url(self.database_url),
+                
+                # Connection pool configuration
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_size=DatabaseConfig.POOL_SIZE,
+                max_overflow=DatabaseConfig.MAX_OVERFLOW,
+                pool_timeout=DatabaseConfig.POOL_TIMEOUT,
+                pool_recycle=DatabaseConfig.POOL_RECYCLE,
+                pool_pre_ping=DatabaseConfig.POOL_PRE_PING,
+                
+                # Connection optimization (asyncpg connect arguments)
+                connect_args={
+                    'timeout': DatabaseConfig.CONNECT_ARGS['connect_timeout'],
+                    'command_timeout': DatabaseConfig.COMMAND_TIMEOUT,
+                    'server_settings': {
+                        'jit': 'off',
+                        'application_name': 'pyairtable_async_session'
+                    }
+                },
+                
+                # Performance settings
+                echo=False,
+                echo_pool=False,
+                execution_options={
+                    'isolation_level': 'READ COMMITTED'
+                }
+            )
+            
+            logger.info(f"Created SQLAlchemy AsyncEngine with pool_size={DatabaseConfig.POOL_SIZE}, "
+                       f"max_overflow={DatabaseConfig.MAX_OVERFLOW}")
+            self._engine.sync_engine.pool.tracker = self.checkout_tracker
+            self._engine.sync_engine.pool.breaker = self.breaker
+            self._engine.sync_engine.pool.admission = self.admission
+            self.profiler.instrument_engine(self._engine.sync_engine)
+            self.breaker.instrument_engine(self._engine.sync_engine)
+        
+        return self._engine
+    
+    def get_session_factory(self) -> sessionmaker:
+        """Get async session factory"""
+        if self._session_factory is None:
+            self._session_factory = sessionmaker(
+                bind=self.get_engine(),
+                class_=AsyncSession,
+                autoflush=False,
+                expire_on_commit=False
+            )
+        return self._session_factory
+    
+    def get_session(self) -> AsyncSession:
+        """Get async database session from pool"""
+        return self.get_session_factory()()
+    
+    def health_check(self) -> dict:
+        """Check AsyncEngine pool health"""
+        if self._engine is None:
+            return {'status': 'not_initialized'}
+        
+        engine_pool = self._engine.sync_engine.pool
+        return {
+            'pool_size': engine_pool.size(),
+            'checked_in': engine_pool.checkedin(),
+            'checked_out': engine_pool.checkedout(),
+            'overflow': engine_pool.overflow(),
+            'slow_acquires': self.checkout_tracker.slow_acquires,
+            'circuit_breaker': self.breaker.stats(),
+            'admission': self.admission.stats(),
+            'status': engine_pool.status()
+        }
+    
+    async def close(self):
+        """Close AsyncEngine pool"""
+        if self._engine:
+            await self._engine.dispose()
+            self._engine = None
+            self._session_factory = None
+
+# =============================================================================
+# NAMED QUERY REGISTRY AND PREPARED STATEMENT CACHE
+# =============================================================================
+
+class QueryRegistry:
+    """Registry of named queries declared once and prepared lazily per connection"""
+    
+    def __init__(self):
+        self._queries: Dict[str, str] = {}
+        self.warmup_queries: List[tuple] = []  # (query or name, args) run on each connection at startup
+    
+    def register(self, name: str, query: str):
+        """Declare a named query; re-registering a name with different SQL is an error"""
+        existing = self._queries.get(name)
+        if existing is not None and existing != query:
+            raise ValueError(f"Query '{name}' is already registered with different SQL")
+        self._queries[name] = query
+    
+    def get(self, name: str) -> str:
+        """Get the SQL text for a named query"""
+        try:
+            return self._queries[name]
+        except KeyError:
+            raise KeyError(f"Query '{name}' is not registered") from None
+    
+    def names(self) -> list:
+        """List registered query names"""
+        return list(self._queries)
+    
+    def register_warmup(self, query: str, *args):
+        """Run a query (SQL or registered name) with sample arguments on every connection during warm-up"""
+        self.warmup_queries.append((query, args))
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._queries
+    
+    def __len__(self) -> int:
+        return len(self._queries)
+
+class PreparedStatementCache:
+    """
+    LRU bookkeeping of registered queries used per backend connection.
+    
+    asyncpg invalidates PreparedStatement objects whenever a connection is
+    released back to the pool, so the statements themselves live in asyncpg's
+    per-connection statement cache (sized from PREPARED_STATEMENT_CACHE_SIZE)
+    and survive checkouts there. asyncpg exposes no counters for that cache,
+    so this class only counts registered-statement uses: a first use on a
+    backend, or a repeat use of a name that backend has run before. These
+    approximate asyncpg's hits and misses but are not the same numbers: its
+    LRU is shared with ad-hoc queries and may evict a registered statement
+    this class still remembers.
+    
+    Connections are identified by their server PID rather than by the pool
+    proxy, so when asyncpg recycles a connection after max_queries the new
+    backend simply starts with an empty cache and statements are re-prepared
+    on first use. Counters live on the cache itself and survive recycling.
+    """
+    
+    def __init__(self, max_size: int, max_connections: int):
+        self.max_size = max_size
+        self.max_connections = max_connections
+        self._caches: 'OrderedDict[int, OrderedDict]' = OrderedDict()
+        self.repeat_uses = 0
+        self.first_uses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def _connection_cache(self, connection) -> OrderedDict:
+        pid = connection.get_server_pid()
+        cache = self._caches.get(pid)
+        if cache is None:
+            cache = self._caches[pid] = OrderedDict()
+            # Drop caches of connections that were recycled or closed
+            while len(self._caches) > self.max_connections:
+                _, stale = self._caches.popitem(last=False)
+                self.evictions += len(stale)
+        else:
+            self._caches.move_to_end(pid)
+        return cache
+    
+    def record_use(self, connection, name: str) -> bool:
+        """Record a registered query running on this connection; returns True if it ran there before"""
+        cache = self._connection_cache(connection)
+        if name in cache:
+            cache.move_to_end(name)
+            self.repeat_uses += 1
+            return True
+        
+        self.first_uses += 1
+        cache[name] = True
+        if len(cache) > self.max_size:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return False
+    
+    def invalidate(self, connection, name: str):
+        """Forget a statement that the server no longer accepts (e.g. after DDL)"""
+        cache = self._caches.get(connection.get_server_pid())
+        if cache is not None and cache.pop(name, False):
+            self.invalidations += 1
+    
+    def clear(self):
+        """Drop all cached statements"""
+        self._caches.clear()
+    
+    def stats(self) -> dict:
+        """Get registered-statement use counters"""
+        uses = self.repeat_uses + self.first_uses
+        return {
+            'repeat_uses': self.repeat_uses,
+            'first_uses': self.first_uses,
+            'repeat_ratio': self.repeat_uses / uses if uses else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'connections': len(self._caches),
+            'statements': sum(len(cache) for cache in self._caches.values())
+        }
+
+# =============================================================================
+# BULK EXECUTION
+# =============================================================================
+
+class CopyRecords:
+    """Bulk row set streamed into a table with COPY as part of a batch"""
+    
+    def __init__(self, table_name: str, records: Iterable, columns: Optional[Sequence[str]] = None,
+                 schema_name: Optional[str] = None):
+        self.table_name = table_name
+        self.records = records  # Iterable or async iterable of row tuples
+        self.columns = columns
+        self.schema_name = schema_name
+
+class BatchExecutionError(Exception):
+    """Raised when a statement in a bulk batch fails; the whole batch is rolled back"""
+    
+    def __init__(self, statement_index: int, error: Exception):
+        super().__init__(f"Batch statement {statement_index} failed: {error}")
+        self.statement_index = statement_index
+        self.error = error
+
+# Commands whose row count a CTE wrapper can return
+_SQL_COUNTABLE_COMMANDS = frozenset({'INSERT', 'UPDATE', 'DELETE'})
+
+def _statement_body(query: str) -> str:
+    """Query without trailing semicolons, whitespace and comments"""
+    end = pos = 0
+    for match in _SQL_LITERAL_OR_COMMENT.finditer(query):
+        code = query[pos:match.start()].rstrip(' \t\r\n\f;')
+        if code:
+            end = pos + len(code)
+        if not match.group().startswith(('--', '/*')):
+            end = match.end()
+        pos = match.end()
+    code = query[pos:].rstrip(' \t\r\n\f;')
+    if code:
+        end = pos + len(code)
+    return query[:end]
+
+@lru_cache(maxsize=1024)
+def _counting_statement(query: str) -> Optional[str]:
+    """INSERT, UPDATE or DELETE rewritten to return its row count as one row, else None
+    
+    A pipelined executemany reports no per-statement status, but fetchmany
+    returns each execution's rows, so this gives one count per statement.
+    """
+    tokens = [token.upper() for token in _SQL_TOKEN.findall(_strip_literals(query))]
+    if not tokens or tokens[0] not in _SQL_COUNTABLE_COMMANDS:
+        return None
+    returning = '' if 'RETURNING' in tokens else '\nRETURNING 1'
+    return f"WITH bulk_rows AS (\n{_statement_body(query)}{returning}\n) SELECT count(*) FROM bulk_rows"
+
+# =============================================================================
+# CHECKOUT LIMITER
+# =============================================================================
+
+class CheckoutLimiter:
+    """
+    FIFO semaphore with an adjustable limit in front of the asyncpg pool.
+    
+    asyncpg cannot resize a live pool, so the pool is created at the upper
+    bound and this limiter caps concurrent checkouts at the current target.
+    Connections above the target go idle and are closed by
+    max_inactive_connection_lifetime, releasing their Postgres backends.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters: deque = deque()
+        self._acquisitions = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._peak_in_use = 0
+        self._peak_waiting = 0
+    
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+    
+    def reset_window(self) -> dict:
+        """Return and reset the checkout statistics gathered since the last call"""
+        window = {
+            'acquisitions': self._acquisitions,
+            'total_wait': self._total_wait,
+            'max_wait': self._max_wait,
+            'peak_in_use': self._peak_in_use,
+            'peak_waiting': self._peak_waiting
+        }
+        self._acquisitions = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._peak_in_use = self.in_use
+        self._peak_waiting = self.waiting
+        return window
+    
+    async def acquire(self, timeout: Optional[float] = None, tenant: Optional[str] = None):
+        start = time.monotonic()
+        if self.in_use < self.limit and not self._waiters:
+            self._grant()
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._peak_waiting = max(self._peak_waiting, self.waiting)
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                if waiter.done() and not waiter.cancelled():
+                    # Slot was granted while we were being cancelled; hand it on
+                    self.release()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+        
+        wait = time.monotonic() - start
+        self._acquisitions += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+    
+    def release(self, tenant: Optional[str] = None):
+        self.in_use -= 1
+        self._wake()
+    
+    def set_limit(self, limit: int):
+        self.limit = limit
+        self._wake()
+    
+    def _grant(self):
+        self.in_use += 1
+        self._peak_in_use = max(self._peak_in_use, self.in_use)
+    
+    def _wake(self):
+        while self._waiters and self.in_use < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._grant()
+                waiter.set_result(None)
+    
+    def load(self, tenant: Optional[str] = None) -> tuple:
+        """(in_use, waiting, capacity) seen by a caller, for admission control"""
+        return self.in_use, self.waiting, self.limit
+    
+    def stats(self) -> dict:
+        return {'limit': self.limit, 'in_use': self.in_use, 'waiting': self.waiting}
+
+# =============================================================================
+# TENANT FAIRNESS
+# =============================================================================
+
+if PROMETHEUS_AVAILABLE:
+    TENANT_CHECKOUT_WAIT_SECONDS = Histogram(
+        'db_tenant_checkout_wait_seconds',
+        'Time a tenant waits for a checkout slot',
+        ['pool', 'partition', 'tenant'],
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    )
+    TENANT_CONNECTIONS_IN_USE = Gauge(
+        'db_tenant_connections_in_use',
+        'Checkouts currently held per tenant',
+        ['pool', 'partition', 'tenant']
+    )
+    TENANT_CONNECTION_LIMIT = Gauge(
+        'db_tenant_connection_limit',
+        'Maximum concurrent checkouts a tenant may hold',
+        ['pool', 'partition', 'tenant']
+    )
+
+_current_tenant: ContextVar[Optional[str]] = ContextVar('pyairtable_db_tenant', default=None)
+_current_workload: ContextVar[Optional[str]] = ContextVar('pyairtable_db_workload', default=None)
+
+@contextlib.contextmanager
+def database_tenant(tenant_id: Any, workload: Optional[str] = None):
+    """Attribute checkouts made inside the block to a tenant and workload class
+
+    The workload class ('auth', 'interactive', 'batch', ...) selects a
+    DB_WORKLOAD_POOLS partition; unknown or missing classes use the whole pool.
+    """
+    tenant_token = _current_tenant.set(None if tenant_id is None else str(tenant_id))
+    workload_token = _current_workload.set(workload)
+    try:
+        yield
+    finally:
+        _current_workload.reset(workload_token)
+        _current_tenant.reset(tenant_token)
+
+def parse_weight_spec(spec: str) -> Dict[str, float]:
+    """Parse "name:value,name:value" settings such as DB_TENANT_WEIGHTS"""
+    values = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        name, _, value = item.strip().rpartition(':')
+        if not name:
+            raise ValueError(f"Expected name:value, got {item.strip()!r}")
+        values[name] = float(value)
+    return values
+
+# Tenants that have their own metric label; the rest are reported as "other"
+_labelled_tenants: set = set()
+
+def _tenant_label(tenant: Optional[str]) -> str:
+    if tenant is None:
+        return 'untagged'
+    if tenant in _labelled_tenants or len(_labelled_tenants) < DatabaseConfig.TENANT_METRICS_MAX:
+        _labelled_tenants.add(tenant)
+        return tenant
+    return 'other'
+
+class FairCheckoutLimiter(CheckoutLimiter):
+    """
+    CheckoutLimiter that shares slots between tenants by weighted fair queuing.
+
+    Waiters queue per tenant. Each gets a virtual finish tag of
+    max(virtual clock, tenant's previous tag) + 1 / weight, and a free slot
+    goes to the smallest tag at the head of any queue, so a tenant with a
+    thousand queued export queries gets its weighted share of checkouts
+    instead of the whole pool. While other tenants are waiting, a tenant is
+    not granted more than max_share of the limit; alone it may use the
+    whole pool. Checkouts without a tenant share one uncapped queue.
+    """
+
+    def __init__(self, limit: int, pool_name: str, partition: str = 'all',
+                 weights: Optional[Dict[str, float]] = None, max_share: Optional[float] = None):
+        super().__init__(limit)
+        self.pool_name = pool_name
+        self.partition = partition
+        self.weights = parse_weight_spec(DatabaseConfig.TENANT_WEIGHTS) if weights is None else weights
+        self.max_share = DatabaseConfig.TENANT_MAX_SHARE if max_share is None else max_share
+        self._queues: Dict[Optional[str], deque] = {}
+        self._tenant_in_use: Dict[Optional[str], int] = {}
+        self._last_tag: Dict[Optional[str], float] = {}
+        self._virtual_time = 0.0
+        self._queued = 0
+
+    @property
+    def waiting(self) -> int:
+        return self._queued
+
+    def tenant_limit(self, tenant: Optional[str]) -> int:
+        if tenant is None:
+            return self.limit
+        return max(1, math.ceil(self.limit * self.max_share))
+
+    def _contended(self, tenant: Optional[str]) -> bool:
+        """Whether any other tenant has checkouts queued"""
+        return self._queued > len(self._queues.get(tenant) or ())
+
+    def load(self, tenant: Optional[str] = None) -> tuple:
+        """A tenant only queues behind its own waiters, so admission sheds the noisy tenant first"""
+        if tenant is None:
+            return super().load()
+        capacity = min(self.limit, self.tenant_limit(tenant)) if self._contended(tenant) else self.limit
+        return self._tenant_in_use.get(tenant, 0), len(self._queues.get(tenant) or ()), capacity
+
+    async def acquire(self, timeout: Optional[float] = None, tenant: Optional[str] = None):
+        start = time.monotonic()
+        tag = max(self._virtual_time, self._last_tag.get(tenant, 0.0)) + 1 / self.weights.get(tenant, 1.0)
+        self._last_tag[tenant] = tag
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(tenant, deque()).append((tag, waiter))
+        self._queued += 1
+        self._wake()
+
+        if not waiter.done():
+            self._peak_waiting = max(self._peak_waiting, self.waiting)
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                if waiter.done() and not waiter.cancelled():
+                    # Slot was granted while we were being cancelled; hand it on
+                    self.release(tenant)
+                else:
+                    self._dequeue(tenant, waiter)
+                raise
+
+        wait = time.monotonic() - start
+        self._acquisitions += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        if PROMETHEUS_AVAILABLE:
+            TENANT_CHECKOUT_WAIT_SECONDS.labels(
+                pool=self.pool_name, partition=self.partition, tenant=_tenant_label(tenant)
+            ).observe(wait)
+
+    def release(self, tenant: Optional[str] = None):
+        self.in_use -= 1
+        self._tenant_in_use[tenant] -= 1
+        if PROMETHEUS_AVAILABLE:
+            TENANT_CONNECTIONS_IN_USE.labels(
+                pool=self.pool_name, partition=self.partition, tenant=_tenant_label(tenant)
+            ).dec()
+        self._forget_if_idle(tenant)
+        self._wake()
+
+    def _dequeue(self, tenant: Optional[str], waiter: asyncio.Future):
+        queue = self._queues.get(tenant)
+        for entry in queue or ():
+            if entry[1] is waiter:
+                queue.remove(entry)
+                self._queued -= 1
+                break
+        self._forget_if_idle(tenant)
+
+    def _forget_if_idle(self, tenant: Optional[str]):
+        if not self._queues.get(tenant) and not self._tenant_in_use.get(tenant):
+            self._queues.pop(tenant, None)
+            self._tenant_in_use.pop(tenant, None)
+            self._last_tag.pop(tenant, None)
+
+    def _wake(self):
+        while self.in_use < self.limit:
+            best, best_tag = None, None  # None is also the untagged tenant, so compare on the tag
+            for tenant, queue in self._queues.items():
+                if queue and (best_tag is None or queue[0][0] < best_tag) and (
+                    self._tenant_in_use.get(tenant, 0) < self.tenant_limit(tenant) or not self._contended(tenant)
+                ):
+                    best, best_tag = tenant, queue[0][0]
+            if best_tag is None:
+                return
+            tag, waiter = self._queues[best].popleft()
+            self._queued -= 1
+            if waiter.done():
+                continue
+            self._virtual_time = max(self._virtual_time, tag)
+            self._grant()
+            self._tenant_in_use[best] = self._tenant_in_use.get(best, 0) + 1
+            if PROMETHEUS_AVAILABLE:
+                label = _tenant_label(best)
+                TENANT_CONNECTIONS_IN_USE.labels(pool=self.pool_name, partition=self.partition, tenant=label).inc()
+                TENANT_CONNECTION_LIMIT.labels(
+                    pool=self.pool_name, partition=self.partition, tenant=label
+                ).set(self.tenant_limit(best))
+            waiter.set_result(None)
+
+    def stats(self) -> dict:
+        tenants = {}
+        for tenant in set(self._queues) | set(self._tenant_in_use):
+            tenants['untagged' if tenant is None else tenant] = {
+                'in_use': self._tenant_in_use.get(tenant, 0),
+                'waiting': len(self._queues.get(tenant) or ()),
+                'limit': self.tenant_limit(tenant),
+                'weight': self.weights.get(tenant, 1.0)
+            }
+        return {**super().stats(), 'tenants': tenants}
+
+# =============================================================================
+# QUERY RESULT CACHE
+# =============================================================================
+
+if PROMETHEUS_AVAILABLE:
+    QUERY_CACHE_REQUESTS_TOTAL = Counter(
+        'db_query_cache_requests_total',
+        'Query result cache lookups by tier and outcome',
+        ['tier', 'result']
+    )
+    QUERY_CACHE_INVALIDATIONS_TOTAL = Counter(
+        'db_query_cache_invalidations_total',
+        'Query result cache invalidations by table tag',
+        ['tag']
+    )
+
+_SQL_WRITE_TARGET = re.compile(
+    r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?|MERGE\s+INTO)\s+(?:ONLY\s+)?([\w."]+)',
+    re.IGNORECASE
+)
+# Words that can follow UPDATE without naming a table (FOR UPDATE NOWAIT, DO UPDATE SET, ...)
+_SQL_NON_TABLE_WORDS = frozenset({'set', 'nowait', 'skip', 'of'})
+_SQL_TOKEN = re.compile(r'(?:"(?:[^"]|"")*"|[\w$]+)(?:\.(?:"(?:[^"]|"")*"|[\w$]+))*|[(),;]')
+# Keywords closing a FROM list
+_SQL_FROM_LIST_END = frozenset({
+    'WHERE', 'GROUP', 'HAVING', 'WINDOW', 'ORDER', 'LIMIT', 'OFFSET', 'FETCH', 'FOR',
+    'UNION', 'INTERSECT', 'EXCEPT', 'RETURNING'
+})
+# Functions using FROM inside their argument list, e.g. EXTRACT(YEAR FROM ts)
+_SQL_FROM_FUNCTIONS = frozenset({'EXTRACT', 'SUBSTRING', 'TRIM', 'OVERLAY', 'POSITION'})
+# Set-returning built-ins that read no tables when used as a FROM item
+_SQL_TABLE_FREE_FUNCTIONS = frozenset({
+    'unnest', 'generate_series', 'generate_subscripts', 'regexp_matches', 'string_to_table',
+    'json_each', 'jsonb_each', 'json_each_text', 'jsonb_each_text', 'json_array_elements',
+    'jsonb_array_elements', 'json_array_elements_text', 'jsonb_array_elements_text',
+    'json_to_recordset', 'jsonb_to_recordset', 'json_populate_recordset', 'jsonb_populate_recordset'
+})
+
+def _strip_literals(query: str) -> str:
+    """Blank out string literals and comments so their contents aren't read as SQL"""
+    return _replace_literals(query, "''")
+
+def _table_name(token: str) -> str:
+    return token.replace('"', '').rsplit('.', 1)[-1].lower()
+
+def _read_sources(query: str) -> Tuple[frozenset, bool]:
+    """Tables in FROM lists and JOINs, and whether every FROM item was a table or subquery"""
+    tokens = _SQL_TOKEN.findall(_strip_literals(query))
+    tables = set()
+    taggable = True
+    states: List[Optional[str]] = [None]  # Per parenthesis depth: None, 'item' (expecting a FROM item) or 'list'
+    callers: List[Optional[str]] = [None]  # Word before each open parenthesis
+    for i, token in enumerate(tokens):
+        word = token.upper()
+        following = tokens[i + 1] if i + 1 < len(tokens) else ''
+        if token == '(':
+            inner = None
+            if states[-1] == 'item':
+                # A parenthesized join tree holds FROM items; a subquery has its own FROM
+                inner = None if following.upper() in ('SELECT', 'WITH', 'VALUES') else 'item'
+                states[-1] = 'list'
+            states.append(inner)
+            callers.append(tokens[i - 1].upper() if i else None)
+        elif token == ')':
+            if len(states) > 1:
+                states.pop()
+                callers.pop()
+        elif word == 'FROM':
+            if not (i and tokens[i - 1].upper() == 'DISTINCT') and callers[-1] not in _SQL_FROM_FUNCTIONS:
+                states[-1] = 'item'
+        elif states[-1] is None:
+            continue
+        elif word == 'JOIN' or (token == ',' and states[-1] == 'list'):
+            states[-1] = 'item'
+        elif word in _SQL_FROM_LIST_END or token == ';':
+            states[-1] = None
+        elif states[-1] == 'item' and word not in ('ONLY', 'LATERAL'):
+            if following == '(':
+                taggable = taggable and _table_name(token) in _SQL_TABLE_FREE_FUNCTIONS
+            else:
+                tables.add(_table_name(token))
+            states[-1] = 'list'
+    return frozenset(tables), taggable
+
+@lru_cache(maxsize=4096)
+def written_tables(query: str) -> frozenset:
+    """Tables a statement writes to, used as invalidation tags"""
+    names = (_table_name(match) for match in _SQL_WRITE_TARGET.findall(_strip_literals(query)))
+    return frozenset(name for name in names if name and name not in _SQL_NON_TABLE_WORDS)
+
+@lru_cache(maxsize=4096)
+def read_tables(query: str) -> frozenset:
+    """
+    Tables a query reads from, the default tags for a cached result.
+    
+    Empty when they can't be named: no FROM clause (the query may call a
+    function that reads tables) or a FROM item that isn't a table, subquery
+    or table-free built-in function.
+    """
+    tables, taggable = _read_sources(query)
+    return tables if taggable else frozenset()
+
+def _cacheable(result):
+    """Cached rows are stored as dicts, which both cache tiers can hold"""
+    if isinstance(result, asyncpg.Record):
+        return dict(result.items())
+    if isinstance(result, list):
+        return [dict(row.items()) if isinstance(row, asyncpg.Record) else row for row in result]
+    return result
+
+_MISS = object()
+
+# Redis entries are JSON; values JSON lacks are stored as {"$type": ..., "value": ...}
+_JSON_TYPE = '$type'
+_JSON_DECODERS: Dict[str, Callable[[Any], Any]] = {
+    'datetime': datetime.datetime.fromisoformat,
+    'date': datetime.date.fromisoformat,
+    'time': datetime.time.fromisoformat,
+    'timedelta': lambda value: datetime.timedelta(*value),
+    'decimal': Decimal,
+    'uuid': uuid.UUID,
+    'bytes': base64.b64decode,
+    'dict': dict,  # A row that has a '$type' column of its own
+}
+
+def _json_value(value):
+    """JSON-ready form of a cached result; raises TypeError for types it can't round-trip"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, dict):
+        if _JSON_TYPE in value:
+            return {_JSON_TYPE: 'dict', 'value': [[key, _json_value(item)] for key, item in value.items()]}
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    if isinstance(value, datetime.datetime):
+        return {_JSON_TYPE: 'datetime', 'value': value.isoformat()}
+    if isinstance(value, (datetime.date, datetime.time)):
+        return {_JSON_TYPE: type(value).__name__, 'value': value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {_JSON_TYPE: 'timedelta', 'value': [value.days, value.seconds, value.microseconds]}
+    if isinstance(value, Decimal):
+        return {_JSON_TYPE: 'decimal', 'value': str(value)}
+    if isinstance(value, uuid.UUID):
+        return {_JSON_TYPE: 'uuid', 'value': str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {_JSON_TYPE: 'bytes', 'value': base64.b64encode(value).decode()}
+    raise TypeError(f"{type(value).__name__} values can't be stored in the Redis cache tier")
+
+def _json_object(obj: dict):
+    kind = obj.get(_JSON_TYPE)
+    return obj if kind is None else _JSON_DECODERS[kind](obj['value'])
+
+def dump_cache_entry(expires_at: float, value) -> bytes:
+    """Serialize a cache entry for Redis as data-only JSON"""
+    return json.dumps([expires_at, _json_value(value)], separators=(',', ':')).encode()
+
+def load_cache_entry(payload: bytes) -> tuple:
+    """Inverse of dump_cache_entry; tuples come back as lists"""
+    expires_at, value = json.loads(payload, object_hook=_json_object)
+    return expires_at, value
+
+class QueryResultCache:
+    """
+    Two-tier cache of read query results with table-tag invalidation.
+    
+    Results live in an in-process LRU and, when a Redis URL is configured, in
+    Redis so every worker shares them. Entries are tagged with table names;
+    invalidating a tag drops its entries locally, deletes them from Redis and
+    broadcasts the tags over pub/sub so other processes drop theirs too.
+    
+    Concurrent misses for the same key share a single fetch. Across processes
+    a short Redis lock lets one worker fill a cold key while the others poll
+    for its result. Cached rows are returned as dicts (lists of dicts for
+    fetch_all) and must be treated as read-only.
+    
+    Redis holds entries as JSON, with datetime, Decimal, UUID and bytes values
+    tagged so they round-trip; results with other types stay in-process.
+    """
+    
+    def __init__(self, max_entries: int = DatabaseConfig.QUERY_CACHE_MAX_ENTRIES,
+                 redis_url: str = DatabaseConfig.QUERY_CACHE_REDIS_URL,
+                 key_prefix: str = DatabaseConfig.QUERY_CACHE_KEY_PREFIX):
+        if redis_url and not REDIS_AVAILABLE:
+            logger.warning("redis package not installed; query cache runs in-process only")
+        self.max_entries = max_entries
+        self.redis_url = redis_url if REDIS_AVAILABLE else ''
+        self.key_prefix = key_prefix
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tag_keys: Dict[str, set] = {}
+        self._tag_generations: Dict[str, int] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.redis_errors = 0
+    
+    @property
+    def _channel(self) -> str:
+        return f"{self.key_prefix}:invalidate"
+    
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.key_prefix}:tag:{tag}"
+    
+    def make_key(self, query: str, args: tuple, fetch_one: bool, fetch_all: bool) -> str:
+        """Cache key for a query, its arguments and fetch mode"""
+        digest = hashlib.blake2b(repr((query, args, fetch_one, fetch_all)).encode(), digest_size=16)
+        return f"{self.key_prefix}:{digest.hexdigest()}"
+    
+    async def cached(self, query: str, args: tuple, fetch_one: bool, fetch_all: bool,
+                     ttl: float, tags: Optional[Iterable[str]], fetch: Callable[[], Awaitable]):
+        """Return the cached result of a read query, running ``fetch`` on a miss"""
+        if written_tables(query):
+            raise ValueError("Only read queries can be cached")
+        if tags is None:
+            tags = read_tables(query)
+            if not tags:
+                raise ValueError("Can't tell which tables this query reads; pass tags to cache it")
+        tags = frozenset(tags)
+        key = self.make_key(query, args, fetch_one, fetch_all)
+        return await self.get_or_fetch(key, min(ttl, DatabaseConfig.QUERY_CACHE_MAX_TTL), tags, fetch)
+    
+    async def get_or_fetch(self, key: str, ttl: float, tags: frozenset, fetch: Callable[[], Awaitable]):
+        """Look a key up in both tiers; on a miss exactly one caller per process runs ``fetch``"""
+        value = self._get_local(key)
+        if value is not _MISS:
+            self.local_hits += 1
+            if PROMETHEUS_AVAILABLE:
+                QUERY_CACHE_REQUESTS_TOTAL.labels(tier='local', result='hit').inc()
+            return value
+        
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Retry only if the fetching caller was cancelled, not this one
+                if not inflight.cancelled():
+                    raise
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(key, ttl, tags, fetch)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't log it as unretrieved
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def _load(self, key: str, ttl: float, tags: frozenset, fetch: Callable[[], Awaitable]):
+        generation = self._generation(tags)
+        redis = await self._get_redis()
+        locked = False
+        
+        if redis is not None:
+            value = await self._get_remote(redis, key, tags)
+            if value is not _MISS:
+                return value
+            if PROMETHEUS_AVAILABLE:
+                QUERY_CACHE_REQUESTS_TOTAL.labels(tier='redis', result='miss').inc()
+            
+            try:
+                locked = bool(await redis.set(
+                    f"{key}:lock", b'1', nx=True, px=int(DatabaseConfig.QUERY_CACHE_LOCK_TIMEOUT * 1000)
+                ))
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+                locked = True  # Redis is unavailable; just fetch
+            
+            if not locked:
+                # Another worker is filling this key; wait for its result
+                deadline = time.monotonic() + DatabaseConfig.QUERY_CACHE_LOCK_TIMEOUT
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.02)
+                    value = await self._get_remote(redis, key, tags)
+                    if value is not _MISS:
+                        return value
+        
+        self.misses += 1
+        if PROMETHEUS_AVAILABLE:
+            QUERY_CACHE_REQUESTS_TOTAL.labels(tier='database', result='miss').inc()
+        try:
+            value = _cacheable(await fetch())
+            
+            # Skip storing if a write invalidated these tables while we were reading
+            if self._generation(tags) == generation:
+                expires_at = time.time() + ttl
+                self._set_local(key, expires_at, value, tags)
+                if redis is not None:
+                    await self._set_remote(redis, key, expires_at, value, ttl, tags)
+            return value
+        finally:
+            if locked and redis is not None:
+                try:
+                    await redis.delete(f"{key}:lock")
+                except (RedisError, OSError) as e:
+                    self._redis_failed(e)
+    
+    def _generation(self, tags: frozenset) -> tuple:
+        return tuple(self._tag_generations.get(tag, 0) for tag in sorted(tags))
+    
+    def _get_local(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISS
+        if entry[0] <= time.time():
+            self._drop_local(key)
+            return _MISS
+        self._entries.move_to_end(key)
+        return entry[1]
+    
+    def _set_local(self, key: str, expires_at: float, value, tags: frozenset):
+        self._drop_local(key)
+        self._entries[key] = (expires_at, value, tags)
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop_local(next(iter(self._entries)))
+    
+    def _drop_local(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+    
+    def _invalidate_local(self, tags: Iterable[str]):
+        for tag in tags:
+            self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+            for key in list(self._tag_keys.get(tag, ())):
+                self._drop_local(key)
+    
+    async def _get_remote(self, redis, key: str, tags: frozenset):
+        try:
+            payload = await redis.get(key)
+        except (RedisError, OSError) as e:
+            self._redis_failed(e)
+            return _MISS
+        if payload is None:
+            return _MISS
+        
+        try:
+            expires_at, value = load_cache_entry(payload)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Discarding unreadable query cache entry {key}: {e}")
+            return _MISS
+        self.redis_hits += 1
+        if PROMETHEUS_AVAILABLE:
+            QUERY_CACHE_REQUESTS_TOTAL.labels(tier='redis', result='hit').inc()
+        self._set_local(key, expires_at, value, tags)
+        return value
+    
+    async def _set_remote(self, redis, key: str, expires_at: float, value, ttl: float, tags: frozenset):
+        try:
+            payload = dump_cache_entry(expires_at, value)
+        except TypeError as e:
+            logger.debug(f"Query cache entry {key} kept in-process only: {e}")
+            return
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(key, payload, px=max(int(ttl * 1000), 1))
+                for tag in tags:
+                    # Tag sets outlive every entry they index
+                    pipe.sadd(self._tag_key(tag), key)
+                    pipe.expire(self._tag_key(tag), int(DatabaseConfig.QUERY_CACHE_MAX_TTL) + 1)
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._redis_failed(e)
+    
+    async def invalidate(self, tags: Iterable[str]):
+        """Drop every cached result tagged with any of ``tags``, in all processes"""
+        tags = sorted(set(tags))
+        if not tags:
+            return
+        self.invalidations += len(tags)
+        if PROMETHEUS_AVAILABLE:
+            for tag in tags:
+                QUERY_CACHE_INVALIDATIONS_TOTAL.labels(tag=tag).inc()
+        self._invalidate_local(tags)
+        
+        redis = await self._get_redis()
+        if redis is None:
+            return
+        try:
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            async with redis.pipeline(transaction=False) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                members = await pipe.execute()
+            entry_keys = set().union(*members)
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*tag_keys, *entry_keys)
+                pipe.publish(self._channel, ','.join(tags))
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._redis_failed(e)
+    
+    async def _get_redis(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.redis_url,
+                socket_timeout=DatabaseConfig.QUERY_CACHE_REDIS_TIMEOUT,
+                socket_connect_timeout=DatabaseConfig.QUERY_CACHE_REDIS_TIMEOUT
+            )
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+        return self._redis
+    
+    async def _listen_for_invalidations(self):
+        """Apply invalidations published by other processes to the local tier"""
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                async for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._invalidate_local(message['data'].decode().split(','))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Local entries still expire by TTL while the subscription is down
+                self._redis_failed(e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+    
+    def _redis_failed(self, error: Exception):
+        self.redis_errors += 1
+        if PROMETHEUS_AVAILABLE:
+            QUERY_CACHE_REQUESTS_TOTAL.labels(tier='redis', result='error').inc()
+        logger.warning(f"Query cache Redis operation failed: {error}")
+    
+    def stats(self) -> dict:
+        """Get cache hit/miss counters"""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'local_hits': self.local_hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+            'coalesced': self.coalesced,
+            'invalidations': self.invalidations,
+            'redis_enabled': bool(self.redis_url),
+            'redis_errors': self.redis_errors
+        }
+    
+    async def close(self):
+        """Stop the invalidation listener and drop all cached results"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        self._entries.clear()
+        self._tag_keys.clear()
+
 # =============================================================================
 # ASYNCHRONOUS CONNECTION POOL (AsyncPG)
 # =============================================================================
@@ -135,10 +1987,47 @@ class SyncConnectionPool:
 class AsyncConnectionPool:
     """Optimized asynchronous connection pool for high-performance operations"""
     
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, query_registry: Optional[QueryRegistry] = None,
+                 name: str = 'primary', profiler: QueryProfiler = query_profiler,
+                 result_cache: Optional[QueryResultCache] = None):
         self.database_url = database_url
+        self.name = name
+        self.profiler = profiler
+        self.checkout_tracker = CheckoutTracker(name, 'async')
+        self.breaker = CircuitBreaker(name, 'async')
+        self.admission = AdmissionController(name, 'async')
         self._pool: Optional[Pool] = None
         self._lock = asyncio.Lock()
+        self.query_registry = query_registry or QueryRegistry()
+        self._owns_result_cache = result_cache is None
+        self.result_cache = result_cache or QueryResultCache()
+        
+        if DatabaseConfig.ASYNCPG_AUTOSCALE_ENABLED:
+            # Pool is sized for the upper bound; the limiter enforces the current target
+            self.min_size = DatabaseConfig.ASYNCPG_AUTOSCALE_MIN_SIZE
+            self.max_size = DatabaseConfig.ASYNCPG_AUTOSCALE_MAX_SIZE
+        else:
+            self.min_size = DatabaseConfig.ASYNCPG_MIN_SIZE
+            self.max_size = DatabaseConfig.ASYNCPG_MAX_SIZE
+        self.limiter = self._create_limiter(
+            max(self.min_size, min(DatabaseConfig.ASYNCPG_MAX_SIZE, self.max_size)), 'all'
+        )
+        # Optional per-workload partitions, checked before the pool-wide limit,
+        # so batch work cannot hold the slots reserved for auth
+        self.workload_limiters: Dict[str, CheckoutLimiter] = {
+            workload: self._create_limiter(int(size), workload)
+            for workload, size in parse_weight_spec(DatabaseConfig.WORKLOAD_POOLS).items()
+        }
+        
+        self.statement_cache = PreparedStatementCache(
+            max_size=DatabaseConfig.PREPARED_STATEMENT_CACHE_SIZE,
+            max_connections=self.max_size * 2
+        )
+    
+    def _create_limiter(self, limit: int, partition: str) -> CheckoutLimiter:
+        if DatabaseConfig.TENANT_FAIR_QUEUING:
+            return FairCheckoutLimiter(limit, self.name, partition)
+        return CheckoutLimiter(limit)
     
     async def get_pool(self) -> Pool:
         """Get or create asyncpg connection pool"""
@@ -146,7 +2035,6 @@ class AsyncConnectionPool:
             async with self._lock:
                 if self._pool is None:
                     # Parse database URL for asyncpg
-                    import urllib.parse
                     parsed = urllib.parse.urlparse(self.database_url)
                     
                     self._pool = await asyncpg.create_pool(
@@ -157,13 +2045,14 @@ class AsyncConnectionPool:
                         database=parsed.path[1:] if parsed.path else None,
                         
                         # Pool configuration
-                        min_size=DatabaseConfig.ASYNCPG_MIN_SIZE,
-                        max_size=DatabaseConfig.ASYNCPG_MAX_SIZE,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
                         max_queries=DatabaseConfig.ASYNCPG_MAX_QUERIES,
                         max_inactive_connection_lifetime=DatabaseConfig.ASYNCPG_MAX_INACTIVE_TIME,
                         
                         # Connection optimization
-                        command_timeout=30,
+                        command_timeout=DatabaseConfig.COMMAND_TIMEOUT,
+                        statement_cache_size=DatabaseConfig.PREPARED_STATEMENT_CACHE_SIZE,
                         server_settings={
                             'application_name': 'pyairtable_async_auth',
                             'jit': 'off',
@@ -171,28 +2060,248 @@ class AsyncConnectionPool:
                         }
                     )
                     
-                    logger.info(f"Created AsyncPG pool with min_size={DatabaseConfig.ASYNCPG_MIN_SIZE}, "
-                               f"max_size={DatabaseConfig.ASYNCPG_MAX_SIZE}")
+                    logger.info(f"Created AsyncPG pool with min_size={self.min_size}, "
+                               f"max_size={self.max_size}")
         
         return self._pool
     
-    async def execute_query(self, query: str, *args, fetch_one: bool = False, fetch_all: bool = False):
-        """Execute optimized database query"""
+    @asynccontextmanager
+    async def acquire(self):
+        """Check out a connection, respecting the current checkout limit
+        
+        Fails fast with CircuitOpenError while the circuit breaker is open and
+        with PoolOverloadedError when the estimated wait exceeds the budget.
+        A statement cut short by the request budget rather than
+        COMMAND_TIMEOUT raises DeadlineExceededError and is not counted
+        against the database by the breaker.
+        Checkouts are queued fairly by the tenant and workload class set with
+        database_tenant().
+        """
+        tenant = _current_tenant.get()
+        partition = self.workload_limiters.get(_current_workload.get())
+        probe = self.breaker.allow()
+        try:
+            self.admission.admit(*self.limiter.load(tenant))
+        except PoolOverloadedError:
+            self.breaker.release_probe(probe)
+            raise
+        
+        call_site = _call_site()
+        start = time.monotonic()
+        try:
+            pool = await self.get_pool()
+            try:
+                if partition is not None:
+                    await partition.acquire(timeout=statement_timeout(), tenant=tenant)
+                try:
+                    await self.limiter.acquire(timeout=statement_timeout(), tenant=tenant)
+                except BaseException:
+                    if partition is not None:
+                        partition.release(tenant)
+                    raise
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError("Request deadline exceeded waiting for a connection") from None
+            try:
+                async with pool.acquire(timeout=statement_timeout()) as connection:
+                    checked_out = time.monotonic()
+                    self.checkout_tracker.record_wait(checked_out - start, call_site)
+                    try:
+                        yield connection
+                    finally:
+                        hold = time.monotonic() - checked_out
+                        self.checkout_tracker.record_hold(hold, call_site)
+                        self.admission.record_hold(hold)
+            finally:
+                self.limiter.release(tenant)
+                if partition is not None:
+                    partition.release(tenant)
+        except Exception as e:
+            if _deadline_was_binding(e) and not isinstance(e, DeadlineExceededError):
+                self.breaker.release_probe(probe)
+                raise DeadlineExceededError("Request deadline exceeded during query execution") from e
+            if _is_database_failure(e):
+                self.breaker.record_failure(probe)
+            elif isinstance(e, DeadlineExceededError):
+                self.breaker.release_probe(probe)
+            else:
+                # The database answered; the error is the caller's
+                self.breaker.record_success(probe)
+            raise
+        except BaseException:
+            self.breaker.release_probe(probe)
+            raise
+        else:
+            self.breaker.record_success(probe)
+    
+    def register_query(self, name: str, query: str):
+        """Declare a named query to be prepared lazily on each pooled connection"""
+        self.query_registry.register(name, query)
+    
+    def register_warmup_query(self, query: str, *args):
+        """Run a query with sample arguments on each connection during warm-up"""
+        self.query_registry.register_warmup(query, *args)
+    
+    async def warm_up(self, connections: Optional[int] = None) -> dict:
+        """Open connections and prepare statements before the pool serves traffic
+        
+        Creating the pool opens ``min_size`` connections concurrently. Each of
+        them is then checked out at once and gets every registered query
+        prepared into asyncpg's per-connection statement cache (loading type
+        codecs and the backend's catalog caches on the way), so first requests
+        reuse the statement, and every warm-up query executed.
+        """
+        start = time.perf_counter()
         pool = await self.get_pool()
+        count = min(connections or self.min_size, self.max_size)
+        
+        acquired = await asyncio.gather(
+            *[pool.acquire(timeout=DatabaseConfig.WARMUP_TIMEOUT) for _ in range(count)],
+            return_exceptions=True
+        )
+        held = [connection for connection in acquired if not isinstance(connection, BaseException)]
+        try:
+            for result in acquired:
+                if isinstance(result, BaseException):
+                    raise result
+            await asyncio.gather(*[self._warm_connection(connection) for connection in held])
+        finally:
+            await asyncio.gather(*[pool.release(connection) for connection in held])
+        
+        elapsed = time.perf_counter() - start
+        logger.info(f"Warmed up {self.name} async pool: {len(held)} connections in {elapsed:.3f}s")
+        return {
+            'connections': len(held),
+            'prepared_statements': len(self.query_registry),
+            'warmup_queries': len(self.query_registry.warmup_queries),
+            'seconds': elapsed
+        }
+    
+    async def _warm_connection(self, connection):
+        for name in self.query_registry.names():
+            # connection.prepare() bypasses the statement cache; executemany with
+            # no argument sets prepares through it without running the statement
+            await connection.executemany(self.query_registry.get(name), [], timeout=DatabaseConfig.WARMUP_TIMEOUT)
+            self.statement_cache.record_use(connection, name)
+        for query, args in self.query_registry.warmup_queries:
+            if query in self.query_registry:
+                await self._execute_prepared(connection, query, args, False, True, DatabaseConfig.WARMUP_TIMEOUT)
+            else:
+                await connection.fetch(query, *args, timeout=DatabaseConfig.WARMUP_TIMEOUT)
+    
+    async def execute_query(self, query: str, *args, fetch_one: bool = False, fetch_all: bool = False,
+                            cache_ttl: Optional[float] = None, tags: Optional[Sequence[str]] = None):
+        """Execute optimized database query
+        
+        ``query`` may be raw SQL or the name of a registered query, in which
+        case the cached prepared statement for the connection is used.
+        
+        With ``cache_ttl`` (seconds) the result of a read query is served from
+        the result cache, tagged with ``tags`` or by default the tables it
+        reads; queries whose tables can't be determined need explicit
+        ``tags``. Writes through this pool invalidate the tables they touch.
+        """
+        named = query in self.query_registry
+        sql = self.query_registry.get(query) if named else query
+        if cache_ttl:
+            return await self.result_cache.cached(
+                sql, args, fetch_one, fetch_all, cache_ttl, tags,
+                lambda: self.execute_query(query, *args, fetch_one=fetch_one, fetch_all=fetch_all)
+            )
+        
+        async with self.acquire() as connection:
+            start = time.perf_counter()
+            try:
+                # asyncpg cancels the statement server-side when the timeout expires
+                timeout = statement_timeout()
+                if named:
+                    result = await self._execute_prepared(connection, query, args, fetch_one, fetch_all, timeout)
+                elif fetch_one:
+                    result = await connection.fetchrow(query, *args, timeout=timeout)
+                elif fetch_all:
+                    result = await connection.fetch(query, *args, timeout=timeout)
+                else:
+                    result = await connection.execute(query, *args, timeout=timeout)
+            except Exception:
+                self.profiler.record(sql, time.perf_counter() - start, error=True)
+                raise
+            
+            self.profiler.record(sql, time.perf_counter() - start, _row_count(result))
         
-        async with pool.acquire() as connection:
+        await self.result_cache.invalidate(written_tables(sql))
+        return result
+    
+    async def _execute_prepared(self, connection, name: str, args: tuple,
+                                fetch_one: bool, fetch_all: bool, timeout: Optional[float] = None):
+        """Run a registered query on the connection's cached prepared statement"""
+        query = self.query_registry.get(name)
+        self.statement_cache.record_use(connection, name)
+        try:
+            # Passing args keeps asyncpg on the extended protocol and its statement cache
             if fetch_one:
-                return await connection.fetchrow(query, *args)
+                return await connection.fetchrow(query, *args, timeout=timeout)
             elif fetch_all:
-                return await connection.fetch(query, *args)
+                return await connection.fetch(query, *args, timeout=timeout)
             else:
-                return await connection.execute(query, *args)
+                return await connection.execute(query, *args, timeout=timeout)
+        except asyncpg.exceptions.InvalidCachedStatementError:
+            # asyncpg has dropped its copy; it is re-prepared on next use
+            self.statement_cache.invalidate(connection, name)
+            raise
     
-    async def execute_transaction(self, queries: list):
-        """Execute multiple queries in a transaction"""
-        pool = await self.get_pool()
+    async def stream(self, query: str, *args, prefetch: Optional[int] = None,
+                     batch_size: Optional[int] = None) -> AsyncIterator:
+        """Stream a large result set through a server-side cursor
+        
+        Yields records one at a time, fetching ``prefetch`` rows per round
+        trip, or lists of up to ``batch_size`` records when it is given. Rows
+        are only fetched as the caller consumes them, and the connection is
+        checked out just while iterating; wrap the generator in
+        ``contextlib.aclosing`` when breaking out early so it is returned
+        immediately rather than when the generator is garbage collected.
+        """
+        fetch_size = batch_size or prefetch or DatabaseConfig.STREAM_PREFETCH
+        if fetch_size < 1:
+            raise ValueError("prefetch and batch_size must be positive")
+        sql = self.query_registry.get(query) if query in self.query_registry else query
+        
+        rows = 0
+        elapsed = 0.0
+        async with self.acquire() as connection:
+            # Cursors only live inside a transaction
+            async with connection.transaction(readonly=True):
+                start = time.perf_counter()
+                try:
+                    cursor = await connection.cursor(sql, *args, timeout=statement_timeout())
+                    while True:
+                        records = await cursor.fetch(fetch_size, timeout=statement_timeout())
+                        elapsed += time.perf_counter() - start
+                        rows += len(records)
+                        if not records:
+                            break
+                        if batch_size:
+                            yield records
+                        else:
+                            for record in records:
+                                yield record
+                        if len(records) < fetch_size:
+                            break
+                        start = time.perf_counter()
+                except BaseException as e:
+                    if not isinstance(e, GeneratorExit):
+                        self.profiler.record(sql, elapsed + time.perf_counter() - start, rows, error=True)
+                    raise
+        
+        # Database time only; time spent by the consumer between fetches is excluded
+        self.profiler.record(sql, elapsed, rows)
+    
+    async def execute_transaction(self, queries: list, invalidate_tags: Sequence[str] = ()):
+        """Execute multiple queries in a transaction
         
-        async with pool.acquire() as connection:
+        After commit, cached results tagged with the tables the statements
+        write to (plus any ``invalidate_tags``) are invalidated.
+        """
+        tags = set(invalidate_tags)
+        async with self.acquire() as connection:
             async with connection.transaction():
                 results = []
                 for query_data in queries:
@@ -201,10 +2310,98 @@ class AsyncConnectionPool:
                     else:
                         query, args = query_data, ()
                     
-                    result = await connection.execute(query, *args)
+                    tags |= written_tables(query)
+                    start = time.perf_counter()
+                    result = await connection.execute(query, *args, timeout=statement_timeout())
+                    self.profiler.record(query, time.perf_counter() - start, _row_count(result))
                     results.append(result)
-                
-                return results
+        
+        # Only after commit, so readers can't re-cache the pre-transaction rows
+        await self.result_cache.invalidate(tags)
+        return results
+    
+    async def execute_bulk(self, statements: list) -> List[int]:
+        """Execute a batch of statements in one transaction with minimal round trips
+        
+        Entries use the same format as ``execute_transaction`` (SQL or registered
+        query name, optionally as a ``(query, *args)`` tuple) or a ``CopyRecords``.
+        Consecutive INSERT, UPDATE or DELETE entries with the same query text are
+        pipelined through a single ``fetchmany`` of the statement wrapped to
+        return its row count; ``CopyRecords`` entries are streamed with
+        ``copy_records_to_table``; anything else is sent on its own.
+        
+        Returns the number of rows each entry inserted, updated, deleted, copied
+        or selected. Any failure rolls back the whole batch and raises
+        ``BatchExecutionError`` with the index of the failing entry (the first
+        entry of a pipelined run, as the server does not say which one failed).
+        """
+        results: List[int] = [0] * len(statements)
+        tags = set()
+        
+        async with self.acquire() as connection:
+            async with connection.transaction():
+                for start, end, query, arg_rows in self._group_bulk_statements(statements):
+                    tags |= {query.table_name.lower()} if isinstance(query, CopyRecords) else written_tables(query)
+                    try:
+                        if isinstance(query, CopyRecords):
+                            results[start] = _row_count(await connection.copy_records_to_table(
+                                query.table_name,
+                                records=query.records,
+                                columns=query.columns,
+                                schema_name=query.schema_name,
+                                timeout=statement_timeout()
+                            ))
+                        elif end - start == 1:
+                            results[start] = _row_count(
+                                await connection.execute(query, *arg_rows[0], timeout=statement_timeout())
+                            )
+                        else:
+                            counting = _counting_statement(query)
+                            chunk_size = DatabaseConfig.BULK_EXECUTEMANY_CHUNK_SIZE
+                            for offset in range(0, len(arg_rows), chunk_size):
+                                rows = await connection.fetchmany(
+                                    counting, arg_rows[offset:offset + chunk_size], timeout=statement_timeout()
+                                )
+                                results[start + offset:start + offset + len(rows)] = [row[0] for row in rows]
+                    except Exception as e:
+                        raise BatchExecutionError(start, e) from e
+        
+        await self.result_cache.invalidate(tags)
+        return results
+    
+    def _group_bulk_statements(self, statements: list):
+        """Yield (start, end, query, arg_rows) runs of consecutive same-shaped statements"""
+        start = 0
+        while start < len(statements):
+            entry = statements[start]
+            if isinstance(entry, CopyRecords):
+                yield start, start + 1, entry, None
+                start += 1
+                continue
+            
+            query, args = self._split_statement(entry)
+            arg_rows = [args]
+            end = start + 1
+            # Only DML with parameters can be pipelined with per-statement row counts
+            pipelined = bool(args) and _counting_statement(query) is not None
+            while pipelined and end < len(statements) and not isinstance(statements[end], CopyRecords):
+                next_query, next_args = self._split_statement(statements[end])
+                if next_query != query or len(next_args) != len(args):
+                    break
+                arg_rows.append(next_args)
+                end += 1
+            
+            yield start, end, query, arg_rows
+            start = end
+    
+    def _split_statement(self, query_data) -> tuple:
+        if isinstance(query_data, tuple):
+            query, args = query_data[0], query_data[1:]
+        else:
+            query, args = query_data, ()
+        if query in self.query_registry:
+            query = self.query_registry.get(query)
+        return query, args
     
     async def health_check(self) -> dict:
         """Check async pool health"""
@@ -216,89 +2413,438 @@ class AsyncConnectionPool:
             'max_size': self._pool.get_max_size(),
             'current_size': self._pool.get_size(),
             'idle_connections': self._pool.get_idle_size(),
-            'status': 'healthy' if not self._pool.is_closed() else 'closed'
+            'checkout_limit': self.limiter.stats(),
+            'workload_partitions': {
+                workload: limiter.stats() for workload, limiter in self.workload_limiters.items()
+            },
+            'slow_acquires': self.checkout_tracker.slow_acquires,
+            'circuit_breaker': self.breaker.stats(),
+            'admission': self.admission.stats(),
+            'registered_statements': self.statement_cache.stats(),
+            'status': 'healthy' if not self._pool.is_closing() else 'closed'
         }
     
     async def close(self):
         """Close connection pool"""
-        if self._pool and not self._pool.is_closed():
+        if self._pool and not self._pool.is_closing():
             await self._pool.close()
             self._pool = None
+            self.statement_cache.clear()
+        if self._owns_result_cache:
+            await self.result_cache.close()
+
+# =============================================================================
+# READ REPLICA ROUTING
+# =============================================================================
+
+# Zero when the replica has replayed everything it received, so an idle primary
+# does not show up as replication lag
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+class ReplicaPool:
+    """Sync and async pools for one read replica plus its routing state"""
+    
+    def __init__(self, database_url: str, query_registry: Optional[QueryRegistry] = None,
+                 name: str = 'replica', result_cache: Optional[QueryResultCache] = None):
+        self.database_url = database_url
+        self.name = name
+        self.sync_pool = SyncConnectionPool(database_url, name=name)
+        self.async_pool = AsyncConnectionPool(database_url, query_registry=query_registry, name=name,
+                                              result_cache=result_cache)
+        self.async_session_pool = AsyncSessionPool(database_url, name=name)
+        self.outstanding = 0  # In-flight reads routed to this replica
+        self.lag_seconds = 0.0
+        self.healthy = True
+    
+    async def health_check(self) -> dict:
+        """Check replica pool health and routing state"""
+        return {
+            'sync_pool': self.sync_pool.health_check(),
+            'async_pool': await self.async_pool.health_check(),
+            'async_session_pool': self.async_session_pool.health_check(),
+            'outstanding': self.outstanding,
+            'lag_seconds': self.lag_seconds,
+            'healthy': self.healthy,
+            'database_url': self.database_url.split('@')[0] + '@***'
+        }
+    
+    async def close(self):
+        """Close replica pools"""
+        self.sync_pool.close()
+        await self.async_pool.close()
+        await self.async_session_pool.close()
+
+class ReplicaRouter:
+    """Routes reads to the least-loaded in-sync replica, falling back to primary"""
+    
+    # Bound on tracked sessions before expired write markers are purged
+    MAX_TRACKED_SESSIONS = 10000
+    
+    def __init__(self, replicas: List[ReplicaPool],
+                 max_lag_seconds: float = DatabaseConfig.REPLICA_MAX_LAG_SECONDS,
+                 read_your_writes_window: float = DatabaseConfig.READ_YOUR_WRITES_WINDOW):
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.read_your_writes_window = read_your_writes_window
+        self._last_write: Dict[str, float] = {}
+    
+    def record_write(self, session_key: Optional[str]):
+        """Remember that a session wrote, so its reads stay on the primary for a while"""
+        if session_key is None:
+            return
+        now = time.monotonic()
+        self._last_write[session_key] = now
+        if len(self._last_write) > self.MAX_TRACKED_SESSIONS:
+            cutoff = now - self.read_your_writes_window
+            self._last_write = {
+                key: written for key, written in self._last_write.items() if written >= cutoff
+            }
+    
+    def select(self, session_key: Optional[str] = None) -> Optional[ReplicaPool]:
+        """Pick a replica for a read, or None to use the primary"""
+        if session_key is not None:
+            written = self._last_write.get(session_key)
+            if written is not None and time.monotonic() - written < self.read_your_writes_window:
+                return None
+        
+        candidates = [
+            replica for replica in self.replicas
+            if replica.healthy and replica.lag_seconds <= self.max_lag_seconds
+            and replica.async_pool.breaker.state != CircuitBreaker.OPEN
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda replica: replica.outstanding)
 
 # =============================================================================
 # CONNECTION POOL MANAGER
 # =============================================================================
 
+def _multiplexer_url(database_url: str) -> str:
+    """Point a database URL at the local connection multiplexer, keeping credentials and database"""
+    parsed = urllib.parse.urlparse(database_url)
+    userinfo = parsed.netloc.rpartition('@')[0]
+    netloc = f"{DatabaseConfig.MULTIPLEXER_HOST}:{DatabaseConfig.MULTIPLEXER_PORT}"
+    return parsed._replace(netloc=f"{userinfo}@{netloc}" if userinfo else netloc).geturl()
+
 class ConnectionManager:
-    """Manages both sync and async connection pools"""
+    """Manages sync and async connection pools for the primary and read replicas
+    
+    With ``use_multiplexer`` the primary pools connect through the
+    connection-multiplexer.py sidecar, which shares a small set of Postgres
+    backends across every service on the host.
+    
+    The primary and replicas share one ``result_cache``. Writes made outside
+    execute_query/execute_transaction/execute_bulk (e.g. through SQLAlchemy
+    sessions) must call ``result_cache.invalidate()`` for the tables touched.
+    """
     
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, replica_urls: Optional[List[str]] = None,
+                 use_multiplexer: bool = DatabaseConfig.MULTIPLEXER_ENABLED):
         self.database_url = database_url
-        self.sync_pool = SyncConnectionPool(database_url)
-        self.async_pool = AsyncConnectionPool(database_url)
+        self.use_multiplexer = use_multiplexer
+        pool_url = _multiplexer_url(database_url) if use_multiplexer else database_url
+        self.result_cache = QueryResultCache()
+        self.sync_pool = SyncConnectionPool(pool_url)
+        self.async_pool = AsyncConnectionPool(pool_url, result_cache=self.result_cache)
+        self.async_session_pool = AsyncSessionPool(pool_url)
+        self.replicas = [
+            ReplicaPool(url, query_registry=self.async_pool.query_registry, name=f'replica-{index}',
+                        result_cache=self.result_cache)
+            for index, url in enumerate(replica_urls or [])
+        ]
+        self.router = ReplicaRouter(self.replicas)
     
     def get_sync_session(self) -> Session:
         """Get synchronous database session"""
         return self.sync_pool.get_session()
     
+    def get_async_session(self) -> AsyncSession:
+        """Get SQLAlchemy async database session"""
+        return self.async_session_pool.get_session()
+    
     async def get_async_pool(self) -> Pool:
         """Get asynchronous connection pool"""
         return await self.async_pool.get_pool()
     
+    async def execute_read(self, query: str, *args, session_key: Optional[str] = None,
+                           fetch_one: bool = False, fetch_all: bool = True,
+                           cache_ttl: Optional[float] = None, tags: Optional[Sequence[str]] = None):
+        """Execute a read-only query on a replica when one is in sync, else on the primary"""
+        if cache_ttl:
+            registry = self.async_pool.query_registry
+            sql = registry.get(query) if query in registry else query
+            return await self.result_cache.cached(
+                sql, args, fetch_one, fetch_all, cache_ttl, tags,
+                lambda: self.execute_read(query, *args, session_key=session_key,
+                                          fetch_one=fetch_one, fetch_all=fetch_all)
+            )
+        
+        replica = self.router.select(session_key)
+        if replica is None:
+            return await self.async_pool.execute_query(query, *args, fetch_one=fetch_one, fetch_all=fetch_all)
+        
+        replica.outstanding += 1
+        try:
+            return await replica.async_pool.execute_query(query, *args, fetch_one=fetch_one, fetch_all=fetch_all)
+        except DatabaseUnavailableError as e:
+            logger.warning(f"Replica unavailable, falling back to primary: {e}")
+            return await self.async_pool.execute_query(query, *args, fetch_one=fetch_one, fetch_all=fetch_all)
+        except DeadlineExceededError:
+            # A TimeoutError, so an OSError, but the request's budget ran out, not the replica
+            raise
+        except (OSError, asyncio.TimeoutError, asyncpg.exceptions.PostgresConnectionError,
+                asyncpg.exceptions.InterfaceError) as e:
+            replica.healthy = False
+            logger.warning(f"Replica read failed, falling back to primary: {e}")
+            return await self.async_pool.execute_query(query, *args, fetch_one=fetch_one, fetch_all=fetch_all)
+        finally:
+            replica.outstanding -= 1
+    
+    async def stream_read(self, query: str, *args, session_key: Optional[str] = None,
+                          prefetch: Optional[int] = None, batch_size: Optional[int] = None) -> AsyncIterator:
+        """Stream a large read from a replica when one is in sync, else from the primary"""
+        replica = self.router.select(session_key)
+        if replica is None:
+            async with contextlib.aclosing(self.async_pool.stream(
+                query, *args, prefetch=prefetch, batch_size=batch_size
+            )) as rows:
+                async for row in rows:
+                    yield row
+            return
+        
+        replica.outstanding += 1
+        try:
+            async with contextlib.aclosing(replica.async_pool.stream(
+                query, *args, prefetch=prefetch, batch_size=batch_size
+            )) as rows:
+                async for row in rows:
+                    yield row
+        finally:
+            replica.outstanding -= 1
+    
+    async def execute_write(self, query: str, *args, session_key: Optional[str] = None,
+                            fetch_one: bool = False, fetch_all: bool = False):
+        """Execute a query on the primary and pin the session's reads to it"""
+        result = await self.async_pool.execute_query(query, *args, fetch_one=fetch_one, fetch_all=fetch_all)
+        self.router.record_write(session_key)
+        return result
+    
+    def circuit_breakers(self) -> Dict[str, CircuitBreaker]:
+        """Circuit breakers of every pool, keyed for export by the monitoring middleware"""
+        pools = [self.sync_pool, self.async_pool, self.async_session_pool]
+        for replica in self.replicas:
+            pools += [replica.sync_pool, replica.async_pool, replica.async_session_pool]
+        return {f"db_{pool.name}_{pool.breaker.kind}": pool.breaker for pool in pools}
+    
+    def async_pools(self) -> List[AsyncConnectionPool]:
+        """The primary and replica asyncpg pools"""
+        return [self.async_pool] + [replica.async_pool for replica in self.replicas]
+    
+    async def warm_up(self) -> dict:
+        """Warm the primary and replica async pools concurrently"""
+        pools = self.async_pools()
+        results = await asyncio.wait_for(
+            asyncio.gather(*[async_pool.warm_up() for async_pool in pools]),
+            timeout=DatabaseConfig.WARMUP_TIMEOUT
+        )
+        return {async_pool.name: result for async_pool, result in zip(pools, results)}
+    
+    async def refresh_replica_lag(self):
+        """Measure replication lag on every replica"""
+        for replica in self.replicas:
+            try:
+                row = await replica.async_pool.execute_query(REPLICA_LAG_QUERY, fetch_one=True)
+                replica.lag_seconds = float(row[0])
+                replica.healthy = True
+            except DeadlineExceededError:
+                raise
+            except Exception as e:
+                replica.healthy = False
+                logger.warning(f"Replica lag check failed for "
+                               f"{replica.database_url.split('@')[-1]}: {e}")
+    
+    async def run_replica_lag_monitor(self, interval: float = DatabaseConfig.REPLICA_LAG_CHECK_INTERVAL):
+        """Background task refreshing replica lag until cancelled"""
+        while True:
+            await self.refresh_replica_lag()
+            await asyncio.sleep(interval)
+    
     async def health_check(self) -> dict:
         """Comprehensive health check for both pools"""
         sync_health = self.sync_pool.health_check()
         async_health = await self.async_pool.health_check()
         
-        return {
+        health = {
             'sync_pool': sync_health,
             'async_pool': async_health,
-            'database_url': self.database_url.split('@')[0] + '@***'  # Hide credentials
+            'async_session_pool': self.async_session_pool.health_check(),
+            'database_url': self.database_url.split('@')[0] + '@***',  # Hide credentials
+            'multiplexer': self.use_multiplexer,
+            'query_cache': self.result_cache.stats()
         }
+        if self.replicas:
+            health['replicas'] = [await replica.health_check() for replica in self.replicas]
+        return health
     
     async def close_all(self):
         """Close all connection pools"""
         self.sync_pool.close()
         await self.async_pool.close()
+        await self.async_session_pool.close()
+        for replica in self.replicas:
+            await replica.close()
+        await self.result_cache.close()
 
 # =============================================================================
 # CONTEXT MANAGERS FOR OPTIMIZED DATABASE ACCESS
 # =============================================================================
 
 class DatabaseSession:
-    """Context manager for database sessions with automatic cleanup"""
+    """Context manager for database sessions with automatic cleanup
     
-    def __init__(self, connection_manager: ConnectionManager):
+    Read-only sessions are routed to a replica; write sessions pin subsequent
+    reads for ``session_key`` to the primary. Inside an HTTP request the
+    transaction's statement_timeout is set to the request's remaining budget,
+    so Postgres cancels statements once the client's deadline has passed.
+    """
+    
+    def __init__(self, connection_manager: ConnectionManager, read_only: bool = False,
+                 session_key: Optional[str] = None):
         self.connection_manager = connection_manager
+        self.read_only = read_only
+        self.session_key = session_key
         self.session: Optional[Session] = None
+        self._replica: Optional[ReplicaPool] = None
     
     def __enter__(self) -> Session:
-        self.session = self.connection_manager.get_sync_session()
+        if self.read_only:
+            self._replica = self.connection_manager.router.select(self.session_key)
+        if self._replica is not None:
+            self._replica.outstanding += 1
+            self.session = self._replica.sync_pool.get_session()
+        else:
+            self.session = self.connection_manager.get_sync_session()
+        
+        if remaining_request_budget() is not None:
+            try:
+                timeout_ms = int(statement_timeout() * 1000)
+                self.session.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {'timeout': str(max(timeout_ms, 1))}
+                )
+            except BaseException:
+                self.__exit__(*sys.exc_info())
+                raise
         return self.session
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            if exc_type is not None:
-                self.session.rollback()
-            else:
-                self.session.commit()
-            self.session.close()
+        try:
+            if self.session:
+                if exc_type is not None:
+                    self.session.rollback()
+                else:
+                    self.session.commit()
+                    if not self.read_only:
+                        self.connection_manager.router.record_write(self.session_key)
+                self.session.close()
+        finally:
+            if self._replica is not None:
+                self._replica.outstanding -= 1
+                self._replica = None
+
+class AsyncDatabaseSession:
+    """Async context manager for SQLAlchemy sessions with DatabaseSession's commit/rollback semantics"""
+    
+    def __init__(self, connection_manager: ConnectionManager, read_only: bool = False,
+                 session_key: Optional[str] = None):
+        self.connection_manager = connection_manager
+        self.read_only = read_only
+        self.session_key = session_key
+        self.session: Optional[AsyncSession] = None
+        self._replica: Optional[ReplicaPool] = None
+    
+    async def __aenter__(self) -> AsyncSession:
+        if self.read_only:
+            self._replica = self.connection_manager.router.select(self.session_key)
+        if self._replica is not None:
+            self._replica.outstanding += 1
+            self.session = self._replica.async_session_pool.get_session()
+        else:
+            self.session = self.connection_manager.get_async_session()
+        
+        if remaining_request_budget() is not None:
+            try:
+                timeout_ms = int(statement_timeout() * 1000)
+                await self.session.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {'timeout': str(max(timeout_ms, 1))}
+                )
+            except BaseException:
+                await self.__aexit__(*sys.exc_info())
+                raise
+        return self.session
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if self.session:
+                if exc_type is not None:
+                    await self.session.rollback()
+                else:
+                    await self.session.commit()
+                    if not self.read_only:
+                        self.connection_manager.router.record_write(self.session_key)
+                await self.session.close()
+        finally:
+            if self._replica is not None:
+                self._replica.outstanding -= 1
+                self._replica = None
 
 class AsyncDatabaseConnection:
     """Context manager for async database connections"""
     
-    def __init__(self, connection_manager: ConnectionManager):
+    def __init__(self, connection_manager: ConnectionManager, read_only: bool = False,
+                 session_key: Optional[str] = None):
         self.connection_manager = connection_manager
+        self.read_only = read_only
+        self.session_key = session_key
         self.connection = None
+        self._checkout = None
+        self._replica: Optional[ReplicaPool] = None
     
     async def __aenter__(self):
-        pool = await self.connection_manager.get_async_pool()
-        self.connection = await pool.acquire()
+        if self.read_only:
+            self._replica = self.connection_manager.router.select(self.session_key)
+        if self._replica is not None:
+            self._replica.outstanding += 1
+            self._checkout = self._replica.async_pool.acquire()
+        else:
+            self._checkout = self.connection_manager.async_pool.acquire()
+        try:
+            self.connection = await self._checkout.__aenter__()
+        except BaseException:
+            self._release_replica()
+            raise
         return self.connection
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.connection:
-            await self.connection_manager.async_pool._pool.release(self.connection)
+        try:
+            if self.connection:
+                await self._checkout.__aexit__(exc_type, exc_val, exc_tb)
+                if exc_type is None and not self.read_only:
+                    self.connection_manager.router.record_write(self.session_key)
+        finally:
+            self._release_replica()
+    
+    def _release_replica(self):
+        if self._replica is not None:
+            self._replica.outstanding -= 1
+            self._replica = None
 
 # =============================================================================
 # PERFORMANCE MONITORING
@@ -347,6 +2893,159 @@ class PerformanceMonitor:
         
         return recommendations
 
+# =============================================================================
+# ADAPTIVE POOL AUTOSCALER
+# =============================================================================
+
+class PoolAutoscaler:
+    """
+    Background task that resizes the asyncpg checkout limit between bounds.
+    
+    Each interval it looks at mean checkout wait, callers queued beyond the
+    limit (overflow) and the share of the limit left idle at peak. Growth and
+    shrinking each need several consecutive agreeing samples, and growth is
+    faster than shrinking, so the size does not oscillate around a threshold.
+    
+    These signals come from the checkout limiter's per-interval window rather
+    than PerformanceMonitor, whose health snapshot only shows the pool at one
+    instant. Started by create_database_lifespan when
+    ASYNCPG_AUTOSCALE_ENABLED is set.
+    """
+    
+    def __init__(self, async_pool: AsyncConnectionPool,
+                 min_size: int = DatabaseConfig.ASYNCPG_AUTOSCALE_MIN_SIZE,
+                 max_size: int = DatabaseConfig.ASYNCPG_AUTOSCALE_MAX_SIZE,
+                 interval: float = DatabaseConfig.ASYNCPG_AUTOSCALE_INTERVAL):
+        self.async_pool = async_pool
+        self.name = async_pool.name
+        # Cannot grow past the size the asyncpg pool was created with
+        self.min_size = max(1, min_size)
+        self.max_size = min(max_size, async_pool.max_size)
+        self.interval = interval
+        self._up_streak = 0
+        self._down_streak = 0
+        self._task: Optional[asyncio.Task] = None
+        
+        if PROMETHEUS_AVAILABLE:
+            POOL_AUTOSCALER_TARGET_SIZE.labels(pool=self.name).set(self.async_pool.limiter.limit)
+    
+    def sample(self) -> Optional[dict]:
+        """Take one sample and resize if warranted; returns the decision, if any"""
+        limiter = self.async_pool.limiter
+        window = limiter.reset_window()
+        limit = limiter.limit
+        
+        mean_wait = window['total_wait'] / window['acquisitions'] if window['acquisitions'] else 0.0
+        overflow = window['peak_waiting']
+        idle_ratio = 1 - window['peak_in_use'] / limit if limit else 0.0
+        
+        if mean_wait >= DatabaseConfig.ASYNCPG_AUTOSCALE_WAIT_THRESHOLD or overflow > 0:
+            self._up_streak += 1
+            self._down_streak = 0
+        elif idle_ratio >= DatabaseConfig.ASYNCPG_AUTOSCALE_IDLE_RATIO:
+            self._down_streak += 1
+            self._up_streak = 0
+        else:
+            self._up_streak = self._down_streak = 0
+        
+        if self._up_streak >= DatabaseConfig.ASYNCPG_AUTOSCALE_UP_SAMPLES and limit < self.max_size:
+            step = max(1, math.ceil(limit * 0.25), overflow)
+            reason = 'overflow' if overflow > 0 else 'checkout_wait'
+            return self._resize(min(self.max_size, limit + step), 'up', reason, mean_wait, idle_ratio, overflow)
+        
+        if self._down_streak >= DatabaseConfig.ASYNCPG_AUTOSCALE_DOWN_SAMPLES and limit > self.min_size:
+            step = max(1, math.floor(limit * 0.1))
+            return self._resize(max(self.min_size, limit - step), 'down', 'idle', mean_wait, idle_ratio, overflow)
+        
+        return None
+    
+    def _resize(self, new_limit: int, direction: str, reason: str,
+                mean_wait: float, idle_ratio: float, overflow: int) -> dict:
+        old_limit = self.async_pool.limiter.limit
+        self.async_pool.limiter.set_limit(new_limit)
+        self._up_streak = self._down_streak = 0
+        
+        if PROMETHEUS_AVAILABLE:
+            POOL_AUTOSCALER_TARGET_SIZE.labels(pool=self.name).set(new_limit)
+            POOL_AUTOSCALER_DECISIONS_TOTAL.labels(pool=self.name, direction=direction, reason=reason).inc()
+        
+        logger.info(f"Pool autoscaler ({self.name}) resized {old_limit} -> {new_limit}: {reason} "
+                    f"(mean_wait={mean_wait:.3f}s, idle_ratio={idle_ratio:.2f}, overflow={overflow})")
+        
+        return {
+            'pool': self.name,
+            'direction': direction,
+            'reason': reason,
+            'old_size': old_limit,
+            'new_size': new_limit
+        }
+    
+    async def run(self):
+        """Sample until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Pool autoscaler ({self.name}) sample failed: {e}")
+    
+    def start(self) -> asyncio.Task:
+        """Start the autoscaler as a background task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+    
+    async def stop(self):
+        """Stop the background task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# =============================================================================
+# SERVICE LIFESPAN
+# =============================================================================
+
+def create_database_lifespan(connection_manager: ConnectionManager, monitoring=None):
+    """FastAPI lifespan that warms the pools before the service reports ready
+    
+    ``monitoring`` is a PyAirtableMonitoring instance; it is marked ready only
+    once warm-up has finished, so /health/ready keeps traffic away until then,
+    and it exports the pools' circuit breaker states, refreshes health checks
+    in the background and starts its runtime metrics. If warm-up fails the service fails to start.
+    With ASYNCPG_AUTOSCALE_ENABLED each async pool gets a PoolAutoscaler.
+    Pools are closed on shutdown.
+    """
+    @asynccontextmanager
+    async def lifespan(app):
+        summary = await connection_manager.warm_up()
+        logger.info(f"Database warm-up complete: {summary}")
+        autoscalers = []
+        if DatabaseConfig.ASYNCPG_AUTOSCALE_ENABLED:
+            autoscalers = [PoolAutoscaler(async_pool) for async_pool in connection_manager.async_pools()]
+            for autoscaler in autoscalers:
+                autoscaler.start()
+        if monitoring is not None:
+            for name, breaker in connection_manager.circuit_breakers().items():
+                monitoring.add_circuit_breaker(name, breaker)
+            monitoring.mark_ready()
+            monitoring.start_health_checks()
+            monitoring.start_runtime_metrics()
+        try:
+            yield
+        finally:
+            for autoscaler in autoscalers:
+                await autoscaler.stop()
+            if monitoring is not None:
+                await monitoring.stop_health_checks()
+                await monitoring.stop_runtime_metrics()
+            await connection_manager.close_all()
+    
+    return lifespan
+
 # =============================================================================
 # FACTORY FUNCTION
 # =============================================================================
@@ -357,4 +3056,9 @@ def create_connection_manager() -> ConnectionManager:
     if not database_url:
         raise ValueError("DATABASE_URL environment variable is required")
     
-    return ConnectionManager(database_url)
\ No newline at end of file
+    # Comma-separated list of read replica URLs
+    replica_urls = [
+        url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+    ]
+    
+    return ConnectionManager(database_url, replica_urls=replica_urls)
\ No newline at end of file
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Monitoring Middleware Benchmark
+Purpose: Measure per-request overhead of the monitoring middleware
+
+Drives a FastAPI app directly through its ASGI interface (no HTTP server or
+sockets) so the numbers isolate the middleware itself. Two variants are
+compared against the bare app:
+
+- basehttp: the previous BaseHTTPMiddleware implementation, resolving
+  .labels(...) on every request
+- asgi: create_fastapi_middleware(), the pure ASGI middleware with cached
+  label children
+
+Usage:
+    python monitoring/middleware-benchmark.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from monitoring.monitoring_middleware import PyAirtableMonitoring, create_fastapi_middleware
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/sessions/{session_id}")
+    async def get_session(session_id: str):
+        return {"id": session_id}
+
+    return app
+
+
+def create_basehttp_middleware(monitoring: PyAirtableMonitoring):
+    """The middleware as it was before: BaseHTTPMiddleware with per-request label lookups"""
+    class LegacyMonitoringMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            start_time = time.time()
+            method = request.method
+            path = request.url.path
+            response = await call_next(request)
+            monitoring.http_requests_total.labels(
+                method=method,
+                endpoint=path,
+                status_code=response.status_code,
+                service=monitoring.service_name
+            ).inc()
+            monitoring.http_request_duration_seconds.labels(
+                method=method,
+                endpoint=path,
+                service=monitoring.service_name
+            ).observe(time.time() - start_time)
+            return response
+
+    return LegacyMonitoringMiddleware
+
+
+async def call(app, path: str):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"benchmark"), (b"x-request-timeout", b"5")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests: int, rounds: int) -> dict:
+    """Best-of-rounds and median microseconds per request"""
+    for i in range(min(requests, 1000)):
+        await call(app, f"/api/sessions/{i % 50}")
+
+    per_request = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for i in range(requests):
+            await call(app, f"/api/sessions/{i % 50}")
+        per_request.append((time.perf_counter() - start) / requests * 1e6)
+    return {"best_us": min(per_request), "median_us": statistics.median(per_request)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark monitoring middleware overhead per request")
+    parser.add_argument("--requests", type=int, default=20000, help="Requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", default="middleware_benchmark_results.json")
+    args = parser.parse_args()
+
+    monitoring = PyAirtableMonitoring("middleware-benchmark", enable_otel=False)
+
+    variants = {}
+    for name, middleware in [
+        ("bare", None),
+        ("basehttp", create_basehttp_middleware(monitoring)),
+        ("asgi", create_fastapi_middleware(monitoring)),
+    ]:
+        app = create_app()
+        if middleware is not None:
+            app.add_middleware(middleware)
+        variants[name] = await measure(app, args.requests, args.rounds)
+
+    bare = variants["bare"]["best_us"]
+    print(f"\n{'variant':<10}{'best us/req':>14}{'median us/req':>16}{'overhead us':>14}")
+    for name, result in variants.items():
+        result["overhead_us"] = result["best_us"] - bare
+        print(f"{name:<10}{result['best_us']:>14.2f}{result['median_us']:>16.2f}{result['overhead_us']:>14.2f}")
+
+    with open(args.output, "w") as f:
+        json.dump({"timestamp": time.time(), "requests": args.requests, "rounds": args.rounds,
+                   "results": variants}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,42 +3,786 @@ Production-ready monitoring middleware for PyAirtable services.
 Provides Prometheus metrics, OpenTelemetry tracing, and health checks.
 """
 
+import re
+import gc
+import sys
 import time
+import asyncio
+import math
+import bisect
 import logging
+import threading
 import traceback
-from typing import Optional, Dict, Any, Callable
+import weakref
+import importlib.util
+import inspect
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import TYPE_CHECKING, Optional, Dict, Any, Awaitable, Callable, List, Union
 from functools import wraps
 import os
 import json
 
-try:
-    from prometheus_client import Counter, Histogram, Gauge, Info, start_http_server, generate_latest, CONTENT_TYPE_LATEST
-    PROMETHEUS_AVAILABLE = True
-except ImportError:
-    PROMETHEUS_AVAILABLE = False
+# Prometheus and OpenTelemetry are imported when a PyAirtableMonitoring instance
+# enables them, not at module import: the OTLP gRPC exporter and instrumentors
+# alone add seconds to cold start. Here we only check that they are installed.
+def _module_available(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+_OTEL_MODULES = (
+    "opentelemetry.sdk",
+    "opentelemetry.exporter.otlp.proto.grpc",
+    "opentelemetry.instrumentation.requests",
+    "opentelemetry.instrumentation.urllib3",
+    "opentelemetry.instrumentation.redis",
+    "opentelemetry.instrumentation.psycopg2",
+)
+
+PROMETHEUS_AVAILABLE = _module_available("prometheus_client")
+if not PROMETHEUS_AVAILABLE:
     print("Warning: prometheus_client not available. Install with: pip install prometheus-client")
 
-try:
-    from opentelemetry import trace, metrics
-    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-    from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
-    from opentelemetry.instrumentation.requests import RequestsInstrumentor
-    from opentelemetry.instrumentation.urllib3 import URLLib3Instrumentor
-    from opentelemetry.instrumentation.redis import RedisInstrumentor
-    from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
-    from opentelemetry.sdk.trace import TracerProvider
-    from opentelemetry.sdk.trace.export import BatchSpanProcessor
-    from opentelemetry.sdk.metrics import MeterProvider
-    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
-    from opentelemetry.sdk.resources import Resource, SERVICE_NAME, SERVICE_VERSION
-    from opentelemetry.propagate import inject
-    OTEL_AVAILABLE = True
-except ImportError:
-    OTEL_AVAILABLE = False
+OTEL_AVAILABLE = all(_module_available(name) for name in _OTEL_MODULES)
+if not OTEL_AVAILABLE:
     print("Warning: OpenTelemetry not available. Install with: pip install opentelemetry-api opentelemetry-sdk opentelemetry-exporter-otlp")
 
+if TYPE_CHECKING:
+    from monitoring.trace_sampling import TailSamplingSpanProcessor
+
 logger = logging.getLogger(__name__)
 
+# Gauge values for circuit breakers registered with add_circuit_breaker()
+CIRCUIT_BREAKER_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _set_span_ok(span):
+    from opentelemetry.trace import Status, StatusCode
+    span.set_status(Status(StatusCode.OK))
+
+def _set_span_error(span, error: Exception):
+    from opentelemetry.trace import Status, StatusCode
+    span.set_status(Status(StatusCode.ERROR, description=str(error)))
+
+# Request deadline propagation
+# The middleware stores the monotonic deadline of the current HTTP request so
+# downstream code (e.g. database pools) can bound its own timeouts by the
+# remaining budget instead of fixed defaults.
+REQUEST_TIMEOUT_HEADER = "x-request-timeout"
+_REQUEST_TIMEOUT_HEADER_BYTES = REQUEST_TIMEOUT_HEADER.encode("latin-1")
+
+_request_deadline: ContextVar[Optional[float]] = ContextVar("pyairtable_request_deadline", default=None)
+
+def set_request_deadline(timeout: Optional[float]) -> Token:
+    """Set the current request's deadline to `timeout` seconds from now."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    return _request_deadline.set(deadline)
+
+def reset_request_deadline(token: Token):
+    """Restore the deadline that was active before `set_request_deadline`."""
+    _request_deadline.reset(token)
+
+def remaining_request_budget() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None if unbounded."""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+# Metric label cardinality
+# Endpoint labels are route templates (/api/sessions/{session_id}), never raw
+# paths. Requests that match no route share one label, and each guarded metric
+# keeps at most `max_label_sets` label sets; further ones fold into "overflow".
+UNMATCHED_ROUTE_LABEL = "unmatched"
+OVERFLOW_LABEL_VALUE = "overflow"
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"})
+
+class CardinalityGuard:
+    """Caps the number of distinct label sets recorded per metric."""
+    
+    def __init__(self, max_label_sets: int):
+        self.max_label_sets = max_label_sets
+        self._label_sets: Dict[str, set] = {}
+        self.overflows: Dict[str, int] = {}
+    
+    def admit(self, metric: str, labels: tuple) -> bool:
+        """True if `labels` is already known for `metric` or there is room for it."""
+        label_sets = self._label_sets.setdefault(metric, set())
+        if labels in label_sets:
+            return True
+        if len(label_sets) < self.max_label_sets:
+            label_sets.add(labels)
+            return True
+        self.overflows[metric] = self.overflows.get(metric, 0) + 1
+        return False
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_label_sets": self.max_label_sets,
+            "label_sets": {metric: len(label_sets) for metric, label_sets in self._label_sets.items()},
+            "overflows": dict(self.overflows)
+        }
+
+# Latency sketches
+# Optional per-route quantile sketches for latencies too fine for the default
+# histogram buckets. Quantiles cover the last one to two windows; count, sum and
+# the compact histogram are cumulative like any Prometheus histogram.
+SKETCH_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+SKETCH_RELATIVE_ACCURACY = float(os.getenv("METRICS_SKETCH_RELATIVE_ACCURACY", "0.01"))
+SKETCH_MAX_BINS = int(os.getenv("METRICS_SKETCH_MAX_BINS", "2048"))
+SKETCH_WINDOW_SECONDS = float(os.getenv("METRICS_SKETCH_WINDOW_SECONDS", "60"))
+SKETCH_COMPACT_BUCKETS = tuple(
+    float(bound) for bound in os.getenv("METRICS_SKETCH_BUCKETS", "0.001,0.005,0.025,0.1,0.5,2.5,10").split(",")
+)
+
+class LatencySketch:
+    """
+    DDSketch-style quantile sketch.
+    
+    Values fall into logarithmic bins of width gamma = (1 + a) / (1 - a), so
+    every quantile is returned within relative error `a`. At most `max_bins`
+    bins are kept; beyond that the lowest bins are folded together, which only
+    costs accuracy at the low quantiles. Sketches with the same accuracy merge
+    exactly, across routes, windows or processes.
+    """
+    
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY,
+                 max_bins: int = SKETCH_MAX_BINS, min_value: float = 1e-9):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.min_value = min_value
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, value: float):
+        if value <= self.min_value:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+    
+    def merge(self, other: "LatencySketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    def _collapse(self):
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins
+        folded = sum(self.bins.pop(index) for index in indexes[:excess])
+        self.bins[indexes[excess]] += folded
+    
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile `q` (0..1); NaN for an empty sketch."""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": self.bins,
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencySketch":
+        sketch = cls(relative_accuracy=data["relative_accuracy"])
+        sketch.bins = {int(index): count for index, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if data["count"]:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+class RouteLatency:
+    """Latency of one route: cumulative count, sum and compact buckets, plus windowed sketches."""
+    
+    def __init__(self, buckets: tuple = SKETCH_COMPACT_BUCKETS, window: float = SKETCH_WINDOW_SECONDS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.window = window
+        self._current = LatencySketch()
+        self._previous = LatencySketch()
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        with self._lock:
+            self._rotate()
+            self.count += 1
+            self.sum += value
+            self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._current.add(value)
+    
+    def _rotate(self):
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            # A whole idle window means the previous one is stale too
+            self._previous = self._current if now - self._window_start < 2 * self.window else LatencySketch()
+            self._current = LatencySketch()
+            self._window_start = now
+    
+    def sketch(self) -> LatencySketch:
+        """Sketch of the current and previous window."""
+        with self._lock:
+            self._rotate()
+            sketch = LatencySketch()
+            sketch.merge(self._previous)
+            sketch.merge(self._current)
+            return sketch
+    
+    def snapshot(self) -> tuple:
+        with self._lock:
+            return self.count, self.sum, list(self.bucket_counts)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """State for merging in another worker, with the window start as wall-clock time."""
+        with self._lock:
+            self._rotate()
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "bucket_counts": list(self.bucket_counts),
+                "window_start": time.time() - (time.monotonic() - self._window_start),
+                "current": self._current.to_dict(),
+                "previous": self._previous.to_dict()
+            }
+    
+    def inherit(self, data: Dict[str, Any]):
+        """Add a dead worker's cumulative count, sum and buckets; its windows are dropped."""
+        with self._lock:
+            self.count += data["count"]
+            self.sum += data["sum"]
+            for index, bucket_count in enumerate(data["bucket_counts"]):
+                self.bucket_counts[index] += bucket_count
+    
+    @staticmethod
+    def recent_sketch(data: Dict[str, Any], window: float = SKETCH_WINDOW_SECONDS) -> LatencySketch:
+        """The windows of a to_dict() snapshot that are still recent."""
+        age = time.time() - data["window_start"]
+        sketch = LatencySketch()
+        if age < 2 * window:
+            sketch.merge(LatencySketch.from_dict(data["current"]))
+        if age < window:
+            sketch.merge(LatencySketch.from_dict(data["previous"]))
+        return sketch
+
+class LatencySketchCollector:
+    """Exports RouteLatency sketches as a quantile summary and a compact histogram."""
+    
+    def __init__(self, monitoring: "PyAirtableMonitoring"):
+        self.monitoring = monitoring
+    
+    def collect(self):
+        from prometheus_client.core import HistogramMetricFamily, Metric
+        
+        summary = Metric(
+            'http_request_duration_quantiles_seconds',
+            'HTTP request duration quantiles from per-route sketches (recent window)',
+            'summary'
+        )
+        histogram = HistogramMetricFamily(
+            'http_request_duration_compact_seconds',
+            'HTTP request duration in seconds, compact buckets',
+            labels=['method', 'endpoint', 'service']
+        )
+        service = self.monitoring.service_name
+        for (method, endpoint), (count, total, bucket_counts, sketch) in self.monitoring.route_latency_snapshots().items():
+            labels = {'method': method, 'endpoint': endpoint, 'service': service}
+            for q in SKETCH_QUANTILES:
+                summary.add_sample(
+                    'http_request_duration_quantiles_seconds', {**labels, 'quantile': str(q)}, sketch.quantile(q)
+                )
+            summary.add_sample('http_request_duration_quantiles_seconds_count', labels, count)
+            summary.add_sample('http_request_duration_quantiles_seconds_sum', labels, total)
+            
+            cumulative, buckets = 0, []
+            for bound, bucket_count in zip(SKETCH_COMPACT_BUCKETS + (math.inf,), bucket_counts):
+                cumulative += bucket_count
+                buckets.append(('+Inf' if bound == math.inf else str(bound), cumulative))
+            histogram.add_metric([method, endpoint, service], buckets, total)
+        yield summary
+        yield histogram
+
+class TailSamplingCollector:
+    """Exports the tail sampler's decisions, dropped spans and buffer size.
+    
+    The sampler lives in each worker, so in multiprocess mode these series
+    describe the worker that served the scrape.
+    """
+    
+    def __init__(self, monitoring: "PyAirtableMonitoring"):
+        self.monitoring = monitoring
+    
+    def collect(self):
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+        
+        stats = self.monitoring.trace_sampler.stats()
+        service = self.monitoring.service_name
+        
+        traces = CounterMetricFamily(
+            'trace_sampler_traces', 'Traces decided by the tail sampler', labels=['decision', 'service']
+        )
+        for reason, count in stats['traces_kept'].items():
+            traces.add_metric([f'kept_{reason}', service], count)
+        traces.add_metric(['dropped', service], stats['traces_dropped'])
+        
+        spans_dropped = CounterMetricFamily(
+            'trace_sampler_spans_dropped', 'Spans not exported by the tail sampler', labels=['reason', 'service']
+        )
+        for reason, count in stats['spans_dropped'].items():
+            spans_dropped.add_metric([reason, service], count)
+        
+        spans_exported = CounterMetricFamily(
+            'trace_sampler_spans_exported', 'Spans forwarded to the exporter by the tail sampler', labels=['service']
+        )
+        spans_exported.add_metric([service], stats['spans_exported'])
+        
+        buffered_spans = GaugeMetricFamily(
+            'trace_sampler_buffered_spans', 'Spans buffered awaiting a sampling decision', labels=['service']
+        )
+        buffered_spans.add_metric([service], stats['buffered_spans'])
+        
+        buffered_bytes = GaugeMetricFamily(
+            'trace_sampler_buffer_bytes', 'Estimated memory held by buffered spans', labels=['service']
+        )
+        buffered_bytes.add_metric([service], stats['buffered_bytes_estimate'])
+        
+        yield from (traces, spans_dropped, spans_exported, buffered_spans, buffered_bytes)
+
+# Batched recording
+# For bulk workers calling record_* in tight loops: increments go to a plain
+# dict owned by the calling thread and are applied to the Prometheus counters
+# in one pass, every METRICS_BATCH_FLUSH_SECONDS, on every scrape and on flush().
+# Each thread's dict has its own lock, taken by the flush only to swap in an
+# empty dict, so increments don't contend with each other and keys that are no
+# longer incremented don't accumulate.
+METRICS_BATCH_FLUSH_INTERVAL = float(os.getenv("METRICS_BATCH_FLUSH_SECONDS", "1"))
+
+class _ThreadCounts:
+    __slots__ = ("counts", "lock", "thread")
+    
+    def __init__(self):
+        self.counts: Dict[tuple, int] = {}
+        self.lock = threading.Lock()
+        self.thread = threading.current_thread()
+    
+    def take(self) -> Dict[tuple, int]:
+        """Increments since the last take."""
+        with self.lock:
+            counts, self.counts = self.counts, {}
+        return counts
+
+def _flush_batches(recorder_ref: "weakref.ref[BatchedRecorder]", interval: float):
+    """Flush loop holding the recorder weakly, so it ends once the recorder is gone."""
+    while True:
+        time.sleep(interval)
+        recorder = recorder_ref()
+        if recorder is None:
+            return
+        try:
+            recorder.flush()
+        except Exception as e:
+            logger.warning(f"Could not flush batched metrics: {e}")
+        del recorder
+
+class BatchedRecorder:
+    """
+    Batched counterpart of PyAirtableMonitoring's database, cache and Airtable recorders.
+    
+    Takes the same arguments and produces the same series, including the
+    cardinality guard on Airtable labels, but an increment only updates a
+    per-thread dict; the Prometheus counters are updated when the batch is
+    flushed. Between flushes, scrapes served by other workers miss the
+    pending increments.
+    """
+    
+    def __init__(self, monitoring: "PyAirtableMonitoring", flush_interval: float = METRICS_BATCH_FLUSH_INTERVAL):
+        self.monitoring = monitoring
+        self.flush_interval = flush_interval
+        self._children: Dict[tuple, Any] = {}
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            # Increments pending at fork time belong to the parent. Fork hooks
+            # can't be unregistered, so the hook must not keep the recorder alive.
+            def reset_in_child(reset=weakref.WeakMethod(self._reset)):
+                method = reset()
+                if method is not None:
+                    method()
+            os.register_at_fork(after_in_child=reset_in_child)
+    
+    def _reset(self):
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._buffers: List[_ThreadCounts] = []
+        self._buffers_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+    
+    def _register_thread(self) -> _ThreadCounts:
+        buffer = self._local.counts = _ThreadCounts()
+        with self._buffers_lock:
+            self._buffers.append(buffer)
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=_flush_batches, args=(weakref.ref(self), self.flush_interval),
+                    name="metrics-batch-flush", daemon=True
+                )
+                self._flusher.start()
+        return buffer
+    
+    def _add(self, key: tuple):
+        try:
+            buffer = self._local.counts
+        except AttributeError:
+            buffer = self._register_thread()
+        with buffer.lock:
+            counts = buffer.counts
+            counts[key] = counts.get(key, 0) + 1
+    
+    def record_database_operation(self, operation: str, table: str, status: str):
+        if self.monitoring.enable_prometheus:
+            self._add(("database", operation, table, status))
+    
+    def record_cache_operation(self, operation: str, status: str):
+        if self.monitoring.enable_prometheus:
+            self._add(("cache", operation, status))
+    
+    def record_airtable_request(self, base_id: str, table_name: str, operation: str, status: str):
+        if self.monitoring.enable_prometheus:
+            self._add(("airtable", base_id, table_name, operation, status))
+    
+    def flush(self):
+        """Apply the increments recorded by all threads since the last flush."""
+        with self._flush_lock:
+            with self._buffers_lock:
+                buffers = list(self._buffers)
+            
+            pending: Dict[tuple, int] = {}
+            for buffer in buffers:
+                # A thread seen dead before the take has made its last increment
+                alive = buffer.thread.is_alive()
+                for key, count in buffer.take().items():
+                    pending[key] = pending.get(key, 0) + count
+                if not alive:
+                    with self._buffers_lock:
+                        self._buffers.remove(buffer)
+            
+            for key, count in pending.items():
+                self._counter(key, count).inc(count)
+    
+    def _counter(self, key: tuple, count: int):
+        """Labelled counter child for a batch key. Call with the flush lock held."""
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        
+        monitoring = self.monitoring
+        service = monitoring.service_name
+        kind, *labels = key
+        if kind == "database":
+            operation, table, status = labels
+            child = monitoring.database_operations_total.labels(
+                operation=operation, table=table, status=status, service=service
+            )
+        elif kind == "cache":
+            operation, status = labels
+            child = monitoring.cache_operations_total.labels(operation=operation, status=status, service=service)
+        else:
+            base_id, table_name, operation, status = labels
+            if not monitoring._admit_labels('airtable_requests_total', tuple(labels), count):
+                # Not cached, so every overflowing batch is counted
+                return monitoring.airtable_requests_total.labels(
+                    base_id=OVERFLOW_LABEL_VALUE, table_name=OVERFLOW_LABEL_VALUE,
+                    operation=operation, status=status, service=service
+                )
+            child = monitoring.airtable_requests_total.labels(
+                base_id=base_id, table_name=table_name, operation=operation, status=status, service=service
+            )
+        self._children[key] = child
+        return child
+
+# Runtime metrics
+# Opt-in view of the Python runtime: event-loop lag from a ticker that sleeps
+# LOOP_LAG_INTERVAL and measures how late it wakes up, GC pauses per
+# generation, thread pool queue depth and open file descriptors. GC callbacks
+# only queue the pause; it is observed later so the callback never takes a
+# metric lock that the interrupted code may hold.
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL_SECONDS", "0.05"))
+RUNTIME_SAMPLE_INTERVAL = float(os.getenv("METRICS_RUNTIME_SAMPLE_SECONDS", "1"))
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+GC_PAUSE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+_GC_PAUSE_QUEUE_SIZE = 10000
+
+def _open_fd_count() -> Optional[int]:
+    """Number of open file descriptors of this process, or None where it can't be listed."""
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+# Sampling profiler
+# A wall-clock statistical profiler: a daemon thread reads every thread's
+# current stack PROFILER_SAMPLE_HZ times per second and counts identical
+# stacks, in the collapsed format flamegraph.pl and speedscope read. It runs
+# only while a profile is being taken, unless started for continuous use.
+PROFILER_SAMPLE_HZ = float(os.getenv("PROFILER_SAMPLE_HZ", "100"))
+PROFILER_MAX_STACKS = int(os.getenv("PROFILER_MAX_STACKS", "10000"))
+PROFILER_MAX_DEPTH = int(os.getenv("PROFILER_MAX_DEPTH", "128"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+PROFILER_OVERFLOW_STACK = "(other stacks)"
+
+class SamplingProfiler:
+    """
+    Samples all threads' stacks with sys._current_frames() and aggregates collapsed stacks.
+    
+    Each stack is recorded as `thread;outer.frame;...;inner.frame`, frames being
+    `module:qualified_name`. At most `max_stacks` distinct stacks are kept;
+    samples of further stacks are counted under PROFILER_OVERFLOW_STACK.
+    """
+    
+    def __init__(self, hz: float = PROFILER_SAMPLE_HZ, max_stacks: int = PROFILER_MAX_STACKS,
+                 max_depth: int = PROFILER_MAX_DEPTH):
+        if hz <= 0:
+            raise ValueError("hz must be positive")
+        self.hz = hz
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self._stacks: Dict[str, int] = {}
+        self._frame_labels: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event: Optional[threading.Event] = None
+        self._continuous = False
+        self._sessions = 0
+        self.samples = 0
+        self.overflowed_samples = 0
+        self.sampling_seconds = 0.0
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Sample continuously until stop(); profile() then reads from the running table."""
+        with self._lock:
+            self._continuous = True
+            self._ensure_thread()
+    
+    def stop(self):
+        with self._lock:
+            self._continuous = False
+            if self._sessions == 0:
+                self._stop_thread()
+    
+    def stacks(self) -> Dict[str, int]:
+        """Sample counts per collapsed stack since the table was last reset."""
+        with self._lock:
+            return dict(self._stacks)
+    
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._frame_labels.clear()
+    
+    async def profile(self, seconds: float) -> Dict[str, int]:
+        """Sample counts per collapsed stack over the next `seconds` seconds."""
+        before = self._begin_session()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            after = self._end_session()
+        return {stack: count - before.get(stack, 0) for stack, count in after.items() if count > before.get(stack, 0)}
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hz": self.hz,
+                "running": self.running,
+                "continuous": self._continuous,
+                "stacks": len(self._stacks),
+                "max_stacks": self.max_stacks,
+                "samples": self.samples,
+                "overflowed_samples": self.overflowed_samples,
+                "sampling_seconds": self.sampling_seconds,
+            }
+    
+    def _begin_session(self) -> Dict[str, int]:
+        with self._lock:
+            if not self.running and not self._continuous:
+                self._stacks.clear()
+            self._sessions += 1
+            self._ensure_thread()
+            return dict(self._stacks)
+    
+    def _end_session(self) -> Dict[str, int]:
+        with self._lock:
+            self._sessions -= 1
+            if self._sessions == 0 and not self._continuous:
+                self._stop_thread()
+            return dict(self._stacks)
+    
+    def _ensure_thread(self):
+        # A forked worker inherits the attributes but not the thread
+        if not self.running:
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stop_event,), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+    
+    def _stop_thread(self):
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._thread = None
+        self._stop_event = None
+    
+    def _run(self, stop_event: threading.Event):
+        interval = 1 / self.hz
+        own_ident = threading.get_ident()
+        next_sample = time.perf_counter()
+        while not stop_event.is_set():
+            start = time.perf_counter()
+            self._sample(own_ident)
+            now = time.perf_counter()
+            self.sampling_seconds += now - start
+            # Skip samples rather than catching up after a stall
+            next_sample = max(next_sample + interval, now)
+            stop_event.wait(next_sample - now)
+    
+    def _sample(self, own_ident: int):
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            frames = []
+            while frame is not None and len(frames) < self.max_depth:
+                frames.append(self._frame_label(frame))
+                frame = frame.f_back
+            if frame is not None:
+                frames.append("(truncated)")
+            frames.append(thread_names.get(ident, f"thread-{ident}"))
+            stacks.append(";".join(reversed(frames)))
+        
+        with self._lock:
+            for stack in stacks:
+                if stack in self._stacks:
+                    self._stacks[stack] += 1
+                elif len(self._stacks) < self.max_stacks:
+                    self._stacks[stack] = 1
+                else:
+                    self._stacks[PROFILER_OVERFLOW_STACK] = self._stacks.get(PROFILER_OVERFLOW_STACK, 0) + 1
+                    self.overflowed_samples += 1
+            self.samples += 1
+    
+    def _frame_label(self, frame) -> str:
+        code = frame.f_code
+        label = self._frame_labels.get(code)
+        if label is None:
+            if len(self._frame_labels) >= self.max_stacks:
+                self._frame_labels.clear()
+            module = frame.f_globals.get("__name__", "?")
+            label = self._frame_labels[code] = f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        return label
+
+def collapsed_stacks(stacks: Dict[str, int]) -> str:
+    """Render stack counts as collapsed-stack lines, most frequent first."""
+    lines = [f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda item: item[1], reverse=True)]
+    return "\n".join(lines) + "\n" if lines else ""
+
+# Multiprocess mode
+# With PROMETHEUS_MULTIPROC_DIR set, every gunicorn/uvicorn worker writes its
+# metrics to mmap files in that directory and /metrics aggregates all workers,
+# whichever one serves the scrape. The directory must be emptied before the
+# workers start (prepare_multiprocess_dir); dead workers' live gauges are
+# dropped by mark_worker_dead or, failing that, on the next scrape.
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", os.getenv("prometheus_multiproc_dir"))
+SKETCH_FLUSH_INTERVAL = float(os.getenv("METRICS_SKETCH_FLUSH_INTERVAL", "5"))
+_LIVE_GAUGE_FILE = re.compile(r"^gauge_live\w+_(\d+)\.db$")
+_SKETCH_FILE = re.compile(r"^sketches_(\d+)\.json$")
+
+def prepare_multiprocess_dir(path: Optional[str] = None):
+    """Remove metric files left by a previous run; call in the master before forking workers."""
+    path = path or MULTIPROCESS_DIR
+    if not path:
+        return
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith((".db", ".json", ".tmp", ".claimed")):
+            os.remove(os.path.join(path, name))
+
+def mark_worker_dead(pid: int, path: Optional[str] = None):
+    """Drop a dead worker's live gauges (e.g. from gunicorn's child_exit hook); its counters are kept."""
+    path = path or MULTIPROCESS_DIR
+    if PROMETHEUS_AVAILABLE and path:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid, path)
+
+# Collectors registered by other modules (e.g. the query profiler). They read
+# in-process state, so the multiprocess /metrics registry adds them as well and
+# their series describe the worker that served the scrape.
+_process_collectors: List[Any] = []
+
+def register_process_collector(collector: Any):
+    """Register a custom collector with the default registry and the multiprocess /metrics registry."""
+    if not PROMETHEUS_AVAILABLE:
+        return
+    from prometheus_client import REGISTRY
+    REGISTRY.register(collector)
+    _process_collectors.append(collector)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
 class PyAirtableMonitoring:
     """
     Comprehensive monitoring solution for PyAirtable services.
@@ -52,17 +796,88 @@ class PyAirtableMonitoring:
         enable_otel: bool = True,
         prometheus_port: int = 8000,
         otel_endpoint: str = "http://otel-collector:4317",
+        request_timeout: Optional[float] = None,
+        max_label_sets: Optional[int] = None,
+        enable_latency_sketches: Optional[bool] = None,
+        health_check_timeout: Optional[float] = None,
+        health_check_ttl: Optional[float] = None,
+        trace_sample_rate: Optional[float] = None,
+        enable_runtime_metrics: Optional[bool] = None,
+        profiler_hz: Optional[float] = None,
+        enable_continuous_profiling: Optional[bool] = None,
     ):
         self.service_name = service_name
         self.service_version = service_version
         self.enable_prometheus = enable_prometheus and PROMETHEUS_AVAILABLE
         self.enable_otel = enable_otel and OTEL_AVAILABLE
+        self.multiprocess_dir = MULTIPROCESS_DIR if self.enable_prometheus else None
+        
+        # Default budget for each HTTP request; clients may ask for less via X-Request-Timeout
+        if request_timeout is None:
+            request_timeout = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+        self.request_timeout = request_timeout
         
         # Health check state
         self.health_checks: Dict[str, Callable] = {}
+        self.health_check_timeouts: Dict[str, float] = {}
+        self.circuit_breakers: Dict[str, Any] = {}
+        
+        # Health checks run concurrently off the request path; /health serves cached results
+        if health_check_timeout is None:
+            health_check_timeout = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+        if health_check_ttl is None:
+            health_check_ttl = float(os.getenv("HEALTH_CHECK_CACHE_TTL_SECONDS", "5"))
+        self.health_check_timeout = health_check_timeout
+        self.health_check_ttl = health_check_ttl
+        self._health_results: Dict[str, Dict[str, Any]] = {}
+        self._health_refreshed_at: Optional[float] = None
+        self._health_refresh: Optional[asyncio.Task] = None
+        self._health_loop: Optional[asyncio.Task] = None
+        self._health_threads: Dict[str, asyncio.Future] = {}
         self.is_ready = False
         self.startup_time = time.time()
         
+        # Labelled HTTP metric children, keyed by (method, endpoint, status_code)
+        self._http_metric_children: Dict[tuple, tuple] = {}
+        if max_label_sets is None:
+            max_label_sets = int(os.getenv("METRICS_MAX_LABEL_SETS", "2000"))
+        self.cardinality_guard = CardinalityGuard(max_label_sets)
+        
+        # Per-route latency sketches, keyed by (method, endpoint)
+        if enable_latency_sketches is None:
+            enable_latency_sketches = os.getenv("METRICS_LATENCY_SKETCHES", "false").lower() == "true"
+        self.enable_latency_sketches = enable_latency_sketches
+        self.latency_sketches: Dict[tuple, RouteLatency] = {}
+        self._sketch_flusher_pid: Optional[int] = None
+        
+        # Below 1, traces are tail-sampled: errors and slow traces are always kept
+        if trace_sample_rate is None:
+            trace_sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "1"))
+        self.trace_sample_rate = trace_sample_rate
+        self.trace_sampler: Optional["TailSamplingSpanProcessor"] = None
+        
+        # Event loop lag, GC pauses, thread pools and file descriptors (start_runtime_metrics)
+        if enable_runtime_metrics is None:
+            enable_runtime_metrics = os.getenv("METRICS_RUNTIME", "false").lower() == "true"
+        self.enable_runtime_metrics = enable_runtime_metrics and self.enable_prometheus
+        self.thread_pools: Dict[str, Any] = {}
+        self._runtime_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lag_task: Optional[asyncio.Task] = None
+        self._gc_pauses: deque = deque(maxlen=_GC_PAUSE_QUEUE_SIZE)
+        self._gc_started: Optional[float] = None
+        
+        # Batched record_* calls for hot loops (monitoring.batched.record_database_operation(...))
+        self.batched = BatchedRecorder(self)
+        
+        # Sampling profiler behind /debug/profile (create_profiler_endpoints)
+        if profiler_hz is None:
+            profiler_hz = PROFILER_SAMPLE_HZ
+        if enable_continuous_profiling is None:
+            enable_continuous_profiling = os.getenv("PROFILER_CONTINUOUS", "false").lower() == "true"
+        self.profiler = SamplingProfiler(profiler_hz)
+        if enable_continuous_profiling:
+            self.profiler.start()
+        
         # Initialize monitoring systems
         if self.enable_prometheus:
             self._setup_prometheus()
@@ -72,13 +887,23 @@ class PyAirtableMonitoring:
     
     def _setup_prometheus(self):
         """Setup Prometheus metrics."""
+        from prometheus_client import Counter, Gauge, Histogram, Info, REGISTRY
+        
         # Service info
-        self.service_info = Info('service_info', 'Information about the service')
-        self.service_info.info({
+        service_info = {
             'version': self.service_version,
             'name': self.service_name,
             'python_version': os.sys.version
-        })
+        }
+        if self.multiprocess_dir:
+            # Info has no multiprocess support; export the same series as a gauge
+            self.service_info = Gauge(
+                'service_info_info', 'Information about the service', list(service_info), multiprocess_mode='max'
+            )
+            self.service_info.labels(**service_info).set(1)
+        else:
+            self.service_info = Info('service_info', 'Information about the service')
+            self.service_info.info(service_info)
         
         # HTTP Metrics
         self.http_requests_total = Counter(
@@ -109,7 +934,8 @@ class PyAirtableMonitoring:
         self.active_connections = Gauge(
             'active_connections_total',
             'Number of active connections',
-            ['service', 'type']
+            ['service', 'type'],
+            multiprocess_mode='livesum'
         )
         
         self.database_operations_total = Counter(
@@ -159,19 +985,87 @@ class PyAirtableMonitoring:
         self.health_check_status = Gauge(
             'health_check_status',
             'Health check status (1=healthy, 0=unhealthy)',
-            ['check_name', 'service']
+            ['check_name', 'service'],
+            multiprocess_mode='livemin'
         )
         
         self.service_uptime_seconds = Gauge(
             'service_uptime_seconds',
             'Service uptime in seconds',
-            ['service']
+            ['service'],
+            multiprocess_mode='livemax'
+        )
+        
+        self.circuit_breaker_state = Gauge(
+            'circuit_breaker_state',
+            'Circuit breaker state (0=closed, 1=half-open, 2=open)',
+            ['breaker', 'service'],
+            multiprocess_mode='livemax'
+        )
+        
+        self.metric_label_overflow_total = Counter(
+            'metric_label_overflow_total',
+            'Observations folded into the overflow label set by the cardinality guard',
+            ['metric', 'service']
         )
         
+        if self.enable_latency_sketches:
+            REGISTRY.register(LatencySketchCollector(self))
+        
+        if self.enable_runtime_metrics:
+            self.event_loop_lag_seconds = Histogram(
+                'event_loop_lag_seconds',
+                'Delay of the asyncio event loop in running a scheduled callback',
+                ['service'],
+                buckets=LOOP_LAG_BUCKETS
+            )
+            
+            self.python_gc_pause_seconds = Histogram(
+                'python_gc_pause_seconds',
+                'Duration of garbage collector runs',
+                ['generation', 'service'],
+                buckets=GC_PAUSE_BUCKETS
+            )
+            
+            self.thread_pool_queue_depth = Gauge(
+                'thread_pool_queue_depth',
+                'Work items waiting for a thread pool worker',
+                ['pool', 'service'],
+                multiprocess_mode='livesum'
+            )
+            
+            self.thread_pool_threads = Gauge(
+                'thread_pool_threads',
+                'Worker threads started by a thread pool',
+                ['pool', 'service'],
+                multiprocess_mode='livesum'
+            )
+            
+            self.open_file_descriptors = Gauge(
+                'open_file_descriptors',
+                'Open file descriptors',
+                ['service'],
+                multiprocess_mode='livesum'
+            )
+        
         logger.info(f"Prometheus metrics initialized for {self.service_name}")
     
     def _setup_opentelemetry(self, otel_endpoint: str):
         """Setup OpenTelemetry tracing and metrics."""
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.instrumentation.requests import RequestsInstrumentor
+        from opentelemetry.instrumentation.urllib3 import URLLib3Instrumentor
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+        from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.resources import Resource, SERVICE_NAME, SERVICE_VERSION
+        try:
+            from monitoring.trace_sampling import TailSamplingSpanProcessor
+        except ImportError:
+            from trace_sampling import TailSamplingSpanProcessor
+        
         resource = Resource.create({
             SERVICE_NAME: self.service_name,
             SERVICE_VERSION: self.service_version,
@@ -185,6 +1079,11 @@ class PyAirtableMonitoring:
         
         otlp_exporter = OTLPSpanExporter(endpoint=otel_endpoint)
         span_processor = BatchSpanProcessor(otlp_exporter)
+        if self.trace_sample_rate < 1:
+            self.trace_sampler = span_processor = TailSamplingSpanProcessor(span_processor, self.trace_sample_rate)
+            if self.enable_prometheus:
+                from prometheus_client import REGISTRY
+                REGISTRY.register(TailSamplingCollector(self))
         tracer_provider.add_span_processor(span_processor)
         
         self.tracer = trace.get_tracer(self.service_name, self.service_version)
@@ -197,9 +1096,33 @@ class PyAirtableMonitoring:
         
         logger.info(f"OpenTelemetry initialized for {self.service_name}")
     
-    def add_health_check(self, name: str, check_func: Callable[[], bool]):
-        """Add a health check function."""
+    def add_health_check(self, name: str, check_func: Callable[[], Union[bool, Awaitable[bool]]],
+                         timeout: Optional[float] = None):
+        """Add a health check function (sync or async), optionally with its own timeout."""
         self.health_checks[name] = check_func
+        self.health_check_timeouts[name] = timeout if timeout is not None else self.health_check_timeout
+    
+    def add_circuit_breaker(self, name: str, breaker: Any):
+        """Export a circuit breaker's state; ``breaker`` needs a ``state`` and ``stats()``."""
+        self.circuit_breakers[name] = breaker
+    
+    def add_thread_pool(self, name: str, executor: Any):
+        """Export a ThreadPoolExecutor's queue depth and thread count with the runtime metrics."""
+        self.thread_pools[name] = executor
+    
+    def get_request_timeout(self, requested: Optional[str] = None) -> float:
+        """Budget for a request, honouring a smaller client-requested timeout.
+        
+        Timeouts that are not a positive finite number are ignored.
+        """
+        if requested:
+            try:
+                timeout = float(requested)
+            except ValueError:
+                return self.request_timeout
+            if math.isfinite(timeout) and timeout > 0:
+                return min(timeout, self.request_timeout)
+        return self.request_timeout
     
     def mark_ready(self):
         """Mark the service as ready to serve traffic."""
@@ -207,7 +1130,199 @@ class PyAirtableMonitoring:
         logger.info(f"Service {self.service_name} marked as ready")
     
     def get_health_status(self) -> Dict[str, Any]:
-        """Get comprehensive health status."""
+        """Get comprehensive health status.
+        
+        Runs synchronous checks inline for callers without an event loop;
+        async checks report their last cached result. Async code should use
+        get_health_status_async instead.
+        """
+        for check_name, check_func in self.health_checks.items():
+            if asyncio.iscoroutinefunction(check_func):
+                continue
+            start = time.perf_counter()
+            try:
+                is_healthy = check_func()
+                if inspect.isawaitable(is_healthy):
+                    # An async check behind a plain callable; leave it to the async refresh
+                    if inspect.iscoroutine(is_healthy):
+                        is_healthy.close()
+                    continue
+                result = {"status": "healthy" if is_healthy else "unhealthy"}
+            except Exception as e:
+                result = {"status": "error", "error": str(e)}
+            self._store_health_result(check_name, result, start)
+        return self._build_health_status()
+    
+    async def get_health_status_async(self) -> Dict[str, Any]:
+        """Health status from cached check results.
+        
+        The first call waits for a run of all checks; afterwards results older
+        than the TTL trigger a refresh in the background while the cached
+        status is returned straight away.
+        """
+        if self._health_refreshed_at is None:
+            await asyncio.shield(self._refresh_in_background())
+        elif time.monotonic() - self._health_refreshed_at > self.health_check_ttl:
+            self._refresh_in_background()
+        return self._build_health_status()
+    
+    async def refresh_health_checks(self):
+        """Run every health check concurrently, each bounded by its timeout, and cache the results."""
+        await asyncio.gather(*[
+            self._run_health_check(name, check_func) for name, check_func in list(self.health_checks.items())
+        ])
+        self._health_refreshed_at = time.monotonic()
+    
+    def _refresh_in_background(self) -> asyncio.Task:
+        """Start a refresh unless one is already running; concurrent callers share it."""
+        if self._health_refresh is None or self._health_refresh.done():
+            self._health_refresh = asyncio.ensure_future(self.refresh_health_checks())
+        return self._health_refresh
+    
+    def start_health_checks(self, interval: Optional[float] = None):
+        """Refresh health checks every `interval` seconds (default: the cache TTL) until stopped."""
+        interval = interval or self.health_check_ttl
+        
+        async def refresh_loop():
+            while True:
+                try:
+                    await self.refresh_health_checks()
+                except Exception as e:
+                    logger.warning(f"Health check refresh failed: {e}")
+                await asyncio.sleep(interval)
+        
+        if self._health_loop is None or self._health_loop.done():
+            self._health_loop = asyncio.ensure_future(refresh_loop())
+    
+    async def stop_health_checks(self):
+        """Stop the background refresh started by start_health_checks."""
+        if self._health_loop is not None:
+            self._health_loop.cancel()
+            try:
+                await self._health_loop
+            except asyncio.CancelledError:
+                pass
+            self._health_loop = None
+    
+    def start_runtime_metrics(self, interval: float = LOOP_LAG_INTERVAL):
+        """Start recording runtime metrics, if enabled.
+        
+        GC pauses, thread pools and file descriptors are recorded from any
+        context; the event loop lag ticker needs to be started from the loop.
+        """
+        if not self.enable_runtime_metrics:
+            return
+        if self._gc_callback not in gc.callbacks:
+            gc.callbacks.append(self._gc_callback)
+        
+        try:
+            self._runtime_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop_lag_task is None or self._loop_lag_task.done():
+            self._loop_lag_task = asyncio.ensure_future(self._loop_lag_ticker(interval))
+    
+    async def stop_runtime_metrics(self):
+        """Stop the loop lag ticker and GC callback started by start_runtime_metrics."""
+        if self._gc_callback in gc.callbacks:
+            gc.callbacks.remove(self._gc_callback)
+        if self._loop_lag_task is not None:
+            self._loop_lag_task.cancel()
+            try:
+                await self._loop_lag_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_lag_task = None
+    
+    async def _loop_lag_ticker(self, interval: float):
+        lag_histogram = self.event_loop_lag_seconds.labels(service=self.service_name)
+        next_sample = time.perf_counter()
+        while True:
+            scheduled = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            lag_histogram.observe(max(0.0, now - scheduled))
+            if now >= next_sample:
+                next_sample = now + RUNTIME_SAMPLE_INTERVAL
+                try:
+                    self._sample_runtime()
+                except Exception as e:
+                    logger.warning(f"Runtime metrics sample failed: {e}")
+    
+    def _gc_callback(self, phase: str, info: Dict[str, Any]):
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            self._gc_pauses.append((info["generation"], time.perf_counter() - self._gc_started))
+            self._gc_started = None
+    
+    def _sample_runtime(self):
+        """Observe queued GC pauses and refresh the thread pool and file descriptor gauges."""
+        while True:
+            try:
+                generation, pause = self._gc_pauses.popleft()
+            except IndexError:
+                break
+            self.python_gc_pause_seconds.labels(generation=str(generation), service=self.service_name).observe(pause)
+        
+        thread_pools = dict(self.thread_pools)
+        default_executor = getattr(self._runtime_loop, "_default_executor", None)
+        if default_executor is not None:
+            thread_pools.setdefault("default", default_executor)
+        for name, executor in thread_pools.items():
+            work_queue = getattr(executor, "_work_queue", None)
+            self.thread_pool_queue_depth.labels(pool=name, service=self.service_name).set(
+                work_queue.qsize() if work_queue is not None else 0
+            )
+            self.thread_pool_threads.labels(pool=name, service=self.service_name).set(
+                len(getattr(executor, "_threads", ()))
+            )
+        
+        open_fds = _open_fd_count()
+        if open_fds is not None:
+            self.open_file_descriptors.labels(service=self.service_name).set(open_fds)
+    
+    async def _run_health_check(self, check_name: str, check_func: Callable):
+        timeout = self.health_check_timeouts.get(check_name, self.health_check_timeout)
+        start = time.perf_counter()
+        try:
+            is_healthy = await asyncio.wait_for(self._call_health_check(check_name, check_func), timeout)
+            result = {"status": "healthy" if is_healthy else "unhealthy"}
+        except asyncio.TimeoutError:
+            result = {"status": "error", "error": f"Timed out after {timeout}s"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        self._store_health_result(check_name, result, start)
+    
+    async def _call_health_check(self, check_name: str, check_func: Callable) -> Any:
+        """Coroutine functions run on the loop, anything else in a thread; awaitable results are awaited."""
+        if asyncio.iscoroutinefunction(check_func):
+            is_healthy = check_func()
+        else:
+            # A timed-out thread cannot be cancelled; don't start another until it returns
+            thread = self._health_threads.get(check_name)
+            if thread is None or thread.done():
+                thread = self._health_threads[check_name] = asyncio.ensure_future(
+                    asyncio.to_thread(check_func)
+                )
+            is_healthy = await asyncio.shield(thread)
+        if inspect.isawaitable(is_healthy):
+            is_healthy = await is_healthy
+        return is_healthy
+    
+    def _store_health_result(self, check_name: str, result: Dict[str, Any], start: float):
+        result["timestamp"] = time.time()
+        result["duration_ms"] = (time.perf_counter() - start) * 1000
+        self._health_results[check_name] = result
+        
+        # Update Prometheus metric
+        if self.enable_prometheus:
+            self.health_check_status.labels(
+                check_name=check_name,
+                service=self.service_name
+            ).set(1 if result["status"] == "healthy" else 0)
+    
+    def _build_health_status(self) -> Dict[str, Any]:
         status = {
             "service": self.service_name,
             "version": self.service_version,
@@ -219,41 +1334,22 @@ class PyAirtableMonitoring:
         
         overall_healthy = True
         
-        for check_name, check_func in self.health_checks.items():
-            try:
-                is_healthy = check_func()
-                status["checks"][check_name] = {
-                    "status": "healthy" if is_healthy else "unhealthy",
-                    "timestamp": time.time()
-                }
-                
-                if not is_healthy:
-                    overall_healthy = False
-                
-                # Update Prometheus metric
-                if self.enable_prometheus:
-                    self.health_check_status.labels(
-                        check_name=check_name,
-                        service=self.service_name
-                    ).set(1 if is_healthy else 0)
-                    
-            except Exception as e:
-                status["checks"][check_name] = {
-                    "status": "error",
-                    "error": str(e),
-                    "timestamp": time.time()
-                }
+        for check_name in self.health_checks:
+            # Async checks that have not run yet (sync callers only) don't fail the service
+            result = self._health_results.get(check_name, {"status": "pending"})
+            status["checks"][check_name] = dict(result)
+            if result["status"] in ("unhealthy", "error"):
                 overall_healthy = False
-                
-                if self.enable_prometheus:
-                    self.health_check_status.labels(
-                        check_name=check_name,
-                        service=self.service_name
-                    ).set(0)
         
         if not self.is_ready or not overall_healthy:
             status["status"] = "unhealthy"
         
+        # Open breakers mean degraded service, not a dead instance, so they don't fail the check
+        if self.circuit_breakers:
+            status["circuit_breakers"] = {
+                name: breaker.stats() for name, breaker in self.circuit_breakers.items()
+            }
+        
         # Update uptime metric
         if self.enable_prometheus:
             self.service_uptime_seconds.labels(service=self.service_name).set(
@@ -283,24 +1379,12 @@ class PyAirtableMonitoring:
                 status_code = getattr(result, 'status_code', 200)
                 
                 # Record metrics
-                if self.enable_prometheus:
-                    self.http_requests_total.labels(
-                        method=method,
-                        endpoint=endpoint,
-                        status_code=status_code,
-                        service=self.service_name
-                    ).inc()
-                    
-                    self.http_request_duration_seconds.labels(
-                        method=method,
-                        endpoint=endpoint,
-                        service=self.service_name
-                    ).observe(time.time() - start_time)
+                self.record_http_request(method, endpoint, status_code, time.time() - start_time)
                 
                 # Update span
                 if span:
                     span.set_attribute("http.status_code", status_code)
-                    span.set_status(trace.Status(trace.StatusCode.OK))
+                    _set_span_ok(span)
                 
                 return result
                 
@@ -308,23 +1392,14 @@ class PyAirtableMonitoring:
                 status_code = 500
                 
                 # Record error metrics
-                if self.enable_prometheus:
-                    self.http_requests_total.labels(
-                        method=method,
-                        endpoint=endpoint,
-                        status_code=status_code,
-                        service=self.service_name
-                    ).inc()
+                self.record_http_request(method, endpoint, status_code, time.time() - start_time)
                 
                 # Update span with error
                 if span:
                     span.set_attribute("http.status_code", status_code)
                     span.set_attribute("error", True)
                     span.set_attribute("error.message", str(e))
-                    span.set_status(trace.Status(
-                        trace.StatusCode.ERROR,
-                        description=str(e)
-                    ))
+                    _set_span_error(span, e)
                 
                 raise
             
@@ -334,6 +1409,136 @@ class PyAirtableMonitoring:
         
         return wrapper
     
+    def record_http_request(self, method: str, endpoint: str, status_code: int, duration: float):
+        """Record HTTP request metrics, resolving label children once per label set."""
+        if not self.enable_prometheus:
+            return
+        key = (method, endpoint, status_code)
+        children = self._http_metric_children.get(key)
+        if children is None:
+            if method not in HTTP_METHODS:
+                method = "OTHER"
+            if not self._admit_labels('http_requests_total', (method, endpoint, status_code)):
+                endpoint = OVERFLOW_LABEL_VALUE
+            key = (method, endpoint, status_code)
+            children = self._http_metric_children.get(key)
+        if children is None:
+            children = (
+                self.http_requests_total.labels(
+                    method=method,
+                    endpoint=endpoint,
+                    status_code=status_code,
+                    service=self.service_name
+                ),
+                self.http_request_duration_seconds.labels(
+                    method=method,
+                    endpoint=endpoint,
+                    service=self.service_name
+                ),
+                self._route_latency(method, endpoint)
+            )
+            self._http_metric_children[key] = children
+        children[0].inc()
+        children[1].observe(duration)
+        if children[2] is not None:
+            children[2].observe(duration)
+    
+    def _route_latency(self, method: str, endpoint: str) -> Optional[RouteLatency]:
+        if not self.enable_latency_sketches:
+            return None
+        route = self.latency_sketches.get((method, endpoint))
+        if route is None:
+            route = self.latency_sketches.setdefault((method, endpoint), RouteLatency())
+            if self.multiprocess_dir and self._sketch_flusher_pid != os.getpid():
+                self._sketch_flusher_pid = os.getpid()
+                threading.Thread(target=self._flush_sketches_loop, name="metrics-sketch-flush", daemon=True).start()
+        return route
+    
+    def route_latency_snapshots(self) -> Dict[tuple, list]:
+        """[count, sum, bucket_counts, recent sketch] per route, across all workers in multiprocess mode."""
+        snapshots = {}
+        for key, route in list(self.latency_sketches.items()):
+            snapshots[key] = [*route.snapshot(), route.sketch()]
+        if not self.multiprocess_dir:
+            return snapshots
+        
+        for name in os.listdir(self.multiprocess_dir):
+            match = _SKETCH_FILE.match(name)
+            if not match or int(match.group(1)) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(self.multiprocess_dir, name)) as f:
+                    routes = json.load(f)
+            except (OSError, ValueError):
+                continue  # Replaced or adopted while we were reading
+            for route in routes:
+                key = (route["method"], route["endpoint"])
+                snapshot = snapshots.setdefault(key, [0, 0.0, [0] * (len(SKETCH_COMPACT_BUCKETS) + 1), LatencySketch()])
+                snapshot[0] += route["count"]
+                snapshot[1] += route["sum"]
+                snapshot[2] = [a + b for a, b in zip(snapshot[2], route["bucket_counts"])]
+                snapshot[3].merge(RouteLatency.recent_sketch(route))
+        return snapshots
+    
+    def _flush_sketches(self):
+        """Write this worker's sketches where the worker serving /metrics can merge them."""
+        path = os.path.join(self.multiprocess_dir, f"sketches_{os.getpid()}.json")
+        routes = [
+            {"method": method, "endpoint": endpoint, **route.to_dict()}
+            for (method, endpoint), route in list(self.latency_sketches.items())
+        ]
+        with open(path + ".tmp", "w") as f:
+            json.dump(routes, f)
+        os.replace(path + ".tmp", path)
+    
+    def _flush_sketches_loop(self):
+        while True:
+            time.sleep(SKETCH_FLUSH_INTERVAL)
+            try:
+                self._flush_sketches()
+            except OSError as e:
+                logger.warning(f"Could not write latency sketches: {e}")
+    
+    def _reap_dead_workers(self):
+        """Drop live gauges of workers that exited and adopt their sketch totals."""
+        for name in os.listdir(self.multiprocess_dir):
+            match = _LIVE_GAUGE_FILE.match(name) or _SKETCH_FILE.match(name)
+            if not match or _pid_alive(int(match.group(1))):
+                continue
+            if name.endswith(".db"):
+                mark_worker_dead(int(match.group(1)), self.multiprocess_dir)
+                continue
+            
+            # Renaming claims the file, so only one worker adopts a dead worker's counts
+            path = os.path.join(self.multiprocess_dir, name)
+            claimed = f"{path}.{os.getpid()}.claimed"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                with open(claimed) as f:
+                    routes = json.load(f)
+                for route in routes:
+                    self._route_latency(route["method"], route["endpoint"]).inherit(route)
+                self._flush_sketches()
+            finally:
+                os.remove(claimed)
+    
+    def get_latency_sketches(self) -> Dict[str, Dict[str, Any]]:
+        """Windowed sketches per route, serialisable for merging across instances."""
+        return {
+            f"{method} {endpoint}": route.sketch().to_dict()
+            for (method, endpoint), route in list(self.latency_sketches.items())
+        }
+    
+    def _admit_labels(self, metric: str, labels: tuple, count: int = 1) -> bool:
+        """Check a new label set against the cardinality guard, counting overflows."""
+        if self.cardinality_guard.admit(metric, labels):
+            return True
+        self.metric_label_overflow_total.labels(metric=metric, service=self.service_name).inc(count)
+        return False
+    
     def record_database_operation(self, operation: str, table: str, status: str):
         """Record database operation metrics."""
         if self.enable_prometheus:
@@ -356,6 +1561,8 @@ class PyAirtableMonitoring:
     def record_external_api_request(self, api: str, endpoint: str, status_code: int):
         """Record external API request metrics."""
         if self.enable_prometheus:
+            if not self._admit_labels('external_api_requests_total', (api, endpoint, status_code)):
+                endpoint = OVERFLOW_LABEL_VALUE
             self.external_api_requests_total.labels(
                 api=api,
                 endpoint=endpoint,
@@ -366,6 +1573,8 @@ class PyAirtableMonitoring:
     def record_airtable_request(self, base_id: str, table_name: str, operation: str, status: str):
         """Record Airtable-specific metrics."""
         if self.enable_prometheus:
+            if not self._admit_labels('airtable_requests_total', (base_id, table_name, operation, status)):
+                base_id = table_name = OVERFLOW_LABEL_VALUE
             self.airtable_requests_total.labels(
                 base_id=base_id,
                 table_name=table_name,
@@ -377,6 +1586,26 @@ class PyAirtableMonitoring:
     def get_metrics(self) -> str:
         """Get Prometheus metrics in text format."""
         if self.enable_prometheus:
+            from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+            
+            for name, breaker in self.circuit_breakers.items():
+                self.circuit_breaker_state.labels(breaker=name, service=self.service_name).set(
+                    CIRCUIT_BREAKER_STATE_VALUES.get(breaker.state, -1)
+                )
+            if self.enable_runtime_metrics:
+                self._sample_runtime()
+            self.batched.flush()
+            if self.multiprocess_dir:
+                self._reap_dead_workers()
+                registry = CollectorRegistry()
+                multiprocess.MultiProcessCollector(registry, path=self.multiprocess_dir)
+                if self.enable_latency_sketches:
+                    registry.register(LatencySketchCollector(self))
+                if self.trace_sampler is not None:
+                    registry.register(TailSamplingCollector(self))
+                for collector in _process_collectors:
+                    registry.register(collector)
+                return generate_latest(registry)
             return generate_latest()
         return ""
     
@@ -391,79 +1620,94 @@ class PyAirtableMonitoring:
 
 
 # FastAPI middleware
+def _header(scope: Dict[str, Any], name: bytes) -> Optional[str]:
+    """First value of a (lower-case) request header in an ASGI scope."""
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def _route_template(scope: Dict[str, Any], root_path: str) -> str:
+    """Template of the route that handled the request, e.g. /v2/sessions/{session_id}.
+    
+    Mounted sub-applications extend ``root_path`` while routing, so the mount
+    prefix is whatever was appended to the ``root_path`` the request came in with.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return UNMATCHED_ROUTE_LABEL
+    return scope.get("root_path", "")[len(root_path):] + template
+
 def create_fastapi_middleware(monitoring: PyAirtableMonitoring):
-    """Create FastAPI middleware for monitoring."""
-    from fastapi import Request, Response
-    from fastapi.middleware.base import BaseHTTPMiddleware
+    """Create FastAPI middleware for monitoring.
     
-    class MonitoringMiddleware(BaseHTTPMiddleware):
-        async def dispatch(self, request: Request, call_next):
-            start_time = time.time()
-            method = request.method
-            path = request.url.path
+    This is a pure ASGI middleware rather than a BaseHTTPMiddleware, so it
+    adds no extra task per request, and metrics are labelled by route template
+    with label children cached per (method, route, status).
+    """
+    class MonitoringMiddleware:
+        def __init__(self, app):
+            self.app = app
+        
+        async def __call__(self, scope, receive, send):
+            if scope["type"] != "http":
+                await self.app(scope, receive, send)
+                return
+            
+            start_time = time.perf_counter()
+            method = scope["method"]
+            root_path = scope.get("root_path", "")
+            status_code = 500
+            
+            # Propagate the request's time budget to downstream calls
+            deadline_token = set_request_deadline(
+                monitoring.get_request_timeout(_header(scope, _REQUEST_TIMEOUT_HEADER_BYTES))
+            )
             
             # Start span
             span = None
             if monitoring.enable_otel:
-                span = monitoring.tracer.start_span(f"{method} {path}")
+                from starlette.requests import Request
+                request = Request(scope)
+                span = monitoring.tracer.start_span(f"{method} {scope['path']}")
                 span.set_attribute("http.method", method)
                 span.set_attribute("http.url", str(request.url))
                 span.set_attribute("http.scheme", request.url.scheme)
                 span.set_attribute("http.host", request.url.hostname)
                 span.set_attribute("service.name", monitoring.service_name)
             
+            async def send_with_status(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                await send(message)
+            
             try:
-                response = await call_next(request)
-                status_code = response.status_code
-                
-                # Record metrics
-                if monitoring.enable_prometheus:
-                    monitoring.http_requests_total.labels(
-                        method=method,
-                        endpoint=path,
-                        status_code=status_code,
-                        service=monitoring.service_name
-                    ).inc()
-                    
-                    monitoring.http_request_duration_seconds.labels(
-                        method=method,
-                        endpoint=path,
-                        service=monitoring.service_name
-                    ).observe(time.time() - start_time)
+                await self.app(scope, receive, send_with_status)
                 
                 # Update span
                 if span:
                     span.set_attribute("http.status_code", status_code)
-                    span.set_status(trace.Status(trace.StatusCode.OK))
-                
-                return response
+                    _set_span_ok(span)
                 
             except Exception as e:
                 status_code = 500
                 
-                # Record error metrics
-                if monitoring.enable_prometheus:
-                    monitoring.http_requests_total.labels(
-                        method=method,
-                        endpoint=path,
-                        status_code=status_code,
-                        service=monitoring.service_name
-                    ).inc()
-                
                 # Update span with error
                 if span:
                     span.set_attribute("http.status_code", status_code)
                     span.set_attribute("error", True)
                     span.set_attribute("error.message", str(e))
-                    span.set_status(trace.Status(
-                        trace.StatusCode.ERROR,
-                        description=str(e)
-                    ))
+                    _set_span_error(span, e)
                 
                 raise
             
             finally:
+                reset_request_deadline(deadline_token)
+                endpoint = _route_template(scope, root_path)
+                monitoring.record_http_request(method, endpoint, status_code, time.perf_counter() - start_time)
                 if span:
+                    span.update_name(f"{method} {endpoint}")
                     span.end()
     
     return MonitoringMiddleware
@@ -479,8 +1723,8 @@ def create_health_endpoints(monitoring: PyAirtableMonitoring):
     
     @router.get("/health")
     async def health():
-        """Basic health check."""
-        status = monitoring.get_health_status()
+        """Basic health check, served from cached check results."""
+        status = await monitoring.get_health_status_async()
         if status["status"] == "healthy":
             return status
         else:
@@ -518,4 +1762,33 @@ def create_health_endpoints(monitoring: PyAirtableMonitoring):
             media_type="text/plain"
         )
     
-    return router
\ No newline at end of file
+    return router
+
+
+def create_profiler_endpoints(monitoring: PyAirtableMonitoring):
+    """Create the /debug/profile endpoint for FastAPI.
+    
+    The response exposes stack traces of the service; include this router
+    only where /debug is not reachable from outside.
+    """
+    from fastapi import APIRouter, Response
+    from fastapi.responses import PlainTextResponse
+    
+    router = APIRouter()
+    
+    @router.get("/debug/profile")
+    async def profile(seconds: float = 10):
+        """Profile all threads for `seconds` seconds and return collapsed stacks for a flamegraph."""
+        if not 0 < seconds <= PROFILER_MAX_SECONDS:
+            return Response(
+                content=json.dumps({"error": f"seconds must be between 0 and {PROFILER_MAX_SECONDS:g}"}),
+                status_code=400,
+                media_type="application/json"
+            )
+        stacks = await monitoring.profiler.profile(seconds)
+        return PlainTextResponse(
+            collapsed_stacks(stacks),
+            headers={"Content-Disposition": f'attachment; filename="{monitoring.service_name}-profile.collapsed"'}
+        )
+    
+    return router
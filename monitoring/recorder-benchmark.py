@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Metric Recorder Benchmark
+Purpose: Measure the per-call cost of record_* in tight loops, direct vs batched
+
+Calls record_database_operation, record_cache_operation and
+record_airtable_request in a loop, as a bulk worker would, on one thread and
+spread over several threads. Two variants are compared against a bare loop
+with no-op recorders, whose cost is subtracted:
+
+- direct: PyAirtableMonitoring.record_*, resolving labels and taking the
+  counter lock on every call
+- batched: monitoring.batched.record_*, accumulating per thread; the final
+  flush is included in the measured time
+
+Both variants write to their own label values and the resulting counter
+totals are checked to be equal.
+
+Usage:
+    python monitoring/recorder-benchmark.py --calls 300000 --threads 4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prometheus_client import REGISTRY
+
+from monitoring.monitoring_middleware import PyAirtableMonitoring
+
+TABLES = ["users", "sessions", "workspaces", "records"]
+STATUSES = ["success", "success", "success", "error"]
+
+
+class NullRecorder:
+    """Same calls, no recording: the cost of the loop itself."""
+    
+    def record_database_operation(self, operation, table, status):
+        pass
+    
+    def record_cache_operation(self, operation, status):
+        pass
+    
+    def record_airtable_request(self, base_id, table_name, operation, status):
+        pass
+
+
+def record_loop(recorder, variant: str, calls: int):
+    """One bulk worker: a database, cache and Airtable record per iteration."""
+    for i in range(calls // 3):
+        table = TABLES[i % len(TABLES)]
+        status = STATUSES[i % len(STATUSES)]
+        recorder.record_database_operation("select", f"{variant}_{table}", status)
+        recorder.record_cache_operation(f"{variant}_get", status)
+        recorder.record_airtable_request(f"{variant}_base", table, "list", status)
+
+
+def run_once(monitoring: PyAirtableMonitoring, variant: str, calls: int, threads: int) -> float:
+    """Seconds to make `calls` record calls spread over `threads` threads."""
+    recorder = {"bare": NullRecorder(), "batched": monitoring.batched}.get(variant, monitoring)
+    workers = [
+        threading.Thread(target=record_loop, args=(recorder, variant, calls // threads))
+        for _ in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if variant == "batched":
+        monitoring.batched.flush()
+    return time.perf_counter() - start
+
+
+def total(variant: str) -> float:
+    """Sum of the counters written by one variant."""
+    value = 0.0
+    for metric in REGISTRY.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_total") and any(
+                str(label).startswith(f"{variant}_") for label in sample.labels.values()
+            ):
+                value += sample.value
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark direct vs batched metric recording")
+    parser.add_argument("--calls", type=int, default=300000, help="Record calls per round")
+    parser.add_argument("--threads", type=int, default=4, help="Threads for the multi-threaded runs")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", default="recorder_benchmark_results.json")
+    args = parser.parse_args()
+
+    monitoring = PyAirtableMonitoring("recorder-benchmark", enable_otel=False)
+
+    results = {}
+    print(f"\n{'variant':<10}{'threads':>8}{'best ns/call':>15}{'median ns/call':>17}{'recorder ns':>14}{'speedup':>10}")
+    for threads in sorted({1, args.threads}):
+        for variant in ("bare", "direct", "batched"):
+            run_once(monitoring, variant, min(args.calls, 30000), threads)
+            per_call = [
+                run_once(monitoring, variant, args.calls, threads) / args.calls * 1e9
+                for _ in range(args.rounds)
+            ]
+            results[f"{variant}_{threads}t"] = {
+                "variant": variant,
+                "threads": threads,
+                "best_ns": min(per_call),
+                "median_ns": statistics.median(per_call),
+            }
+        bare = results[f"bare_{threads}t"]
+        direct, batched = results[f"direct_{threads}t"], results[f"batched_{threads}t"]
+        for result in (direct, batched):
+            result["recorder_ns"] = result["best_ns"] - bare["best_ns"]
+        batched["speedup"] = direct["recorder_ns"] / batched["recorder_ns"]
+        for result in (bare, direct, batched):
+            print(f"{result['variant']:<10}{threads:>8}{result['best_ns']:>15.0f}{result['median_ns']:>17.0f}"
+                  f"{result.get('recorder_ns', 0):>14.0f}{result.get('speedup', 1.0):>9.1f}x")
+
+    direct_total, batched_total = total("direct"), total("batched")
+    print(f"\nCounter totals: direct={direct_total:.0f} batched={batched_total:.0f}")
+    if direct_total != batched_total:
+        sys.exit("Batched recorder lost or duplicated increments")
+
+    with open(args.output, "w") as f:
+        json.dump({"timestamp": time.time(), "calls": args.calls, "rounds": args.rounds,
+                   "results": results}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Tail-based trace sampling for PyAirtable services.
+
+Spans are buffered per trace until the trace's local root span ends. The whole
+trace is then either forwarded to the exporting processor or dropped: traces
+with an error and traces slower than a latency threshold are always kept, the
+rest are kept at a configurable rate.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+TRACE_LATENCY_THRESHOLD = float(os.getenv("TRACE_LATENCY_THRESHOLD_SECONDS", "1"))  # Slower traces are always kept
+TRACE_BUFFER_MAX_TRACES = int(os.getenv("TRACE_BUFFER_MAX_TRACES", "10000"))
+TRACE_BUFFER_MAX_SPANS_PER_TRACE = int(os.getenv("TRACE_BUFFER_MAX_SPANS_PER_TRACE", "512"))
+TRACE_DECISION_WAIT = float(os.getenv("TRACE_DECISION_WAIT_SECONDS", "30"))  # Decide traces whose root never ends
+
+# Rough per-span footprint for the buffer's memory estimate
+_SPAN_BASE_BYTES = 600
+_ATTRIBUTE_BYTES = 100
+_EVENT_BYTES = 200
+
+_TRACE_ID_MASK = (1 << 64) - 1
+
+
+class _TraceBuffer:
+    __slots__ = ("spans", "error", "started", "bytes")
+
+    def __init__(self):
+        self.spans: List[ReadableSpan] = []
+        self.error = False
+        self.started = time.monotonic()
+        self.bytes = 0
+
+
+def _estimated_bytes(span: ReadableSpan) -> int:
+    return _SPAN_BASE_BYTES + _ATTRIBUTE_BYTES * len(span.attributes or ()) + _EVENT_BYTES * len(span.events or ())
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Buffers spans per trace and forwards whole traces worth keeping to `exporter_processor`.
+
+    The decision is made when the trace's local root span ends (no parent, or
+    a remote parent): error traces and traces whose root took at least
+    `latency_threshold` seconds are kept, others are kept when the trace ID
+    falls within `sample_rate`. Being derived from the trace ID, the sampling
+    part agrees across services using the same rate.
+
+    Memory is bounded by `max_traces` buffered traces and `max_spans_per_trace`
+    spans each (plus the root span). A trace pushed out by the bound, or still open after
+    `decision_wait` seconds, is decided with what has been seen so far. Spans
+    ending after their trace was decided follow the recorded decision.
+    """
+
+    def __init__(
+        self,
+        exporter_processor: SpanProcessor,
+        sample_rate: float,
+        latency_threshold: float = TRACE_LATENCY_THRESHOLD,
+        max_traces: int = TRACE_BUFFER_MAX_TRACES,
+        max_spans_per_trace: int = TRACE_BUFFER_MAX_SPANS_PER_TRACE,
+        decision_wait: float = TRACE_DECISION_WAIT,
+    ):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.exporter_processor = exporter_processor
+        self.sample_rate = sample_rate
+        self.latency_threshold_ns = int(latency_threshold * 1e9)
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self.decision_wait = decision_wait
+        self._sample_bound = int(sample_rate * _TRACE_ID_MASK)
+        self._traces: "OrderedDict[int, _TraceBuffer]" = OrderedDict()
+        self._decided: "OrderedDict[int, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._buffered_spans = 0
+        self._buffered_bytes = 0
+        self.traces_kept: Dict[str, int] = {"error": 0, "slow": 0, "sampled": 0}
+        self.traces_dropped = 0
+        self.traces_decided_early = 0
+        self.spans_exported = 0
+        self.spans_dropped: Dict[str, int] = {"sampled_out": 0, "trace_too_large": 0}
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_root = span.parent is None or span.parent.is_remote
+        error = span.status.status_code == StatusCode.ERROR
+        export: List[ReadableSpan] = []
+
+        with self._lock:
+            decision = self._decided.get(trace_id)
+            if decision is not None:
+                # Late span of a trace that was already decided
+                if decision:
+                    export.append(span)
+                else:
+                    self.spans_dropped["sampled_out"] += 1
+            else:
+                buffer = self._traces.get(trace_id)
+                if buffer is None:
+                    buffer = self._traces[trace_id] = _TraceBuffer()
+                buffer.error = buffer.error or error
+                if len(buffer.spans) < self.max_spans_per_trace or is_root:
+                    size = _estimated_bytes(span)
+                    buffer.spans.append(span)
+                    buffer.bytes += size
+                    self._buffered_spans += 1
+                    self._buffered_bytes += size
+                else:
+                    self.spans_dropped["trace_too_large"] += 1
+
+                if is_root:
+                    slow = span.end_time - span.start_time >= self.latency_threshold_ns
+                    export.extend(self._decide(trace_id, slow))
+            export.extend(self._decide_expired())
+
+        for span in export:
+            self.exporter_processor.on_end(span)
+
+    def _decide(self, trace_id: int, slow: bool) -> List[ReadableSpan]:
+        """Remove a buffered trace and return its spans if it is kept. Call with the lock held."""
+        buffer = self._traces.pop(trace_id)
+        self._buffered_spans -= len(buffer.spans)
+        self._buffered_bytes -= buffer.bytes
+
+        if buffer.error:
+            reason = "error"
+        elif slow:
+            reason = "slow"
+        elif (trace_id & _TRACE_ID_MASK) < self._sample_bound:
+            reason = "sampled"
+        else:
+            reason = None
+
+        self._decided[trace_id] = reason is not None
+        if len(self._decided) > self.max_traces:
+            self._decided.popitem(last=False)
+
+        if reason is None:
+            self.traces_dropped += 1
+            self.spans_dropped["sampled_out"] += len(buffer.spans)
+            return []
+        self.traces_kept[reason] += 1
+        self.spans_exported += len(buffer.spans)
+        return buffer.spans
+
+    def _decide_expired(self) -> List[ReadableSpan]:
+        """Decide the oldest traces once the buffer is full or they waited too long. Call with the lock held."""
+        export = []
+        deadline = time.monotonic() - self.decision_wait
+        while self._traces:
+            trace_id, buffer = next(iter(self._traces.items()))
+            if len(self._traces) <= self.max_traces and buffer.started > deadline:
+                break
+            self.traces_decided_early += 1
+            export.extend(self._decide(trace_id, slow=False))
+        return export
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "buffered_traces": len(self._traces),
+                "buffered_spans": self._buffered_spans,
+                "buffered_bytes_estimate": self._buffered_bytes,
+                "traces_kept": dict(self.traces_kept),
+                "traces_dropped": self.traces_dropped,
+                "traces_decided_early": self.traces_decided_early,
+                "spans_exported": self.spans_exported,
+                "spans_dropped": dict(self.spans_dropped),
+            }
+
+    def shutdown(self) -> None:
+        """Flush buffered traces through the normal decision, then shut the exporter down."""
+        with self._lock:
+            export = []
+            while self._traces:
+                export.extend(self._decide(next(iter(self._traces)), slow=False))
+        for span in export:
+            self.exporter_processor.on_end(span)
+        self.exporter_processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.exporter_processor.force_flush(timeout_millis)
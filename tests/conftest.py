@@ -34,14 +34,28 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "slow: marks tests as slow running (> 5s)"
     )
+    config.addinivalue_line(
+        "markers", "performance: marks tests as performance benchmarks"
+    )
+    config.addinivalue_line(
+        "markers", "unit: marks tests as unit tests (no services needed)"
+    )
 
 
 def pytest_collection_modifyitems(config, items):
     """Modify test collection to handle markers and skip conditions"""
     for item in items:
+        # Match directory names, not substrings of the whole path
+        directories = item.path.parts[:-1]
         # Add integration marker to all tests in integration directory
-        if "integration" in str(item.fspath):
+        if "integration" in directories:
             item.add_marker(pytest.mark.integration)
+        # Add performance marker to all tests in performance directory
+        if "performance" in directories:
+            item.add_marker(pytest.mark.performance)
+        # Add unit marker to all tests in unit directory
+        if "unit" in directories:
+            item.add_marker(pytest.mark.unit)
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,97 @@
+"""
+Import-time benchmarks for the monitoring middleware.
+
+Each test imports the module in a fresh interpreter under `python -X importtime`
+and checks which modules were loaded and how long the import took, so optional
+dependencies creeping back into module import are caught.
+
+The time budget can be adjusted with IMPORT_TIME_BUDGET_MS for slow machines.
+"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "300"))
+
+# Modules that must only be imported once the matching feature is enabled
+OTEL_MODULES = (
+    "opentelemetry.sdk",
+    "opentelemetry.exporter.otlp.proto.grpc",
+    "opentelemetry.instrumentation",
+    "grpc",
+    "google.protobuf",
+)
+PROMETHEUS_MODULES = ("prometheus_client",)
+
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """Run `code` in a fresh interpreter and return cumulative import time (us) per module."""
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("PROMETHEUS_MULTIPROC_DIR", "prometheus_multiproc_dir")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def loaded(times: Dict[str, int], prefixes: tuple) -> list:
+    return sorted(
+        name for name in times
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in prefixes)
+    )
+
+
+def slowest(times: Dict[str, int], count: int = 10) -> str:
+    ranked = sorted(times.items(), key=lambda item: item[1], reverse=True)[:count]
+    return "\n".join(f"{us / 1000:8.1f} ms  {name}" for name, us in ranked)
+
+
+class TestMonitoringImportTime:
+    """Import cost of monitoring_middleware with features disabled and enabled"""
+    
+    def test_module_import_skips_optional_dependencies(self):
+        times = import_times("import monitoring.monitoring_middleware")
+        
+        assert loaded(times, OTEL_MODULES + PROMETHEUS_MODULES) == [], slowest(times)
+        
+        import_ms = times["monitoring.monitoring_middleware"] / 1000
+        print(f"\nmonitoring.monitoring_middleware import: {import_ms:.1f} ms")
+        assert import_ms < IMPORT_TIME_BUDGET_MS, (
+            f"import took {import_ms:.1f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)\n{slowest(times)}"
+        )
+    
+    def test_disabled_features_are_never_imported(self):
+        times = import_times(
+            "from monitoring.monitoring_middleware import PyAirtableMonitoring\n"
+            "PyAirtableMonitoring('import-benchmark', enable_prometheus=False, enable_otel=False)"
+        )
+        
+        assert loaded(times, OTEL_MODULES + PROMETHEUS_MODULES) == [], slowest(times)
+    
+    def test_prometheus_only_imports_prometheus(self):
+        pytest.importorskip("prometheus_client")
+        times = import_times(
+            "from monitoring.monitoring_middleware import PyAirtableMonitoring\n"
+            "PyAirtableMonitoring('import-benchmark', enable_otel=False)"
+        )
+        
+        assert loaded(times, PROMETHEUS_MODULES)
+        assert loaded(times, OTEL_MODULES) == [], slowest(times)
@@ -0,0 +1,29 @@
+"""
+Unit tests for the database and monitoring components.
+
+These run without any services: the Postgres wire protocol is exercised
+against an in-process fake backend and Redis against fakeredis.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_script(filename: str) -> ModuleType:
+    """Import a hyphenated top-level script such as connection-pool-config.py, once per session."""
+    name = filename[:-3].replace("-", "_")
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, REPO_ROOT / filename)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return sys.modules[name]
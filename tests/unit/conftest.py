@@ -0,0 +1,31 @@
+"""
+Shared fixtures for the unit tests.
+"""
+
+import pytest
+from prometheus_client import REGISTRY
+
+from monitoring.monitoring_middleware import PyAirtableMonitoring
+
+
+@pytest.fixture
+def prometheus_monitoring():
+    """Factory for PyAirtableMonitoring instances exporting to the default registry.
+
+    Their metrics are unregistered afterwards, so each test starts from zero.
+    """
+    before = set(REGISTRY._collector_to_names)
+    instances = []
+
+    def create(**kwargs) -> PyAirtableMonitoring:
+        options = dict(enable_otel=False)
+        options.update(kwargs)
+        instance = PyAirtableMonitoring("unit-test", **options)
+        instances.append(instance)
+        return instance
+
+    yield create
+    for instance in instances:
+        instance.batched.flush()
+    for collector in set(REGISTRY._collector_to_names) - before:
+        REGISTRY.unregister(collector)
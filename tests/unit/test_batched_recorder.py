@@ -0,0 +1,105 @@
+"""
+Tests for BatchedRecorder in monitoring/monitoring_middleware.py.
+"""
+
+import gc
+import os
+import threading
+import time
+import weakref
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter
+
+from monitoring.monitoring_middleware import BatchedRecorder
+
+
+class FakeMonitoring:
+    """The parts of PyAirtableMonitoring a BatchedRecorder uses, on a private registry."""
+
+    enable_prometheus = True
+    service_name = "batch-test"
+
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        self.database_operations_total = Counter(
+            "database_operations_total", "", ["operation", "table", "status", "service"], registry=self.registry
+        )
+        self.cache_operations_total = Counter(
+            "cache_operations_total", "", ["operation", "status", "service"], registry=self.registry
+        )
+
+    def database_count(self, table: str) -> float:
+        return self.registry.get_sample_value(
+            "database_operations_total",
+            {"operation": "select", "table": table, "status": "ok", "service": self.service_name}
+        ) or 0
+
+
+def record_in_thread(recorder: BatchedRecorder, table: str, count: int):
+    thread = threading.Thread(
+        target=lambda: [recorder.record_database_operation("select", table, "ok") for _ in range(count)]
+    )
+    thread.start()
+    thread.join()
+
+
+@pytest.fixture
+def monitoring():
+    return FakeMonitoring()
+
+
+class TestBatchedRecorder:
+    def test_flush_applies_increments_from_all_threads(self, monitoring):
+        recorder = BatchedRecorder(monitoring, flush_interval=60)
+        for _ in range(3):
+            recorder.record_database_operation("select", "users", "ok")
+        recorder.record_cache_operation("get", "hit")
+        assert monitoring.database_count("users") == 0
+
+        recorder.flush()
+        assert monitoring.database_count("users") == 3
+        recorder.record_database_operation("select", "users", "ok")
+        recorder.flush()
+        recorder.flush()
+        assert monitoring.database_count("users") == 4
+
+    def test_flushed_keys_are_dropped(self, monitoring):
+        recorder = BatchedRecorder(monitoring, flush_interval=60)
+        for table in range(100):
+            recorder.record_database_operation("select", f"table_{table}", "ok")
+        recorder.flush()
+        assert all(not buffer.counts for buffer in recorder._buffers)
+
+    def test_finished_threads_are_forgotten_after_their_last_flush(self, monitoring):
+        recorder = BatchedRecorder(monitoring, flush_interval=60)
+        record_in_thread(recorder, "events", 5)
+        assert len(recorder._buffers) == 1
+        recorder.flush()
+        assert monitoring.database_count("events") == 5
+        assert recorder._buffers == []
+
+    def test_background_flush_does_not_keep_recorder_alive(self, monitoring):
+        recorder = BatchedRecorder(monitoring, flush_interval=0.01)
+        recorder.record_database_operation("select", "users", "ok")
+        flusher = recorder._flusher
+        time.sleep(0.05)
+        assert monitoring.database_count("users") == 1
+
+        ref = weakref.ref(recorder)
+        del recorder
+        gc.collect()
+        assert ref() is None
+        flusher.join(1)
+        assert not flusher.is_alive()
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+    def test_child_process_starts_with_no_pending_increments(self, monitoring):
+        recorder = BatchedRecorder(monitoring, flush_interval=60)
+        recorder.record_database_operation("select", "users", "ok")
+        pid = os.fork()
+        if pid == 0:
+            recorder.flush()
+            os._exit(0 if monitoring.database_count("users") == 0 else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,79 @@
+"""
+Tests for AsyncConnectionPool.execute_bulk in connection-pool-config.py.
+
+The execute_bulk tests need a Postgres server and are skipped unless
+TEST_DATABASE_URL is set.
+"""
+
+import os
+
+import asyncpg
+import pytest
+
+from tests.unit import load_script
+
+
+pool_config = load_script("connection-pool-config.py")
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+needs_database = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+class TestCountingStatement:
+    @pytest.mark.parametrize("query, counting", [
+        ("INSERT INTO t (a) VALUES ($1);",
+         "WITH bulk_rows AS (\nINSERT INTO t (a) VALUES ($1)\nRETURNING 1\n) SELECT count(*) FROM bulk_rows"),
+        ("UPDATE t SET note = '--;' WHERE id = $1 -- done\n",
+         "WITH bulk_rows AS (\nUPDATE t SET note = '--;' WHERE id = $1\nRETURNING 1\n) SELECT count(*) FROM bulk_rows"),
+        ("DELETE FROM t WHERE id = $1 RETURNING id",
+         "WITH bulk_rows AS (\nDELETE FROM t WHERE id = $1 RETURNING id\n) SELECT count(*) FROM bulk_rows"),
+    ])
+    def test_dml_is_wrapped(self, query, counting):
+        assert pool_config._counting_statement(query) == counting
+
+    @pytest.mark.parametrize("query", [
+        "SELECT * FROM t WHERE id = $1",
+        "WITH x AS (SELECT $1::int AS id) DELETE FROM t USING x WHERE t.id = x.id",
+        "CALL refresh($1)",
+        "SELECT 'INSERT' FROM t",
+    ])
+    def test_other_statements_are_not_wrapped(self, query):
+        assert pool_config._counting_statement(query) is None
+
+
+@pytest.fixture
+async def pool():
+    pool = pool_config.AsyncConnectionPool(TEST_DATABASE_URL, name="bulk_test")
+    pool.min_size = pool.max_size = 1
+    await pool.execute_query("DROP TABLE IF EXISTS bulk_test")
+    await pool.execute_query("CREATE TABLE bulk_test (id int PRIMARY KEY, note text)")
+    yield pool
+    await pool.execute_query("DROP TABLE IF EXISTS bulk_test")
+    await pool.close()
+
+
+@needs_database
+class TestExecuteBulk:
+    async def test_returns_row_count_per_statement(self, pool, monkeypatch):
+        monkeypatch.setattr(pool_config.DatabaseConfig, "BULK_EXECUTEMANY_CHUNK_SIZE", 2)
+        insert = "INSERT INTO bulk_test (id, note) VALUES ($1, $2) ON CONFLICT DO NOTHING"
+        results = await pool.execute_bulk([
+            (insert, 1, "a"), (insert, 2, "b"), (insert, 1, "dup"), (insert, 3, "c"),
+            pool_config.CopyRecords("bulk_test", [(4, "d"), (5, "e")], columns=["id", "note"]),
+            ("UPDATE bulk_test SET note = 'x' WHERE id > $1", 2),
+            ("UPDATE bulk_test SET note = 'y' WHERE id > $1", 4),
+            ("DELETE FROM bulk_test WHERE id = $1", 1),
+            ("DELETE FROM bulk_test WHERE id = $1", 1),
+            "SELECT * FROM bulk_test",
+        ])
+        assert results == [1, 1, 0, 1, 2, 3, 1, 1, 0, 4]
+
+    async def test_failure_rolls_back_and_is_reported_with_its_index(self, pool):
+        insert = "INSERT INTO bulk_test (id) VALUES ($1)"
+        with pytest.raises(pool_config.BatchExecutionError) as info:
+            await pool.execute_bulk([("DELETE FROM bulk_test WHERE id = $1", 0), (insert, 1), (insert, 1)])
+        assert info.value.statement_index == 1
+        assert isinstance(info.value.error, asyncpg.exceptions.UniqueViolationError)
+        assert await pool.execute_query("SELECT count(*) FROM bulk_test", fetch_one=True) == (0,)
+        assert pool.breaker.failures == 0
@@ -0,0 +1,152 @@
+"""
+Tests for load protection in connection-pool-config.py: the circuit breaker,
+admission control and how request-deadline expiry is classified.
+"""
+
+import asyncio
+import time
+
+import asyncpg
+import pytest
+
+from monitoring.monitoring_middleware import reset_request_deadline, set_request_deadline
+from tests.unit import load_script
+
+
+pool_config = load_script("connection-pool-config.py")
+
+
+def breaker(**kwargs) -> "pool_config.CircuitBreaker":
+    options = dict(failure_threshold=3, recovery_timeout=0.05, half_open_probes=2, enabled=True)
+    options.update(kwargs)
+    return pool_config.CircuitBreaker("test", "async", **options)
+
+
+@pytest.fixture
+def request_deadline():
+    tokens = []
+
+    def set_deadline(timeout):
+        tokens.append(set_request_deadline(timeout))
+
+    yield set_deadline
+    for token in reversed(tokens):
+        reset_request_deadline(token)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        cb = breaker()
+        for _ in range(2):
+            cb.record_failure(cb.allow())
+        cb.record_success(cb.allow())
+        assert cb.failures == 0
+
+        for _ in range(3):
+            cb.record_failure(cb.allow())
+        assert cb.state == cb.OPEN
+        with pytest.raises(pool_config.CircuitOpenError) as info:
+            cb.allow()
+        assert 0 < info.value.retry_after <= 0.05
+        assert cb.rejected == 1
+
+    def test_half_open_probes_close_the_circuit(self):
+        cb = breaker()
+        for _ in range(3):
+            cb.record_failure()
+        time.sleep(0.06)
+
+        probes = [cb.allow(), cb.allow()]
+        assert probes == [True, True] and cb.state == cb.HALF_OPEN
+        with pytest.raises(pool_config.CircuitOpenError):
+            cb.allow()  # Only half_open_probes checkouts at a time
+        for probe in probes:
+            cb.record_success(probe)
+        assert cb.state == cb.CLOSED
+
+    def test_failed_probe_reopens(self):
+        cb = breaker()
+        for _ in range(3):
+            cb.record_failure()
+        time.sleep(0.06)
+        cb.record_failure(cb.allow())
+        assert cb.state == cb.OPEN
+        assert cb.times_opened == 2
+
+    def test_released_probe_frees_its_slot(self):
+        cb = breaker(half_open_probes=1)
+        for _ in range(3):
+            cb.record_failure()
+        time.sleep(0.06)
+        cb.release_probe(cb.allow())
+        assert cb.allow() is True
+
+    def test_disabled_breaker_never_opens(self):
+        cb = breaker(enabled=False)
+        for _ in range(10):
+            cb.record_failure(cb.allow())
+        assert cb.state == cb.CLOSED
+
+
+class TestAdmissionController:
+    def test_admits_while_capacity_is_free(self):
+        controller = pool_config.AdmissionController("test", "async", max_queue=1, max_wait=0.001)
+        controller.record_hold(10)
+        controller.admit(in_use=3, waiting=0, capacity=4)
+
+    def test_rejects_when_queue_is_full(self):
+        controller = pool_config.AdmissionController("test", "async", max_queue=2, max_wait=10)
+        with pytest.raises(pool_config.PoolOverloadedError, match="queue_full"):
+            controller.admit(in_use=4, waiting=2, capacity=4)
+
+    def test_rejects_when_estimated_wait_exceeds_budget(self, request_deadline):
+        controller = pool_config.AdmissionController("test", "async", max_queue=100, max_wait=10)
+        controller.record_hold(0.4)
+        # Four waiters ahead on four connections: about 0.5s to a free connection
+        controller.admit(in_use=4, waiting=4, capacity=4)
+        request_deadline(0.2)
+        with pytest.raises(pool_config.PoolOverloadedError, match="wait_budget") as info:
+            controller.admit(in_use=4, waiting=4, capacity=4)
+        assert info.value.retry_after == pytest.approx(0.5)
+
+
+class TestDeadlineClassification:
+    def test_timeout_without_deadline_is_a_database_failure(self):
+        assert pool_config._is_database_failure(asyncio.TimeoutError())
+        assert not pool_config._deadline_was_binding(asyncio.TimeoutError())
+
+    def test_timeout_with_budget_left_is_a_database_failure(self, request_deadline):
+        request_deadline(5)
+        assert pool_config._is_database_failure(asyncpg.exceptions.QueryCanceledError("canceling statement"))
+
+    def test_spent_budget_is_not_a_database_failure(self, request_deadline):
+        request_deadline(0)
+        for error in (asyncio.TimeoutError(), asyncpg.exceptions.QueryCanceledError("canceling statement")):
+            assert pool_config._deadline_was_binding(error)
+            assert not pool_config._is_database_failure(error)
+        assert not pool_config._deadline_was_binding(ValueError())
+
+    def test_sqlalchemy_wrapped_cancel_is_recognized(self, request_deadline):
+        request_deadline(0)
+        error = Exception("canceling statement due to statement timeout")
+        error.pgcode = "57014"
+        assert pool_config._deadline_was_binding(error)
+
+    def test_batch_failures_are_classified_by_their_cause(self, request_deadline):
+        assert pool_config._is_database_failure(pool_config.BatchExecutionError(3, ConnectionResetError()))
+        assert not pool_config._is_database_failure(
+            pool_config.BatchExecutionError(3, asyncpg.exceptions.UniqueViolationError("duplicate key"))
+        )
+        request_deadline(0)
+        error = pool_config.BatchExecutionError(0, asyncpg.exceptions.QueryCanceledError("canceling statement"))
+        assert pool_config._deadline_was_binding(error)
+        assert not pool_config._is_database_failure(error)
+
+    def test_spent_budget_raises_before_query(self, request_deadline):
+        request_deadline(0)
+        with pytest.raises(pool_config.DeadlineExceededError):
+            pool_config.statement_timeout()
+
+    def test_statement_timeout_is_capped_by_budget(self, request_deadline):
+        request_deadline(0.5)
+        assert 0.4 < pool_config.statement_timeout() <= 0.5
@@ -0,0 +1,60 @@
+"""
+Tests for health checks in monitoring/monitoring_middleware.py.
+"""
+
+import asyncio
+import functools
+
+import pytest
+
+from monitoring.monitoring_middleware import PyAirtableMonitoring
+
+
+async def check(result: bool, delay: float = 0) -> bool:
+    await asyncio.sleep(delay)
+    return result
+
+
+class AsyncCheck:
+    def __init__(self, result: bool):
+        self.result = result
+
+    async def __call__(self) -> bool:
+        return self.result
+
+
+@pytest.fixture
+def monitoring():
+    return PyAirtableMonitoring(
+        "health-test", enable_prometheus=False, enable_otel=False, health_check_timeout=0.2
+    )
+
+
+async def status(monitoring, check_func) -> dict:
+    monitoring.add_health_check("check", check_func)
+    await monitoring._run_health_check("check", check_func)
+    return monitoring._health_results["check"]
+
+
+class TestRunHealthCheck:
+    @pytest.mark.parametrize("check_func", [
+        lambda: check(False),
+        AsyncCheck(False),
+        functools.partial(check, False),
+        lambda: False,
+    ])
+    async def test_result_of_any_callable_is_used(self, monitoring, check_func):
+        assert (await status(monitoring, check_func))["status"] == "unhealthy"
+
+    @pytest.mark.parametrize("check_func", [lambda: check(True), AsyncCheck(True), lambda: True])
+    async def test_healthy(self, monitoring, check_func):
+        assert (await status(monitoring, check_func))["status"] == "healthy"
+
+    async def test_awaitable_result_is_bounded_by_timeout(self, monitoring):
+        result = await status(monitoring, lambda: check(True, delay=1))
+        assert result == {**result, "status": "error", "error": "Timed out after 0.2s"}
+
+    def test_sync_status_leaves_awaitable_results_to_async_refresh(self, monitoring):
+        monitoring.add_health_check("check", lambda: check(False))
+        monitoring.get_health_status()
+        assert "check" not in monitoring._health_results
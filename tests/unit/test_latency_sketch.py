@@ -0,0 +1,95 @@
+"""
+Tests for the per-route latency sketches in monitoring/monitoring_middleware.py.
+"""
+
+import json
+import math
+import random
+import time
+
+import pytest
+
+from monitoring.monitoring_middleware import LatencySketch, RouteLatency
+
+
+def exact_quantile(values, q: float) -> float:
+    return sorted(values)[math.floor(q * (len(values) - 1))]
+
+
+@pytest.fixture
+def latencies():
+    rng = random.Random(7)
+    return [rng.lognormvariate(-4, 1.5) for _ in range(20000)]
+
+
+class TestLatencySketch:
+    @pytest.mark.parametrize("q", [0.5, 0.9, 0.99, 0.999])
+    def test_quantiles_within_relative_accuracy(self, latencies, q):
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in latencies:
+            sketch.add(value)
+        assert sketch.quantile(q) == pytest.approx(exact_quantile(latencies, q), rel=0.01)
+
+    def test_merge_equals_one_sketch_of_all_values(self, latencies):
+        whole, first, second = LatencySketch(), LatencySketch(), LatencySketch()
+        for index, value in enumerate(latencies):
+            whole.add(value)
+            (first if index % 2 else second).add(value)
+        first.merge(second)
+        assert first.bins == whole.bins
+        assert (first.count, first.min, first.max) == (whole.count, whole.min, whole.max)
+
+    def test_merge_rejects_other_accuracy(self):
+        with pytest.raises(ValueError):
+            LatencySketch(relative_accuracy=0.01).merge(LatencySketch(relative_accuracy=0.02))
+
+    def test_bin_limit_keeps_high_quantiles(self, latencies):
+        sketch = LatencySketch(relative_accuracy=0.01, max_bins=64)
+        for value in latencies:
+            sketch.add(value)
+        assert len(sketch.bins) <= 64
+        assert sketch.quantile(0.999) == pytest.approx(exact_quantile(latencies, 0.999), rel=0.01)
+
+    def test_zero_and_empty(self):
+        sketch = LatencySketch()
+        assert math.isnan(sketch.quantile(0.5))
+        for value in (0.0, 0.0, 0.0, 1.0):
+            sketch.add(value)
+        assert sketch.quantile(0.5) == 0.0
+        assert sketch.quantile(1.0) == pytest.approx(1.0, rel=0.01)
+
+    def test_round_trips_through_json(self, latencies):
+        sketch = LatencySketch()
+        for value in latencies[:1000]:
+            sketch.add(value)
+        restored = LatencySketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        assert restored.bins == sketch.bins
+        assert restored.quantile(0.99) == sketch.quantile(0.99)
+
+
+class TestRouteLatency:
+    def test_compact_buckets_are_cumulative_counts(self):
+        route = RouteLatency(buckets=(0.01, 0.1))
+        for value in (0.005, 0.01, 0.05, 2.0):
+            route.observe(value)
+        count, total, bucket_counts = route.snapshot()
+        assert (count, bucket_counts) == (4, [2, 1, 1])
+        assert total == pytest.approx(2.065)
+
+    def test_quantiles_cover_recent_windows_only(self):
+        route = RouteLatency(window=0.05)
+        route.observe(1.0)
+        time.sleep(0.06)
+        route.observe(0.001)
+        assert route.sketch().count == 2  # The previous window still counts
+        time.sleep(0.11)
+        assert route.sketch().count == 0
+        assert route.snapshot()[0] == 2  # Count and sum stay cumulative
+
+    def test_recent_sketch_drops_stale_snapshot(self):
+        route = RouteLatency(window=60)
+        route.observe(0.2)
+        data = json.loads(json.dumps(route.to_dict()))
+        assert RouteLatency.recent_sketch(data, window=60).count == 1
+        data["window_start"] -= 121
+        assert RouteLatency.recent_sketch(data, window=60).count == 0
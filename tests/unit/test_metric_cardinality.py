@@ -0,0 +1,92 @@
+"""
+Tests for metric cardinality bounds in monitoring/monitoring_middleware.py:
+route-template labels and the per-metric label set cap.
+"""
+
+import httpx
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from monitoring.monitoring_middleware import (
+    OVERFLOW_LABEL_VALUE, UNMATCHED_ROUTE_LABEL, CardinalityGuard, create_fastapi_middleware
+)
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, {**labels, "service": "unit-test"}) or 0
+
+
+class TestCardinalityGuard:
+    def test_caps_label_sets_per_metric(self):
+        guard = CardinalityGuard(max_label_sets=2)
+        assert guard.admit("requests", ("a",)) and guard.admit("requests", ("b",))
+        assert not guard.admit("requests", ("c",))
+        assert guard.admit("requests", ("a",))  # Known label sets are always admitted
+        assert guard.admit("errors", ("c",))  # Each metric has its own cap
+        assert guard.stats() == {
+            "max_label_sets": 2,
+            "label_sets": {"requests": 2, "errors": 1},
+            "overflows": {"requests": 1}
+        }
+
+
+class TestRouteLabels:
+    @staticmethod
+    def app(monitoring) -> FastAPI:
+        users = FastAPI()
+
+        @users.get("/{user_id}/sessions/{session_id}")
+        async def user_session(user_id: int, session_id: str):
+            return {}
+
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            return {}
+
+        app.mount("/users", users)
+        app.add_middleware(create_fastapi_middleware(monitoring))
+        return app
+
+    async def get(self, monitoring, *paths, method="GET"):
+        transport = httpx.ASGITransport(app=self.app(monitoring))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            for path in paths:
+                await http.request(method, path)
+
+    async def test_paths_are_labelled_by_route_template(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring()
+        await self.get(monitoring, "/items/1", "/items/2", "/users/7/sessions/abc", "/nope/1", "/nope/2")
+        counts = {
+            endpoint: sample("http_requests_total", method="GET", endpoint=endpoint, status_code=status)
+            for endpoint, status in [
+                ("/items/{item_id}", "200"),
+                ("/users/{user_id}/sessions/{session_id}", "200"),
+                (UNMATCHED_ROUTE_LABEL, "404"),
+            ]
+        }
+        assert counts == {
+            "/items/{item_id}": 2, "/users/{user_id}/sessions/{session_id}": 1, UNMATCHED_ROUTE_LABEL: 2
+        }
+
+    async def test_unknown_methods_share_a_label(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring()
+        await self.get(monitoring, "/items/1", method="PROPFIND")
+        assert sample("http_requests_total", method="OTHER", endpoint="/items/{item_id}", status_code="405") == 1
+
+    async def test_label_sets_beyond_the_cap_fold_into_overflow(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring(max_label_sets=1)
+        monitoring.record_http_request("GET", "/a", 200, 0.01)
+        monitoring.record_http_request("GET", "/b", 200, 0.01)
+        monitoring.record_http_request("GET", "/b", 200, 0.01)
+        assert sample("http_requests_total", method="GET", endpoint="/a", status_code="200") == 1
+        assert sample("http_requests_total", method="GET", endpoint=OVERFLOW_LABEL_VALUE, status_code="200") == 2
+        assert sample("metric_label_overflow_total", metric="http_requests_total") == 2
+
+    async def test_airtable_ids_fold_into_overflow(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring(max_label_sets=1)
+        for base_id in ("app1", "app2"):
+            monitoring.record_airtable_request(base_id, "tbl1", "list", "ok")
+        overflow = dict(base_id=OVERFLOW_LABEL_VALUE, table_name=OVERFLOW_LABEL_VALUE, operation="list", status="ok")
+        assert sample("airtable_requests_total", **overflow) == 1
@@ -0,0 +1,107 @@
+"""
+Tests for the ASGI monitoring middleware and request deadlines in monitoring/monitoring_middleware.py.
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from monitoring.monitoring_middleware import (
+    create_fastapi_middleware, remaining_request_budget, reset_request_deadline, set_request_deadline
+)
+
+
+def app_with_middleware(monitoring) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str):
+        return {"id": session_id}
+
+    @app.get("/fail")
+    async def fail():
+        raise RuntimeError("boom")
+
+    app.add_middleware(create_fastapi_middleware(monitoring))
+    return app
+
+
+def client(app) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+def requests_total(method: str, endpoint: str, status_code: int) -> float:
+    return REGISTRY.get_sample_value("http_requests_total", {
+        "method": method, "endpoint": endpoint, "status_code": str(status_code), "service": "unit-test"
+    }) or 0
+
+
+class TestMonitoringMiddleware:
+    async def test_requests_are_recorded_by_route_template(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring()
+        async with client(app_with_middleware(monitoring)) as http:
+            for session_id in ("a1", "b2", "c3"):
+                assert (await http.get(f"/sessions/{session_id}")).status_code == 200
+        assert requests_total("GET", "/sessions/{session_id}", 200) == 3
+        # One label child set per (method, route, status), reused by later requests
+        assert list(monitoring._http_metric_children) == [("GET", "/sessions/{session_id}", 200)]
+
+    async def test_unhandled_error_is_recorded_as_500(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring()
+        async with client(app_with_middleware(monitoring)) as http:
+            assert (await http.get("/fail")).status_code == 500
+        assert requests_total("GET", "/fail", 500) == 1
+
+    async def test_non_http_scopes_pass_through(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring()
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(scope["type"])
+
+        await create_fastapi_middleware(monitoring)(app)({"type": "lifespan"}, None, None)
+        assert seen == ["lifespan"]
+        assert monitoring._http_metric_children == {}
+
+
+def budget_app(monitoring, budgets: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/budget")
+    async def budget():
+        budgets.append(remaining_request_budget())
+        return {}
+
+    app.add_middleware(create_fastapi_middleware(monitoring))
+    return app
+
+
+class TestRequestDeadline:
+    @pytest.mark.parametrize("header, budget", [
+        (None, 30), ("0.5", 0.5), ("120", 30), ("soon", 30), ("0", 30), ("-5", 30), ("nan", 30), ("inf", 30)
+    ])
+    async def test_budget_comes_from_default_or_smaller_client_timeout(self, prometheus_monitoring, header, budget):
+        budgets = []
+        app = budget_app(prometheus_monitoring(request_timeout=30), budgets)
+        headers = {"X-Request-Timeout": header} if header else {}
+        async with client(app) as http:
+            await http.get("/budget", headers=headers)
+        assert budget - 0.1 <= budgets[0] <= budget
+
+    async def test_budget_is_cleared_after_the_request(self, prometheus_monitoring):
+        budgets = []
+        async with client(budget_app(prometheus_monitoring(), budgets)) as http:
+            await http.get("/budget")
+        assert budgets[0] is not None
+        assert remaining_request_budget() is None
+
+    def test_nested_deadlines_restore_the_outer_one(self):
+        outer = set_request_deadline(10)
+        inner = set_request_deadline(1)
+        assert remaining_request_budget() <= 1
+        reset_request_deadline(inner)
+        assert 1 < remaining_request_budget() <= 10
+        reset_request_deadline(outer)
+        assert remaining_request_budget() is None
@@ -0,0 +1,43 @@
+"""
+Tests for /metrics in Prometheus multiprocess mode.
+
+Each scrape runs in a fresh interpreter with PROMETHEUS_MULTIPROC_DIR set,
+since prometheus_client picks the mode when metrics are first created.
+"""
+
+import os
+import subprocess
+import sys
+
+from tests.unit import REPO_ROOT
+
+
+SCRAPE = """
+from monitoring.monitoring_middleware import PyAirtableMonitoring, prepare_multiprocess_dir
+from tests.unit import load_script
+
+prepare_multiprocess_dir()
+pool_config = load_script("connection-pool-config.py")
+pool_config.query_profiler.record("SELECT * FROM users WHERE id = 7", 0.01, rows=1)
+monitoring = PyAirtableMonitoring("scrape-test", enable_otel=False, enable_latency_sketches=True)
+monitoring.record_http_request("GET", "/users/{id}", 200, 0.02)
+print(monitoring.get_metrics().decode())
+"""
+
+
+def scrape(tmp_path) -> str:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    env.pop("prometheus_multiproc_dir", None)
+    result = subprocess.run(
+        [sys.executable, "-c", SCRAPE], cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+class TestMultiprocessMetrics:
+    def test_custom_collectors_are_scraped(self, tmp_path):
+        metrics = scrape(tmp_path)
+        assert 'db_query_calls_total{fingerprint="SELECT * FROM users WHERE id = ?"} 1.0' in metrics
+        assert "http_request_duration_quantiles_seconds_count" in metrics
+        assert any(name.endswith(".db") for name in os.listdir(tmp_path))
@@ -0,0 +1,88 @@
+"""
+Tests for PoolAutoscaler in connection-pool-config.py and its wiring into the
+service lifespan.
+"""
+
+import asyncio
+
+import pytest
+
+from tests.unit import load_script
+
+
+pool_config = load_script("connection-pool-config.py")
+
+
+@pytest.fixture
+def autoscale(monkeypatch):
+    monkeypatch.setattr(pool_config.DatabaseConfig, "ASYNCPG_AUTOSCALE_ENABLED", True)
+    monkeypatch.setattr(pool_config.DatabaseConfig, "ASYNCPG_AUTOSCALE_UP_SAMPLES", 2)
+    monkeypatch.setattr(pool_config.DatabaseConfig, "ASYNCPG_AUTOSCALE_DOWN_SAMPLES", 2)
+
+
+def async_pool(limit: int) -> "pool_config.AsyncConnectionPool":
+    pool = pool_config.AsyncConnectionPool("postgresql://localhost/test", name="autoscale_test")
+    pool.max_size = 20
+    pool.limiter.set_limit(limit)
+    return pool
+
+
+class FakeConnectionManager:
+    def __init__(self, pools):
+        self.pools = pools
+        self.closed = False
+
+    def async_pools(self):
+        return self.pools
+
+    async def warm_up(self):
+        return {}
+
+    async def close_all(self):
+        self.closed = True
+
+
+class TestPoolAutoscaler:
+    async def test_grows_after_consecutive_overflow(self, autoscale):
+        pool = async_pool(4)
+        scaler = pool_config.PoolAutoscaler(pool, min_size=2, max_size=10)
+        for _ in range(4):
+            await pool.limiter.acquire()
+        waiter = asyncio.create_task(pool.limiter.acquire())
+        await asyncio.sleep(0)
+
+        # The waiter is still queued in the second window
+        assert scaler.sample() is None
+        decision = scaler.sample()
+        assert decision["direction"] == "up" and decision["reason"] == "overflow"
+        assert pool.limiter.limit == 5
+        await asyncio.wait_for(waiter, 0.1)
+
+    async def test_shrinks_when_idle(self, autoscale):
+        pool = async_pool(10)
+        scaler = pool_config.PoolAutoscaler(pool, min_size=2, max_size=10)
+        assert scaler.sample() is None
+        assert scaler.sample()["direction"] == "down"
+        assert pool.limiter.limit == 9
+
+
+class TestLifespan:
+    async def test_autoscalers_run_for_the_lifespan(self, autoscale):
+        manager = FakeConnectionManager([async_pool(4), async_pool(4)])
+        lifespan = pool_config.create_database_lifespan(manager)
+
+        running = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        async with lifespan(None):
+            started = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            assert len(started) == len(running) + 2
+        await asyncio.sleep(0)
+        assert all(task.done() for task in started if task not in running)
+        assert manager.closed
+
+    async def test_autoscaling_off_by_default(self, monkeypatch):
+        monkeypatch.setattr(pool_config.DatabaseConfig, "ASYNCPG_AUTOSCALE_ENABLED", False)
+        monkeypatch.setattr(pool_config, "PoolAutoscaler", None)
+        manager = FakeConnectionManager([async_pool(4)])
+        async with pool_config.create_database_lifespan(manager)(None):
+            pass
+        assert manager.closed
@@ -0,0 +1,192 @@
+"""
+Tests for the query result cache in connection-pool-config.py: table tagging
+of read and write statements, the Redis entry format and the two-tier cache
+against fakeredis.
+"""
+
+import asyncio
+import datetime
+import pickle
+import uuid
+from decimal import Decimal
+
+import fakeredis
+import pytest
+
+from tests.unit import load_script
+
+
+pool_config = load_script("connection-pool-config.py")
+
+
+class TestReadTables:
+    @pytest.mark.parametrize("query, tables", [
+        ("SELECT * FROM users", {"users"}),
+        ("SELECT * FROM a, b WHERE a.id = b.id", {"a", "b"}),
+        ('SELECT * FROM public.users u, "Orders" o JOIN items i ON i.order_id = o.id, tags',
+         {"users", "orders", "items", "tags"}),
+        ("SELECT * FROM (a JOIN b ON a.id = b.id) LEFT JOIN c USING (id)", {"a", "b", "c"}),
+        ("SELECT * FROM t WHERE id IN (SELECT id FROM u) ORDER BY 1", {"t", "u"}),
+        ("SELECT * FROM (SELECT * FROM a) s, b", {"a", "b"}),
+        ("SELECT * FROM unnest($1::int[]) AS ids(id) JOIN users ON users.id = ids.id", {"users"}),
+        ("SELECT extract(year FROM created_at) FROM events WHERE a IS DISTINCT FROM b", {"events"}),
+    ])
+    def test_tables(self, query, tables):
+        assert pool_config.read_tables(query) == frozenset(tables)
+
+    def test_ignores_literals_and_comments(self):
+        query = "SELECT 'it''s FROM z' FROM q /* FROM w */ WHERE note = 'JOIN y' -- FROM x"
+        assert pool_config.read_tables(query) == frozenset({"q"})
+
+    @pytest.mark.parametrize("query", ["SELECT now()", "SELECT * FROM get_active_users($1)"])
+    def test_untaggable_queries_have_no_tags(self, query):
+        assert pool_config.read_tables(query) == frozenset()
+
+    async def test_untaggable_query_needs_explicit_tags(self):
+        cache = pool_config.QueryResultCache(redis_url="")
+
+        async def fetch():
+            return 42
+
+        with pytest.raises(ValueError, match="pass tags"):
+            await cache.cached("SELECT count_users()", (), True, False, 60, None, fetch)
+        assert await cache.cached("SELECT count_users()", (), True, False, 60, ["users"], fetch) == 42
+
+
+class TestWrittenTables:
+    @pytest.mark.parametrize("query, tables", [
+        ("UPDATE users SET name = $1", {"users"}),
+        ('INSERT INTO "Auth".sessions (id) VALUES ($1) ON CONFLICT (id) DO UPDATE SET seen = now()', {"sessions"}),
+        ("DELETE FROM tokens WHERE expires < now()", {"tokens"}),
+        ("TRUNCATE TABLE audit_log", {"audit_log"}),
+        ("SELECT * FROM jobs FOR UPDATE SKIP LOCKED", set()),
+    ])
+    def test_tables(self, query, tables):
+        assert pool_config.written_tables(query) == frozenset(tables)
+
+    def test_ignores_literals(self):
+        assert pool_config.written_tables("SELECT * FROM t WHERE status = 'UPDATE x'") == frozenset()
+
+
+class TestCacheEntryFormat:
+    def test_round_trips_database_types(self):
+        row = {
+            "id": uuid.uuid4(),
+            "created_at": datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2024, 5, 1),
+            "at": datetime.time(9, 15, 30, 250),
+            "elapsed": datetime.timedelta(days=1, seconds=5, microseconds=7),
+            "balance": Decimal("12.3400"),
+            "avatar": b"\x00\xffpng",
+            "tags": ["a", "b"],
+            "settings": '{"theme": "dark"}',
+            "active": True,
+            "score": 1.5,
+            "deleted_at": None,
+        }
+        expires_at, value = pool_config.load_cache_entry(pool_config.dump_cache_entry(123.5, [row]))
+        assert expires_at == 123.5
+        assert value == [row]
+        assert type(value[0]["balance"]) is Decimal
+
+    def test_row_with_type_column_round_trips(self):
+        row = {"$type": "uuid", "value": "not-a-uuid"}
+        assert pool_config.load_cache_entry(pool_config.dump_cache_entry(1.0, row))[1] == row
+
+    def test_unsupported_types_are_refused(self):
+        with pytest.raises(TypeError):
+            pool_config.dump_cache_entry(1.0, {"value": object()})
+
+    def test_payload_is_data_only(self):
+        assert pool_config.dump_cache_entry(1.0, {"n": 1}) == b'[1.0,{"n":1}]'
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """Route QueryResultCache's Redis connections to one in-memory server."""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        pool_config.aioredis, "from_url",
+        lambda url, **kwargs: fakeredis.aioredis.FakeRedis(server=server)
+    )
+    return server
+
+
+@pytest.fixture
+async def caches(redis_server):
+    """Two caches sharing Redis, standing in for two worker processes."""
+    pair = [pool_config.QueryResultCache(redis_url="redis://test") for _ in range(2)]
+    yield pair
+    for cache in pair:
+        await cache.close()
+
+
+class Fetcher:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.value
+
+
+class TestQueryResultCache:
+    QUERY = "SELECT * FROM users WHERE id = $1"
+
+    async def test_shares_results_across_processes(self, caches):
+        first, second = caches
+        fetch = Fetcher({"id": 1, "balance": Decimal("5.00")})
+        assert await first.cached(self.QUERY, (1,), True, False, 60, None, fetch) == fetch.value
+        assert await second.cached(self.QUERY, (1,), True, False, 60, None, fetch) == fetch.value
+        assert await second.cached(self.QUERY, (1,), True, False, 60, None, fetch) == fetch.value
+        assert fetch.calls == 1
+        assert (second.redis_hits, second.local_hits) == (1, 1)
+
+    async def test_invalidation_reaches_other_processes(self, caches):
+        first, second = caches
+        fetch = Fetcher({"id": 1})
+        await first.cached(self.QUERY, (1,), True, False, 60, None, fetch)
+        await second.cached(self.QUERY, (1,), True, False, 60, None, fetch)
+        await asyncio.sleep(0.05)  # Let both pub/sub listeners subscribe
+
+        await first.invalidate(pool_config.written_tables("UPDATE users SET name = $1"))
+        for _ in range(100):
+            if not second._entries:
+                break
+            await asyncio.sleep(0.01)
+        assert not second._entries
+        await second.cached(self.QUERY, (1,), True, False, 60, None, fetch)
+        assert fetch.calls == 2
+
+    async def test_concurrent_misses_share_one_fetch(self, caches):
+        cache = caches[0]
+        fetch = Fetcher([{"id": 1}])
+        results = await asyncio.gather(*(
+            cache.cached("SELECT * FROM users", (), False, True, 60, None, fetch) for _ in range(10)
+        ))
+        assert fetch.calls == 1
+        assert all(result == [{"id": 1}] for result in results)
+
+    async def test_unreadable_redis_entry_is_a_miss(self, caches, redis_server):
+        cache = caches[0]
+        key = cache.make_key(self.QUERY, (1,), True, False)
+        redis = fakeredis.aioredis.FakeRedis(server=redis_server)
+        await redis.set(key, pickle.dumps((0, {"id": 1})))
+        fetch = Fetcher({"id": 2})
+        assert await cache.cached(self.QUERY, (1,), True, False, 60, None, fetch) == {"id": 2}
+        assert fetch.calls == 1
+
+    async def test_unserializable_result_stays_local(self, caches):
+        first, second = caches
+        fetch = Fetcher({"id": 1, "range": object()})
+        await first.cached(self.QUERY, (1,), True, False, 60, None, fetch)
+        await second.cached(self.QUERY, (1,), True, False, 60, None, fetch)
+        assert fetch.calls == 2
+        assert first.redis_errors == 0
+
+    async def test_rejects_writes(self):
+        cache = pool_config.QueryResultCache(redis_url="")
+        with pytest.raises(ValueError, match="read queries"):
+            await cache.cached("UPDATE users SET a = 1", (), False, False, 60, None, Fetcher(None))
@@ -0,0 +1,60 @@
+"""
+Tests for statement fingerprinting and the query profiler in connection-pool-config.py.
+"""
+
+import pytest
+
+from tests.unit import load_script
+
+
+pool_config = load_script("connection-pool-config.py")
+
+
+class TestFingerprintQuery:
+    @pytest.mark.parametrize("query, fingerprint", [
+        ("SELECT * FROM users WHERE id = 42", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE name = 'o''brien' AND id = $1", "SELECT * FROM users WHERE name = ? AND id = ?"),
+        ("SELECT * FROM t WHERE id IN (1, 2, 3)", "SELECT * FROM t WHERE id IN (?+)"),
+        ("SELECT * FROM t WHERE a = %(a)s AND b = %s AND c = :c", "SELECT * FROM t WHERE a = ? AND b = ? AND c = ?"),
+        ("SELECT a::text FROM t", "SELECT a::text FROM t"),
+        ("SELECT *\n  FROM t /* hint */ -- trailing\n WHERE x = -1.5e3", "SELECT * FROM t WHERE x = ?"),
+    ])
+    def test_literals_and_parameters_are_normalized(self, query, fingerprint):
+        assert pool_config.fingerprint_query(query) == fingerprint
+
+    @pytest.mark.parametrize("literal", [
+        r"E'it\'s'",
+        r"e'line\nbreak\\'",
+        "X'ff'",
+        "B'1010'",
+        "N'text'",
+        "U&'d\\0061t'",
+        "$$it's $1 -- not a comment$$",
+        "$fn$ SELECT $$ nested $$ $fn$",
+        "$_1$\n multi\n line $_1$",
+    ])
+    def test_escape_strings_and_dollar_quotes_are_one_literal(self, literal):
+        assert pool_config.fingerprint_query(f"SELECT {literal} FROM t") == "SELECT ? FROM t"
+
+    def test_comment_markers_inside_strings_are_literals(self):
+        query = "SELECT '--', '/* x' FROM t WHERE note = 'y */' -- real comment"
+        assert pool_config.fingerprint_query(query) == "SELECT ?, ? FROM t WHERE note = ?"
+
+    def test_dollar_signs_in_identifiers_are_kept(self):
+        assert pool_config.fingerprint_query("SELECT a$b FROM t$1 WHERE c = $2") == "SELECT a$b FROM t$1 WHERE c = ?"
+
+    def test_dollar_quoted_body_is_not_read_for_tables(self):
+        assert pool_config.read_tables("SELECT $q$ FROM secrets $q$ FROM notes") == frozenset({"notes"})
+
+
+class TestQueryProfiler:
+    def test_groups_calls_by_fingerprint(self):
+        profiler = pool_config.QueryProfiler()
+        profiler.record("SELECT * FROM users WHERE id = 1", 0.01, rows=1)
+        profiler.record("SELECT * FROM users WHERE id = 2", 0.03, rows=1)
+        profiler.record("DELETE FROM users WHERE id = 3", 0.02, error=True)
+        top = {entry["fingerprint"]: entry for entry in profiler.top(10)}
+        assert top["SELECT * FROM users WHERE id = ?"]["calls"] == 2
+        assert top["SELECT * FROM users WHERE id = ?"]["rows"] == 2
+        assert top["DELETE FROM users WHERE id = ?"]["errors"] == 1
+        assert list(top)[0] == "SELECT * FROM users WHERE id = ?"
@@ -0,0 +1,64 @@
+"""
+Tests for the runtime metrics (event loop lag, GC pauses, thread pools, file
+descriptors) in monitoring/monitoring_middleware.py.
+"""
+
+import asyncio
+import gc
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from prometheus_client import REGISTRY
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, {**labels, "service": "unit-test"}) or 0
+
+
+class TestRuntimeMetrics:
+    async def test_disabled_by_default(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring(enable_runtime_metrics=False)
+        monitoring.start_runtime_metrics()
+        assert monitoring._gc_callback not in gc.callbacks
+        assert monitoring._loop_lag_task is None
+
+    async def test_loop_lag_is_observed(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring(enable_runtime_metrics=True)
+        monitoring.start_runtime_metrics(interval=0.01)
+        try:
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)  # Block the loop past the next tick
+            await asyncio.sleep(0.05)
+        finally:
+            await monitoring.stop_runtime_metrics()
+        assert monitoring._loop_lag_task is None
+        assert monitoring._gc_callback not in gc.callbacks
+        assert sample("event_loop_lag_seconds_count") >= 2
+        assert sample("event_loop_lag_seconds_sum") >= 0.05
+
+    async def test_gc_pauses_and_pools_are_sampled(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring(enable_runtime_metrics=True)
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            executor.submit(time.sleep, 0).result()
+            monitoring.add_thread_pool("db", executor)
+            monitoring.start_runtime_metrics()
+            gc.collect(1)
+            monitoring._sample_runtime()
+        finally:
+            await monitoring.stop_runtime_metrics()
+            executor.shutdown()
+        assert sample("python_gc_pause_seconds_count", generation="1") >= 1
+        assert sample("thread_pool_threads", pool="db") == 1
+        assert sample("thread_pool_queue_depth", pool="db") == 0
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Counts /proc/self/fd")
+    def test_open_file_descriptors(self, prometheus_monitoring):
+        monitoring = prometheus_monitoring(enable_runtime_metrics=True)
+        monitoring._sample_runtime()
+        before = sample("open_file_descriptors")
+        with open(__file__):
+            monitoring._sample_runtime()
+            assert sample("open_file_descriptors") == before + 1
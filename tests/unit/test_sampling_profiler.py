@@ -0,0 +1,73 @@
+"""
+Tests for SamplingProfiler and collapsed_stacks in monitoring/monitoring_middleware.py.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from monitoring.monitoring_middleware import PROFILER_OVERFLOW_STACK, SamplingProfiler, collapsed_stacks
+
+
+def busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_worker, args=(stop,), name="busy-worker", daemon=True)
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+class TestSamplingProfiler:
+    async def test_profile_samples_other_threads(self, busy_thread):
+        profiler = SamplingProfiler(hz=200)
+        stacks = await profiler.profile(0.2)
+        busy = [stack for stack in stacks if stack.startswith("busy-worker;")]
+        assert busy and any(f"{__name__}:busy_worker" in stack for stack in busy)
+        assert not any(stack.startswith("sampling-profiler;") for stack in stacks)
+        assert not profiler.running  # A one-off session stops its thread
+
+    async def test_profile_reports_only_its_own_window(self, busy_thread):
+        profiler = SamplingProfiler(hz=200)
+        profiler.start()
+        try:
+            await asyncio.sleep(0.1)
+            before = profiler.stacks()
+            window = await profiler.profile(0.1)
+            after = profiler.stacks()
+        finally:
+            profiler.stop()
+        assert profiler.running is False
+        for stack, count in window.items():
+            assert count == after[stack] - before.get(stack, 0)
+
+    async def test_distinct_stacks_are_capped(self, busy_thread):
+        profiler = SamplingProfiler(hz=200, max_stacks=1)
+        await profiler.profile(0.1)
+        stats = profiler.stats()
+        assert stats["stacks"] <= 2  # The cap plus the overflow entry
+        assert stats["overflowed_samples"] > 0
+        assert PROFILER_OVERFLOW_STACK in profiler.stacks()
+
+    def test_deep_stacks_are_truncated(self):
+        profiler = SamplingProfiler(max_depth=3)
+        profiler._sample(threading.get_ident() + 1)
+        stack = next(stack for stack in profiler.stacks() if stack.startswith(threading.current_thread().name))
+        assert stack.split(";")[1] == "(truncated)"
+        assert len(stack.split(";")) == 5
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            SamplingProfiler(hz=0)
+
+
+def test_collapsed_stacks_are_most_frequent_first():
+    assert collapsed_stacks({"main;a": 1, "main;b": 3}) == "main;b 3\nmain;a 1\n"
+    assert collapsed_stacks({}) == ""
@@ -0,0 +1,53 @@
+"""
+Tests for registered-statement bookkeeping in connection-pool-config.py.
+"""
+
+from tests.unit import load_script
+
+
+pool_config = load_script("connection-pool-config.py")
+
+
+class FakeConnection:
+    def __init__(self, pid: int):
+        self.pid = pid
+
+    def get_server_pid(self) -> int:
+        return self.pid
+
+
+class TestPreparedStatementCache:
+    def test_counts_first_and_repeat_uses_per_backend(self):
+        cache = pool_config.PreparedStatementCache(max_size=10, max_connections=10)
+        first, second = FakeConnection(1), FakeConnection(2)
+        assert cache.record_use(first, "q") is False
+        assert cache.record_use(first, "q") is True
+        assert cache.record_use(second, "q") is False
+        stats = cache.stats()
+        assert (stats["first_uses"], stats["repeat_uses"]) == (2, 1)
+        assert stats["repeat_ratio"] == 1 / 3
+        assert (stats["connections"], stats["statements"]) == (2, 2)
+
+    def test_least_recently_used_statement_is_forgotten(self):
+        cache = pool_config.PreparedStatementCache(max_size=2, max_connections=10)
+        connection = FakeConnection(1)
+        for name in ("a", "b", "a", "c"):
+            cache.record_use(connection, name)
+        assert cache.evictions == 1
+        assert cache.record_use(connection, "a") is True
+        assert cache.record_use(connection, "b") is False
+
+    def test_recycled_backends_are_dropped(self):
+        cache = pool_config.PreparedStatementCache(max_size=10, max_connections=1)
+        cache.record_use(FakeConnection(1), "q")
+        cache.record_use(FakeConnection(2), "q")
+        assert cache.stats()["connections"] == 1
+        assert cache.evictions == 1
+
+    def test_invalidated_statement_is_a_first_use_again(self):
+        cache = pool_config.PreparedStatementCache(max_size=10, max_connections=10)
+        connection = FakeConnection(1)
+        cache.record_use(connection, "q")
+        cache.invalidate(connection, "q")
+        assert cache.invalidations == 1
+        assert cache.record_use(connection, "q") is False
@@ -0,0 +1,102 @@
+"""
+Tests for per-tenant fair queuing of asyncpg checkouts in connection-pool-config.py.
+"""
+
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from tests.unit import load_script
+
+
+pool_config = load_script("connection-pool-config.py")
+
+
+def limiter(limit: int, max_share: float = 0.5, weights=None) -> "pool_config.FairCheckoutLimiter":
+    return pool_config.FairCheckoutLimiter(limit, "test", weights=weights or {}, max_share=max_share)
+
+
+async def queue(lim, tenant: Optional[str], count: int, granted: List[str]) -> List[asyncio.Task]:
+    """Queue `count` checkouts for a tenant, appending the tenant to `granted` as each is served."""
+    async def checkout():
+        await lim.acquire(timeout=1, tenant=tenant)
+        granted.append(tenant)
+
+    tasks = [asyncio.create_task(checkout()) for _ in range(count)]
+    await settle()
+    return tasks
+
+
+async def settle():
+    """Let woken checkouts run."""
+    await asyncio.sleep(0.01)
+
+
+class TestFairCheckoutLimiter:
+    async def test_untagged_checkouts_are_granted_immediately(self):
+        lim = limiter(2)
+        await asyncio.wait_for(lim.acquire(timeout=1), 0.1)
+        await asyncio.wait_for(lim.acquire(timeout=1), 0.1)
+        assert lim.in_use == 2
+        with pytest.raises(asyncio.TimeoutError):
+            await lim.acquire(timeout=0.01)
+        assert lim.waiting == 0
+
+    async def test_lone_tenant_may_use_whole_pool(self):
+        lim = limiter(4, max_share=0.5)
+        for _ in range(4):
+            await asyncio.wait_for(lim.acquire(timeout=1, tenant="acme"), 0.1)
+        assert lim.in_use == 4
+        assert lim.load("acme") == (4, 0, 4)
+
+    async def test_share_is_capped_while_others_wait(self):
+        lim = limiter(4, max_share=0.5)
+        granted: List[str] = []
+        for _ in range(4):
+            await lim.acquire(tenant="noisy")
+        noisy = await queue(lim, "noisy", 4, granted)
+        quiet = await queue(lim, "quiet", 2, granted)
+        assert lim.load("noisy")[2] == 2
+
+        # Released slots go to the waiting tenant until noisy is back under its share
+        for _ in range(4):
+            lim.release("noisy")
+            await settle()
+        assert granted[:2] == ["quiet", "quiet"]
+        assert granted[2:] == ["noisy", "noisy"]
+        assert lim._tenant_in_use == {"noisy": 2, "quiet": 2}
+        for task in noisy[2:]:
+            task.cancel()
+        await asyncio.gather(*noisy, *quiet, return_exceptions=True)
+
+    async def test_weights_split_checkouts(self):
+        lim = limiter(1, max_share=1.0, weights={"gold": 3.0})
+        granted: List[str] = []
+        await lim.acquire()
+        tasks = await queue(lim, "gold", 6, granted) + await queue(lim, "bronze", 6, granted)
+        lim.release()
+        for _ in range(7):
+            await settle()
+            lim.release(granted[-1])
+        await settle()
+        assert granted[:8].count("gold") == 6
+        assert granted[:8].count("bronze") == 2
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_timed_out_waiter_leaves_the_queue(self):
+        lim = limiter(1)
+        await lim.acquire(tenant="a")
+        with pytest.raises(asyncio.TimeoutError):
+            await lim.acquire(timeout=0.01, tenant="b")
+        assert lim.waiting == 0
+        lim.release("a")
+        assert lim.in_use == 0
+        assert not lim._queues and not lim._tenant_in_use
+
+    def test_parse_weight_spec(self):
+        assert pool_config.parse_weight_spec("gold:3, silver:1.5,") == {"gold": 3.0, "silver": 1.5}
+        with pytest.raises(ValueError):
+            pool_config.parse_weight_spec("gold")
@@ -0,0 +1,126 @@
+"""
+Tests for TailSamplingSpanProcessor in monitoring/trace_sampling.py.
+"""
+
+import time
+from typing import List
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.trace import NonRecordingSpan, SpanContext, Status, StatusCode, TraceFlags
+
+from monitoring.trace_sampling import TailSamplingSpanProcessor
+
+
+class CollectingProcessor(SpanProcessor):
+    def __init__(self):
+        self.spans: List[ReadableSpan] = []
+        self.shut_down = False
+
+    def on_end(self, span: ReadableSpan) -> None:
+        self.spans.append(span)
+
+    def shutdown(self) -> None:
+        self.shut_down = True
+
+
+def tracer_with(sampler: TailSamplingSpanProcessor) -> trace.Tracer:
+    provider = TracerProvider()
+    provider.add_span_processor(sampler)
+    return provider.get_tracer("test")
+
+
+@pytest.fixture
+def exporter():
+    return CollectingProcessor()
+
+
+def run_trace(tracer, error: bool = False, children: int = 2, duration: float = 0):
+    with tracer.start_as_current_span("request") as root:
+        for index in range(children):
+            with tracer.start_as_current_span(f"child-{index}"):
+                pass
+        if duration:
+            time.sleep(duration)
+        if error:
+            root.set_status(Status(StatusCode.ERROR))
+
+
+class TestTailSampling:
+    def test_whole_trace_is_dropped_or_kept(self, exporter):
+        sampler = TailSamplingSpanProcessor(exporter, sample_rate=0)
+        tracer = tracer_with(sampler)
+        run_trace(tracer)
+        run_trace(tracer, error=True)
+        assert [span.name for span in exporter.spans] == ["child-0", "child-1", "request"]
+        stats = sampler.stats()
+        assert stats["traces_kept"] == {"error": 1, "slow": 0, "sampled": 0}
+        assert stats["traces_dropped"] == 1
+        assert stats["spans_dropped"]["sampled_out"] == 3
+        assert stats["buffered_spans"] == stats["buffered_traces"] == 0
+
+    def test_child_error_keeps_the_trace(self, exporter):
+        tracer = tracer_with(TailSamplingSpanProcessor(exporter, sample_rate=0))
+        with tracer.start_as_current_span("request"):
+            with tracer.start_as_current_span("query") as child:
+                child.set_status(Status(StatusCode.ERROR))
+        assert len(exporter.spans) == 2
+
+    def test_slow_traces_are_kept(self, exporter):
+        sampler = TailSamplingSpanProcessor(exporter, sample_rate=0, latency_threshold=0.01)
+        run_trace(tracer_with(sampler), duration=0.02)
+        assert sampler.stats()["traces_kept"]["slow"] == 1
+
+    def test_sample_rate_decides_by_trace_id(self, exporter):
+        sampler = TailSamplingSpanProcessor(exporter, sample_rate=0.25)
+        tracer = tracer_with(sampler)
+        for _ in range(2000):
+            run_trace(tracer, children=0)
+        assert 400 <= sampler.stats()["traces_kept"]["sampled"] <= 600
+
+        # Another sampler with the same rate makes the same call for the same trace ID
+        other = TailSamplingSpanProcessor(CollectingProcessor(), sample_rate=0.25)
+        kept_ids = {span.context.trace_id for span in exporter.spans}
+        for trace_id in list(kept_ids)[:20]:
+            assert (trace_id & ((1 << 64) - 1)) < other._sample_bound
+
+    def test_local_root_under_remote_parent_decides(self, exporter):
+        tracer = tracer_with(TailSamplingSpanProcessor(exporter, sample_rate=0))
+        remote = SpanContext(trace_id=1 << 100, span_id=7, is_remote=True, trace_flags=TraceFlags(TraceFlags.SAMPLED))
+        context = trace.set_span_in_context(NonRecordingSpan(remote))
+        with tracer.start_as_current_span("handler", context=context) as span:
+            span.set_status(Status(StatusCode.ERROR))
+        assert [span.name for span in exporter.spans] == ["handler"]
+
+    def test_buffer_bounds(self, exporter):
+        sampler = TailSamplingSpanProcessor(exporter, sample_rate=1, max_traces=2, max_spans_per_trace=2)
+        tracer = tracer_with(sampler)
+        run_trace(tracer, children=5)
+        assert len(exporter.spans) == 3  # Two children plus the root
+        assert sampler.stats()["spans_dropped"]["trace_too_large"] == 3
+
+        # Children of unfinished traces: the oldest trace is decided once a third is buffered
+        roots = [tracer.start_span(f"root-{index}") for index in range(3)]
+        for root in roots:
+            with tracer.start_as_current_span("child", context=trace.set_span_in_context(root)):
+                pass
+        assert sampler.stats()["buffered_traces"] == 2
+        assert sampler.stats()["traces_decided_early"] == 1
+        for root in roots:
+            root.end()
+        assert sampler.stats()["buffered_traces"] == 0
+
+    def test_shutdown_flushes_open_traces(self, exporter):
+        sampler = TailSamplingSpanProcessor(exporter, sample_rate=1)
+        tracer = tracer_with(sampler)
+        root = tracer.start_span("root")
+        with tracer.start_as_current_span("child", context=trace.set_span_in_context(root)):
+            pass
+        sampler.shutdown()
+        assert [span.name for span in exporter.spans] == ["child"]
+        assert exporter.shut_down
+
+    def test_rejects_invalid_rate(self, exporter):
+        with pytest.raises(ValueError):
+            TailSamplingSpanProcessor(exporter, sample_rate=1.5)